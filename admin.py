@@ -1,10 +1,10 @@
-from flask import Blueprint, render_template, request, jsonify
-import json
-from utils.boto import upload_file_blob_to_s3
+from flask import Blueprint, abort, current_app, render_template, request, jsonify
 import os
 import random
-import requests
 from dateutil.parser import parse
+from catalog import CatalogError, detail_query, shoe_details
+from utils.pinterest_boards import BOARDS_LIMIT, board_catalog, filter_boards
+from utils.slow_queries import worst_offenders
 
 admin = Blueprint('admin', __name__)
 
@@ -21,10 +21,14 @@ def sneaker_list_page():
 
 @admin.route('/sneaker/detail')
 def sneaker_detail_page():
-    from app import get_shoe_details
-    sneaker_json = get_shoe_details()[0]
-    sneaker = json.loads(sneaker_json)
-    print(sneaker)
+    try:
+        query = detail_query(request.args)
+    except CatalogError as e:
+        abort(400, str(e))
+    sneaker = shoe_details(current_app.db, query, prefetcher=current_app.extensions.get("detail_prefetch"),
+                           presigner=current_app.extensions.get("presigned_urls"))
+    if sneaker is None:
+        abort(404)
     return render_template('admin/detail-sneaker.html', sneaker=sneaker)
 
 
@@ -42,8 +46,18 @@ def reports_tag_page():
     return render_template('admin/reports-tag.html')
 
 
+@admin.route('/sneaker/slow-queries')
+def slow_queries_page():
+    # Operações lentas agrupadas por formato de consulta, piores primeiro
+    offenders = worst_offenders(current_app.db)
+    return render_template('admin/slow-queries.html', offenders=offenders)
+
+
 @admin.route("/sneaker/upload-file", methods=["POST"])
 def upload_image():
+    # Importado sob demanda para não carregar o boto3 no boot do servidor
+    from utils.boto import upload_file_blob_to_s3
+
     TEST_BUCKET = os.getenv("TEST_S3_BUCKET")
 
     if "file" not in request.files:
@@ -79,34 +93,30 @@ def upload_image():
 
 @admin.route('/pinterest/boards', methods=['GET'])
 def get_pinterest_boards():
-    PINTEREST_TOKEN = os.getenv("PINTEREST_TOKEN")
-    url = "https://api.pinterest.com/v5/boards"
-    headers = {
-        "Authorization": f"Bearer {PINTEREST_TOKEN}"
-    }
+    # Lista completa em cache (todas as páginas da API); só a primeira carga espera o Pinterest
+    q = request.args.get('q', '')
+    limit = request.args.get('limit', str(BOARDS_LIMIT))
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "Parâmetro 'limit' deve ser um inteiro positivo"}), 400
 
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Levanta uma exceção se o status code for 4xx ou 5xx
-        data = response.json()
-
-        boards = []
-        for board in data.get('items', []):
-            board_info = {
-                "id": board.get("id"),
-                "name": board.get("name"),
-                "image_cover_url": board.get("media", {}).get("image_cover_url", "")
-            }
-            boards.append(board_info)
-
-        return jsonify({"items": boards}), 200
-
-    except requests.exceptions.RequestException as e:
+        boards, fetched_at, stale = board_catalog(current_app).boards()
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    matches = filter_boards(boards, q)
+    return jsonify({
+        "items": matches[:int(limit)],
+        "total": len(matches),
+        "fetchedAt": fetched_at.isoformat(),
+        "stale": stale,
+    }), 200
+
 
 @admin.route("/dados-danki")
 def dados_danki():
+    import requests
+
     url = "https://dbutils.ddns.net/datalog/getdatabyproject?project=danki_adidas"
     try:
         response = requests.get(url)
@@ -1,24 +1,39 @@
 # =======================================
 # Library Imports
 # =======================================
-from lib2to3.fixes.fix_input import context
 
 # Import necessary modules for creating a Flask application with MongoDB
-from flask import request, jsonify, Response
+from flask import request, jsonify, make_response, Response
 from bson import ObjectId, json_util
 from bson.json_util import dumps
 import os
+import gzip
+import hashlib
 from dotenv import load_dotenv
 
 from admin import admin
-from database import apply_schemas
+from catalog import CatalogError, detail_query, presign_cards, shoe_details
+from database import apply_schemas, create_mongo_client, ensure_indexes, is_in_memory, run_in_transaction
 from flask import Flask
-from pymongo.mongo_client import MongoClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pymongo.server_api import ServerApi
 import logging
-import requests
 from flask_cors import CORS
-from utils.pinterest import get_pins, upload_images_to_s3, save_to_mongo
+from utils.metrics import MongoCommandMetrics, init_metrics
+from utils.slow_queries import SlowQueryRecorder
+from utils.fieldsets import RELATED_LINKS, DetailFieldset, FieldsetError
+from utils.changes import CHANGES_LIMIT, CHANGES_MAX_LIMIT, DELETE, ChangesExpired, changes_since, head_seq, record_change
+from utils.admission import init_admission
+from utils.boto import init_presigned_urls, unsigned_url
+from utils.compression import init_compression, negotiate
+from utils.list_query import CardListQuery, ListQueryError, is_paginated
+from utils.prefetch import init_prefetch
+from utils.schema import compile_schemas
+from utils.search import SEARCH_LIMIT, SEARCH_MAX_LIMIT, search, terms
+from utils.shoe_cards import REFRESH_SOURCES, SHOE_CARDS_COLLECTION, cards_version, ensure_built, refresh_for
+from utils.snapshot import init_snapshot
+from utils.tags import TagImportError, assign_tags, read_csv
 
 load_dotenv()
 
@@ -33,6 +48,12 @@ logger = logging.getLogger(__name__)
 # List of collection names for which CRUD routes will be dynamically created
 collections = ["shoes", "suggestion", "pinterest", "images" ,"tag"]
 
+# Maximum number of tagAddresses accepted by /tags/resolve in one request
+TAGS_RESOLVE_MAX = 5000
+
+# ObjectId converters and validators compiled once from schemas/*.json (see utils/schema.py)
+schema_codecs = compile_schemas(collections)
+
 
 # =======================================
 # Setup and App Configuration
@@ -51,8 +72,23 @@ def create_app():
 
     app.register_blueprint(admin)
 
+    # Request latency and Mongo command metrics, exposed on /metrics
+    init_metrics(app)
+    # gzip/brotli negotiated from Accept-Encoding; ETag'd bodies are compressed once per version
+    init_compression(app)
+    # Bounded pools for kiosk reads and heavy admin routes; overflow gets 503 + Retry-After
+    init_admission(app)
+
+    # find/aggregate operations slower than SLOW_QUERY_MS are explained and stored in a capped collection
+    slow_query_recorder = SlowQueryRecorder(threshold_ms=float(os.getenv('SLOW_QUERY_MS', '200')))
+
     # Initialize MongoDB client
-    mongo_client = MongoClient(app.config['MONGO_URI'], server_api=ServerApi('1'))
+    mongo_client = create_mongo_client(
+        app.config['MONGO_URI'],
+        server_api=ServerApi('1'),
+        event_listeners=[MongoCommandMetrics(), slow_query_recorder]
+    )
+    slow_query_recorder.attach(mongo_client)
     try:
         # Test the MongoDB connection
         mongo_client.admin.command('ping')
@@ -63,7 +99,20 @@ def create_app():
 
     # Setup MongoDB in the Flask app context
     db = mongo_client['danki-adidas']
-    apply_schemas(db)
+    # Validators and indexes are only re-applied when they changed since the last boot;
+    # the in-memory stand-in has no server-side validation but still enforces unique indexes
+    if not is_in_memory(app.config['MONGO_URI']):
+        apply_schemas(db, force=os.getenv('FORCE_SCHEMA_APPLY', '').lower() == 'true')
+    else:
+        ensure_indexes(db)
+    # Pre-joined list documents; only built here when the collection is still empty
+    ensure_built(db)
+    # Detail payloads of the most scanned shoes, loaded in the background and kept per process
+    init_prefetch(app, db)
+    # Presigned image URLs when the bucket is private (S3_PRIVATE_BUCKET), signed in batch and cached
+    init_presigned_urls(app)
+    # Offline catalog snapshot, assembled and refreshed in the background, never on a request
+    init_snapshot(app, db)
 
     app.mongo_client = mongo_client
     app.db = db
@@ -78,40 +127,21 @@ db = app.db
 
 
 # =======================================
-# Auxiliary Methods
+# Routes
 # =======================================
 
-def convert_object_ids(data):
+def duplicate_key_response(collection_name, data):
     """
-    Convert JSON fields with $oid to MongoDB ObjectId.
-
-    This function processes incoming JSON data and ensures fields formatted as MongoDB ObjectIds
-    (e.g., {"$oid": "some_id"}) are properly converted to ObjectId instances.
-
-    Args:
-        data (dict or list): The JSON payload received in the request.
-
-    Returns:
-        dict or list: The data with ObjectId fields correctly converted.
-    """
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, dict) and "$oid" in value:
-                try:
-                    data[key] = ObjectId(value["$oid"])
-                except Exception as e:
-                    logger.error(f"Invalid ObjectId value for key '{key}': {value}. Error: {e}")
-                    raise ValueError(f"Invalid ObjectId value for key '{key}': {value}")
-            elif isinstance(value, (dict, list)):
-                data[key] = convert_object_ids(value)
-    elif isinstance(data, list):
-        return [convert_object_ids(item) for item in data]
-    return data
+    Build the 409 answer for a write refused by a unique index.
 
+    For `tag` the body names the shoe that already owns the `tagAddress`, as the tag routes
+    and /tags/assign report it.
+    """
+    if collection_name == "tag":
+        owner = db["tag"].find_one({"tagAddress": data.get("tagAddress")}, {"shoeId": 1}) or {}
+        return jsonify({"error": "tagAddress já vinculado a outro tênis", "shoeId": owner.get("shoeId")}), 409
+    return jsonify({"error": "Document conflicts with an existing one (unique index)"}), 409
 
-# =======================================
-# Routes
-# =======================================
 
 def create_crud_routes(collection_name):
     """
@@ -123,6 +153,7 @@ def create_crud_routes(collection_name):
         collection_name (str): The name of the MongoDB collection for which to create routes.
     """
     collection = db[collection_name]  # Access the MongoDB collection
+    codec = schema_codecs[collection_name]
 
     @app.route(f'/{collection_name}', methods=['POST'], endpoint=f'create_{collection_name}')
     def create_document():
@@ -132,11 +163,27 @@ def create_crud_routes(collection_name):
             logger.warning("No data provided in the request.")
             return jsonify({"error": "No data provided"}), 400
 
+        if collection_name == "shoes":
+            # `version` only ever changes through the versioned updates
+            data.pop("version", None)
+        try:
+            data = codec.convert(data)  # {"$oid": ...} -> ObjectId in the declared objectId fields
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        errors = codec.validate(data)
+        if errors:
+            logger.warning(f"Rejected document for {collection_name}: {errors}")
+            return jsonify({"error": "Document failed validation", "details": errors}), 400
+
         try:
-            data = convert_object_ids(data)  # Convert $oid fields to ObjectId
             result = collection.insert_one(data)
             logger.info(f"Document created in {collection_name} with ID: {result.inserted_id}")
+            refresh_for(db, collection_name, data)
+            record_change(db, collection_name, result.inserted_id)
             return jsonify({"message": "Document created", "id": str(result.inserted_id)}), 201
+        except DuplicateKeyError:
+            logger.warning(f"Duplicate key on create in {collection_name}.")
+            return duplicate_key_response(collection_name, data)
         except Exception as e:
             logger.error(f"Failed to create document in {collection_name}: {e}")
             return jsonify({"error": str(e)}), 500
@@ -171,19 +218,66 @@ def create_crud_routes(collection_name):
 
     @app.route(f'/{collection_name}/<id>', methods=['PUT'], endpoint=f'update_{collection_name}')
     def update_document(id):
-        """Handle PUT requests to update a document by ID."""
+        """
+        Handle PUT requests to update a document by ID.
+
+        Shoes get the same optimistic concurrency as /update-shoe-full: every update increments
+        `version`, and a payload carrying the `version` it was loaded with gets a 409 (with the
+        current version) if someone else saved in between. `version` itself is never `$set`.
+        """
         data = request.json
+        expected_version = None
+        if collection_name == "shoes" and isinstance(data, dict):
+            expected_version = data.pop("version", None)
+            if expected_version is not None and type(expected_version) is not int:
+                return jsonify({"error": "version must be an integer"}), 400
         if not data:
             logger.warning("No data provided in the request.")
             return jsonify({"error": "No data provided"}), 400
 
         try:
-            result = collection.update_one({"_id": ObjectId(id)}, {"$set": data})
-            if result.matched_count == 0:
+            data = codec.convert(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Only the fields being set are checked: the rest of the document is already stored
+        errors = codec.validate(data, partial=True)
+        if errors:
+            logger.warning(f"Rejected update for {collection_name}: {errors}")
+            return jsonify({"error": "Document failed validation", "details": errors}), 400
+
+        try:
+            # The shoe a document belonged to before the update also needs its card refreshed
+            previous = None
+            if collection_name in REFRESH_SOURCES:
+                previous = collection.find_one({"_id": ObjectId(id)}, {"shoeId": 1})
+            query, update = {"_id": ObjectId(id)}, {"$set": data}
+            if collection_name == "suggestion":
+                update.update(manual_suggestion_unset(data))
+            if collection_name == "shoes":
+                update["$inc"] = {"version": 1}
+                if expected_version is not None:
+                    # Shoes never saved through a versioned route have no `version` yet: that is 0
+                    query["version"] = expected_version if expected_version else {"$in": [0, None]}
+            updated = collection.find_one_and_update(query, update, projection={"version": 1},
+                                                     return_document=ReturnDocument.AFTER)
+            if updated is None:
+                if expected_version is not None:
+                    current = collection.find_one({"_id": ObjectId(id)}, {"version": 1})
+                    if current is not None:
+                        logger.warning(f"Version conflict on update of {id} in {collection_name}.")
+                        return jsonify({"error": "Shoe was modified by someone else",
+                                        "version": current.get("version", 0)}), 409
                 logger.warning(f"Document with ID {id} not found in {collection_name}.")
                 return jsonify({"error": "Document not found"}), 404
             logger.info(f"Updated document with ID {id} in {collection_name}")
+            refresh_for(db, collection_name, previous, data)
+            record_change(db, collection_name, ObjectId(id))
+            if collection_name == "shoes":
+                return jsonify({"message": "Document updated", "version": updated["version"]}), 200
             return jsonify({"message": "Document updated"}), 200
+        except DuplicateKeyError:
+            logger.warning(f"Duplicate key on update of {id} in {collection_name}.")
+            return duplicate_key_response(collection_name, data)
         except Exception as e:
             logger.error(f"Failed to update document in {collection_name}: {e}")
             return jsonify({"error": str(e)}), 500
@@ -192,62 +286,114 @@ def create_crud_routes(collection_name):
     def delete_document(id):
         """Handle DELETE requests to remove a document by ID."""
         try:
-            result = collection.delete_one({"_id": ObjectId(id)})
-            if result.deleted_count == 0:
+            deleted = collection.find_one_and_delete({"_id": ObjectId(id)})
+            if deleted is None:
                 logger.warning(f"Document with ID {id} not found in {collection_name}.")
                 return jsonify({"error": "Document not found"}), 404
             logger.info(f"Deleted document with ID {id} from {collection_name}")
+            refresh_for(db, collection_name, deleted)
+            record_change(db, collection_name, deleted["_id"], DELETE)
             return jsonify({"message": "Document deleted"}), 200
         except Exception as e:
             logger.error(f"Failed to delete document from {collection_name}: {e}")
             return jsonify({"error": str(e)}), 500
 
 
+def manual_suggestion_unset(data):
+    """
+    `$unset` for a suggestion written by hand: without `source` (and the `scores` of the
+    generated list) it counts as curated, so imports/recommendations.py no longer overwrites it.
+
+    Args:
+        data (dict): Fields being set; a write that sets `source` itself is left alone.
+    """
+    fields = {field: "" for field in ("source", "scores") if field not in data}
+    return {"$unset": fields} if "source" in fields else {}
+
+
 # Dynamically create CRUD routes for all specified collections
 for collection_name in collections:
     create_crud_routes(collection_name)
 
 
+def find_shoe_cards(query, fields, sort=(("_id", 1),), skip=0, limit=0):
+    """
+    Read shoe cards (see utils/shoe_cards.py), in _id order unless `sort` says otherwise.
+
+    Args:
+        query (dict): Filter on the card fields.
+        fields (list): Card fields to return besides _id.
+        sort (list, optional): (field, direction) pairs.
+        skip (int, optional): Cards to skip.
+        limit (int, optional): Maximum number of cards (0 for no limit).
+
+    Returns:
+        list: Cards, each with an `id` copy of `_id` as the list endpoints have always returned;
+        image links are presigned when the bucket is private.
+    """
+    cursor = db[SHOE_CARDS_COLLECTION].find(query, {field: 1 for field in fields}).sort(list(sort))
+    cards = list(cursor.skip(skip).limit(limit))
+    for card in cards:
+        card["id"] = card["_id"]
+    return presigned_cards(cards)
+
+
+def presigned_cards(cards):
+    """Presign the image links of cards when a private bucket is configured (see utils/boto.py)."""
+    presigner = app.extensions.get("presigned_urls")
+    return presign_cards(cards, presigner) if presigner is not None else cards
+
+
+def cards_etag():
+    """
+    Weak ETag of a list response: the shoe_cards version plus the request path and query string.
+
+    Weak because the same representation is served gzip/brotli/identity encoded. With a private
+    bucket the signing period is part of it too, so clients drop their copy once the URLs are re-signed.
+    """
+    digest = hashlib.sha1(request.full_path.encode()).hexdigest()[:12]
+    presigner = app.extensions.get("presigned_urls")
+    signing = f"-s{presigner.epoch()}" if presigner is not None else ""
+    return f"cards-{cards_version(db)}{signing}-{digest}"
+
+
+def not_modified(etag):
+    """304 response for a client whose If-None-Match already matches `etag`."""
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def cards_response(results, etag):
+    """Serialize a list (or a page) of cards with its weak ETag."""
+    response = make_response(dumps(results), 200)
+    response.set_etag(etag, weak=True)
+    return response
+
+
 # Atualizações no pipeline de /shoes-with-images
 @app.route('/shoes-with-images', methods=['GET'])
 def get_shoes_with_images():
     """
-    Aggregates data from the 'shoes' and 'images' collections
-    to provide a combined view of shoes with their image links.
+    Lists every shoe with the image links of its first images document.
+
+    Reads the pre-joined shoe_cards collection, kept up to date on every write to shoes and images.
 
     Returns:
-        JSON response with a list of shoes, each including its id, model, code, title, description, and image links.
+        JSON response with a list of shoes, each including its id, model, code and image links.
     """
-    logger.info("Starting aggregation of shoes with their image links.")
+    logger.info("Listing shoes with their image links.")
     try:
-        shoes_collection = db['shoes']
-
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "images",
-                    "localField": "_id",
-                    "foreignField": "shoeId",
-                    "as": "images"
-                }
-            },
-            {
-                "$project": {
-                    "id": "$_id",
-                    "model": 1,
-                    "code": 1,
-                    "images": {"$arrayElemAt": ["$images.links", 0]}
-                }
-            }
-        ]
-
-        results = list(shoes_collection.aggregate(pipeline))
-        json_results = dumps(results)
-
-        logger.info(f"Aggregation successful. Retrieved {len(results)} shoes.")
-        return json_results, 200
+        # Read before the cards: a concurrent write only makes the response look older than it is
+        etag = cards_etag()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        results = find_shoe_cards({}, ["model", "code", "images"])
+
+        logger.info(f"Retrieved {len(results)} shoes.")
+        return cards_response(results, etag)
     except Exception as e:
-        logger.error(f"Failed to aggregate shoes with images: {e}")
+        logger.error(f"Failed to list shoes with images: {e}")
         return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
 
 
@@ -312,83 +458,28 @@ def get_shoe_with_pinterest():
 def get_shoe_details():
     """
     Retrieves detailed information about a single shoe based on its ID, model, or code.
+
+    Query Parameters:
+        fields (str, optional): Comma separated fields to return (see utils/fieldsets.py).
+        expand (str, optional): Comma separated expansions among colors, suggestion and pinterest.
+        imagesLimit (int, optional): Maximum number of image links returned.
+
+    Without `fields`/`expand` the full payload is returned. Only the queries needed by the
+    requested fields run, and colors/suggestions are resolved with one `$in` query per collection.
     """
     logger.info("Starting aggregation for a single shoe's detailed information.")
     try:
-        shoes_collection = db['shoes']
-        images_collection = db['images']
-        suggestions_collection = db['suggestion']
-        pinterest_collection = db['pinterest']
-
-        shoe_id = request.args.get('id')
-        model = request.args.get('model')
-        code = request.args.get('code')
+        query = detail_query(request.args)
+        fieldset = DetailFieldset.from_args(request.args)
+    except (CatalogError, FieldsetError) as e:
+        return jsonify({"error": str(e)}), 400
 
-        query = {}
-        if shoe_id:
-            query["_id"] = ObjectId(shoe_id)
-        elif model:
-            query["model"] = model
-        elif code:
-            query["code"] = code
-        else:
-            return jsonify({"error": "No valid query parameter provided (id, model, or code)."}), 400
-
-        shoe_details = shoes_collection.find_one(query)
-        if not shoe_details:
+    try:
+        result = shoe_details(db, query, fieldset, prefetcher=app.extensions.get("detail_prefetch"),
+                              presigner=app.extensions.get("presigned_urls"))
+        if result is None:
             return jsonify({"error": "Shoe not found with the given criteria."}), 404
 
-        # Fetch related images
-        images = list(images_collection.find({"shoeId": shoe_details['_id']}))
-        image_links = [link for image in images for link in image['links']]  # Get all images link
-
-        pinterest_images = list(pinterest_collection.find({"shoeId": shoe_details['_id']}))
-        pinterest_links = [pinterest_link for pinterest_image in pinterest_images for pinterest_link in
-                           pinterest_image['links']]
-
-        # Fetch colors with image links
-        color_details = []
-        for color_id in shoe_details.get('colors', []):
-            color = shoes_collection.find_one({"_id": color_id})
-            if color:
-                color_image = images_collection.find_one({"shoeId": color['_id']})
-                if color_image and len(color_image['links']) > 1:
-                    color_details.append({
-                        "shoeId": str(color['_id']),
-                        "image": color_image['links'][1],
-                        "code": color.get('code'),
-                        "model": color.get('model')
-                    })
-
-        # Fetch suggestions with image links
-        suggestion_details = []
-        suggestions = suggestions_collection.find_one({"shoeId": shoe_details['_id']})
-        if suggestions:
-            for suggested_id in suggestions.get('shoes', []):
-                suggested_shoe = shoes_collection.find_one({"_id": suggested_id})
-                if suggested_shoe:
-                    suggested_image = images_collection.find_one({"shoeId": suggested_shoe['_id']})
-                    if suggested_image and len(suggested_image['links']) > 1:
-                        suggestion_details.append({
-                            "shoeId": str(suggested_shoe['_id']),
-                            "image": suggested_image['links'][0],
-                            "code": suggested_shoe.get('code'),
-                            "model": suggested_shoe.get('model')
-                        })
-
-        result = {
-            "_id": str(shoe_details['_id']),
-            "code": shoe_details.get('code'),
-            "model": shoe_details.get('model'),
-            "title": shoe_details.get('title'),
-            "description": shoe_details.get('description'),
-            "colors": color_details,
-            "images": image_links,
-            "pinterest": pinterest_links,
-            "suggestion": suggestion_details,
-            "pinterestId": shoe_details.get('pinterestId')
-        }
-
         json_result = dumps(result)
         logger.info("Aggregation successful for the requested shoe.")
         return json_result, 200
@@ -410,6 +501,9 @@ def add_pinterest_data():
     Returns:
         JSON response indicating success or failure.
     """
+    # Pinterest/S3 helpers pull in boto3, so they are only imported when this route is used
+    from utils.pinterest import get_pins, upload_images_to_s3, save_to_mongo
+
     try:
 
         data = request.json
@@ -443,7 +537,7 @@ def add_pinterest_data():
         uploaded_urls = upload_images_to_s3(image_paths, folder_name)
 
         # Salva os links no MongoDB
-        save_to_mongo(shoe_id, uploaded_urls)
+        save_to_mongo(shoe_id, uploaded_urls, db=db)
 
         # Limpa os arquivos locais
         for image_path in image_paths:
@@ -500,98 +594,222 @@ def get_shoe_by_tag():
         return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
 
 
+@app.route('/tags/resolve', methods=['POST'])
+def resolve_tags():
+    """
+    Resolves many tagAddresses at once, for shelf checks and inventory scans.
+
+    All tags are looked up with a single `$in` query on the tag collection (and, with
+    `cards`, a single `$in` on shoe_cards), instead of one /tag-by-address request per tag.
+
+    Request Body:
+        tagAddresses (list): Tag addresses to resolve, at most 5000 (duplicates are ignored).
+        cards (bool, optional): Also return the list card of every shoe found.
+
+    Returns:
+        JSON {"tags": {tagAddress: shoeId}, "unknown": [tagAddress], "shoes": {shoeId: card}};
+        "shoes" only when `cards` is true, with image links presigned when the bucket is private.
+    """
+    data = request.get_json(silent=True) or {}
+    addresses = data.get("tagAddresses")
+    if not isinstance(addresses, list) or not all(isinstance(address, str) for address in addresses):
+        return jsonify({"error": "tagAddresses must be a list of strings"}), 400
+    addresses = list(dict.fromkeys(address.strip() for address in addresses if address.strip()))
+    if len(addresses) > TAGS_RESOLVE_MAX:
+        return jsonify({"error": f"At most {TAGS_RESOLVE_MAX} tagAddresses per request"}), 400
+
+    try:
+        tags = {}
+        # Oldest tag first, like the single-tag lookup, if an address was registered twice
+        for tag in db['tag'].find({"tagAddress": {"$in": addresses}}, {"tagAddress": 1, "shoeId": 1}).sort("_id", 1):
+            tags.setdefault(tag["tagAddress"], str(tag.get("shoeId")))
+        result = {"tags": tags, "unknown": [address for address in addresses if address not in tags]}
+
+        if data.get("cards"):
+            shoe_ids = [ObjectId(shoe_id) for shoe_id in set(tags.values()) if ObjectId.is_valid(shoe_id)]
+            projection = {"model": 1, "code": 1, "title": 1, "images": {"$slice": RELATED_LINKS},
+                          "tagCount": 1, "hasPinterest": 1}
+            cards = presigned_cards(list(db[SHOE_CARDS_COLLECTION].find({"_id": {"$in": shoe_ids}}, projection)))
+            result["shoes"] = {str(card["_id"]): card for card in cards}
+
+        logger.info(f"Resolved {len(tags)} of {len(addresses)} tagAddresses.")
+        return Response(dumps(result), mimetype='application/json')
+    except Exception as e:
+        logger.error(f"Failed to resolve tags: {e}")
+        return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
+
+
 @app.route('/shoes-and-tags', methods=['GET'])
 def shoes_and_tags():
+    """
+    Lists every shoe with its first image links and kiosk tags.
+
+    With `page` or `size` the list is paginated for Tabulator's remote mode (see utils/list_query.py):
+    sorting, filtering and slicing run in MongoDB and the response carries the page count and total.
+
+    Query Parameters:
+        hasTag (str, optional): 'true' for shoes with at least one tag, 'false' for shoes without tags.
+        page (int, optional): Page number, starting at 1.
+        size (int, optional): Shoes per page (default 20, at most 100).
+        sort[i][field], sort[i][dir] (str, optional): Sort by code, model or tag (tag count).
+        filter[i][field], filter[i][type], filter[i][value] (str, optional): Filter code, model or
+            tag with type like, starts or = (indexed prefixes, see utils/list_query.py).
+        q (str, optional): Case-insensitive text searched in model, code and tag addresses.
+
+    Returns:
+        JSON response with a list of shoes, each including its id, model, code, image links and tags;
+        paginated requests get {"last_page", "last_row" (total matching shoes), "data"} instead.
+    """
     try:
-        shoes_collection = db['shoes']
+        etag = cards_etag()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
         has_tag_param = request.args.get('hasTag')
 
-        match_stage = {}
+        query = {}
         if has_tag_param is not None:
             if has_tag_param.lower() == 'true':
-                match_stage = {
-                    "$match": {
-                        "$expr": {
-                            "$gt": [{"$size": "$tag"}, 0]
-                        }
-                    }
-                }
+                query = {"tagCount": {"$gt": 0}}
             elif has_tag_param.lower() == 'false':
-                match_stage = {
-                    "$match": {
-                        "$expr": {
-                            "$eq": [{"$size": "$tag"}, 0]
-                        }
-                    }
-                }
+                query = {"tagCount": 0}
 
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "images",
-                    "localField": "_id",
-                    "foreignField": "shoeId",
-                    "as": "images"
-                }
-            },
-            {
-                "$lookup": {
-                    "from": "tag",
-                    "let": {"shoeIdStr": {"$toString": "$_id"}},
-                    "pipeline": [
-                        {
-                            "$match": {
-                                "$expr": {
-                                    "$eq": ["$shoeId", "$$shoeIdStr"]
-                                }
-                            }
-                        }
-                    ],
-                    "as": "tag"
-                }
-            },
-            {
-                "$project": {
-                    "id": "$_id",
-                    "model": 1,
-                    "code": 1,
-                    "images": {"$arrayElemAt": ["$images.links", 0]},
-                    "tag": "$tag"
-                }
-            }
-        ]
+        fields = ["model", "code", "images", "tag"]
+        if is_paginated(request.args):
+            try:
+                list_query = CardListQuery.from_args(request.args)
+            except ListQueryError as e:
+                return jsonify({"error": str(e)}), 400
+            match = list_query.match(query)
+            total = db[SHOE_CARDS_COLLECTION].count_documents(match)
+            results = find_shoe_cards(match, fields, list_query.sort_spec(), list_query.skip, list_query.size)
 
-        if match_stage:
-            pipeline.append(match_stage)
-
-        pipeline.append({
-            "$project": {
-                "id": 1,
-                "model": 1,
-                "code": 1,
-                "images": 1,
-                "tag": {
-                    "$map": {
-                        "input": "$tag",
-                        "as": "t",
-                        "in": {
-                            "tagAddress": "$$t.tagAddress",
-                            "otherField": "$$t.otherField"  # adicione aqui outros campos que desejar
-                        }
-                    }
-                }
-            }
-        })
+            logger.info(f"Retrieved page {list_query.page} ({len(results)} of {total} shoes with tags).")
+            return cards_response({"last_page": list_query.last_page(total), "last_row": total, "data": results}, etag)
 
-        results = list(shoes_collection.aggregate(pipeline))
-        json_results = dumps(results)
+        results = find_shoe_cards(query, fields)
 
-        logger.info(f"Aggregation successful. Retrieved {len(results)} shoes.")
-        return json_results, 200
+        logger.info(f"Retrieved {len(results)} shoes with tags.")
+        return cards_response(results, etag)
+    except Exception as e:
+        logger.error(f"Failed to list shoes and tags: {e}")
+        return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
+
+
+@app.route('/shoes/search', methods=['GET'])
+def search_shoes():
+    """
+    Accent-insensitive prefix search over shoe model, code and title, for autocomplete.
+
+    Every word typed must be the prefix of a word of the shoe (see utils/search.py), so
+    "tenis ultra" finds "TÊNIS ULTRABOOST". Served from the searchKeys index of shoe_cards.
+    Results are ranked: codes starting with the text (the exact code first), then models
+    starting with it, then the other matches by code.
+
+    Query Parameters:
+        q (str): Text typed by the user.
+        limit (int, optional): Maximum number of matches (default 10, at most 50).
+
+    Returns:
+        JSON response with up to `limit` shoes, each with id, code, model, title and its first
+        two image links (the first one is the thumbnail).
+    """
+    limit = request.args.get('limit', str(SEARCH_LIMIT))
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "Parameter 'limit' must be a positive integer"}), 400
+    text = request.args.get('q')
+    if not terms(text):
+        return jsonify({"error": "Parameter 'q' with at least one letter or digit is required"}), 400
+
+    try:
+        etag = cards_etag()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        projection = {"model": 1, "code": 1, "title": 1, "images": {"$slice": RELATED_LINKS}}
+        results = search(db[SHOE_CARDS_COLLECTION], text, min(int(limit), SEARCH_MAX_LIMIT), projection)
+        for card in results:
+            card["id"] = card["_id"]
+        presigned_cards(results)
+
+        logger.info(f"Search for '{text}' matched {len(results)} shoes.")
+        return cards_response(results, etag)
+    except Exception as e:
+        logger.error(f"Failed to search shoes: {e}")
+        return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
+
+
+@app.route('/catalog/snapshot', methods=['GET'])
+def catalog_snapshot():
+    """
+    Compact snapshot of the catalog for kiosks that resolve tag scans offline.
+
+    The body is JSON {"version", "generatedAt", "tags": {tagAddress: shoeId}, "shoes": {shoeId:
+    full /shoe-details payload}}, stored gzip-compressed. It is refreshed incrementally in a
+    background thread (see utils/snapshot.py): the request always gets the last assembled body
+    and at most kicks off the next refresh. Kiosks refresh it with If-None-Match and get a 304
+    while the catalog is unchanged.
+
+    Returns:
+        The gzip-encoded snapshot (decompressed for clients that do not accept gzip), or 503 with
+        Retry-After while the first snapshot of this process is still being built.
+    """
+    snapshot = app.extensions["catalog_snapshot"].get()
+    if snapshot is None:
+        response = jsonify({"error": "Catalog snapshot is still being built"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+
+    if request.if_none_match.contains_weak(snapshot["etag"]):
+        return not_modified(snapshot["etag"])
+
+    if negotiate(request.headers.get('Accept-Encoding'), available=("gzip",)) == "gzip":
+        response = Response(snapshot["body"], mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(gzip.decompress(snapshot["body"]), mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    response.set_etag(snapshot["etag"], weak=True)
+    logger.info(f"Served catalog snapshot version {snapshot['version']} ({snapshot['size']} bytes uncompressed).")
+    return response
+
+
+@app.route('/changes', methods=['GET'])
+def get_changes():
+    """
+    Delta sync: catalog writes since a cursor, from the ordered change log (utils/changes.py).
+
+    Each change carries the current document (`op: "upsert"`) or is a tombstone (`op:
+    "delete"`); several writes to the same document within a batch collapse into one change.
+    Without `since` only the current cursor is returned, to be taken before a full download.
+
+    Query Parameters:
+        since (int, optional): `next` of the previous response.
+        limit (int, optional): Maximum number of log entries read (default 500, at most 5000).
+
+    Returns:
+        JSON {"since", "next", "hasMore", "changes"}, or 410 if the cursor is no longer
+        retained and the client has to download the catalog again.
+    """
+    since = request.args.get('since')
+    limit = request.args.get('limit', str(CHANGES_LIMIT))
+    if (since is not None and not since.isdigit()) or not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "Parameters 'since' and 'limit' must be non-negative integers"}), 400
+
+    try:
+        if since is None:
+            result = {"since": None, "next": head_seq(db), "hasMore": False, "changes": []}
+        else:
+            result = changes_since(db, int(since), min(int(limit), CHANGES_MAX_LIMIT))
+    except ChangesExpired as e:
+        logger.warning(f"Change log cursor rejected: {e}")
+        return jsonify({"error": "Cursor expired, download the catalog again", "details": str(e)}), 410
     except Exception as e:
-        logger.error(f"Failed to aggregate shoes with images: {e}")
+        logger.error(f"Failed to read the change log: {e}")
         return jsonify({"error": "Failed to retrieve data", "details": str(e)}), 500
 
+    logger.info(f"Served {len(result['changes'])} changes after {since} (next {result['next']}).")
+    return Response(dumps(result), mimetype='application/json')
+
 
 @app.route("/sneaker/<shoe_id>/tags", methods=["GET"])
 def get_tags(shoe_id):
@@ -614,16 +832,79 @@ def add_tag(shoe_id):
         "tagAddress": tag_address
     }
 
-    result = db["tag"].insert_one(tag_doc)
+    try:
+        result = db["tag"].insert_one(tag_doc)
+    except DuplicateKeyError:
+        return duplicate_key_response("tag", tag_doc)
+    refresh_for(db, "tag", tag_doc)
+    record_change(db, "tag", result.inserted_id)
     tag_doc["_id"] = str(result.inserted_id)
     return jsonify(tag_doc), 201
 
 
+@app.route("/tags/assign", methods=["POST"])
+def assign_tags_in_bulk():
+    """
+    Links many tags to shoes at once, e.g. for a store rollout (see utils/tags.py).
+
+    Request Body:
+        assignments (list): Items {"tagAddress", "shoeId"} or {"tagAddress", "code"}.
+        move (bool, optional): Move tags already linked to another shoe instead of reporting them.
+
+    Returns:
+        JSON report {"created", "moved", "unchanged", "conflicts": [{"row", "tagAddress", "reason"}]},
+        where `row` is the 1-based position in `assignments`.
+    """
+    data = request.get_json(silent=True) or {}
+    assignments = data.get("assignments")
+    if not isinstance(assignments, list) or not all(isinstance(item, dict) for item in assignments):
+        return jsonify({"error": "assignments must be a list of objects"}), 400
+
+    try:
+        rows = [{key: item.get(key) for key in ("tagAddress", "shoeId", "code") if isinstance(item.get(key), str)}
+                for item in assignments]
+        return jsonify(assign_tags(db, rows, move=bool(data.get("move")))), 200
+    except Exception as e:
+        logger.error(f"Failed to assign tags: {e}")
+        return jsonify({"error": "Failed to assign tags", "details": str(e)}), 500
+
+
+@app.route("/tags/import", methods=["POST"])
+def import_tags_csv():
+    """
+    Links the tags of an uploaded CSV (multipart field `file`) to shoes.
+
+    The CSV has a header with `tagAddress` and `shoeId` or `code`, comma or semicolon separated.
+    Form field `move=true` moves tags already linked to another shoe.
+
+    Returns:
+        The same report as /tags/assign, with `row` being the line number in the file.
+    """
+    upload = request.files.get("file")
+    if upload is None or upload.filename == "":
+        return jsonify({"error": "Nenhum arquivo enviado"}), 400
+
+    try:
+        rows = read_csv(upload.stream)
+    except (TagImportError, UnicodeDecodeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        report = assign_tags(db, rows, move=request.form.get("move", "").lower() == "true")
+        logger.info(f"Imported tag CSV {upload.filename}: {len(rows)} rows.")
+        return jsonify(report), 200
+    except Exception as e:
+        logger.error(f"Failed to import tags: {e}")
+        return jsonify({"error": "Failed to import tags", "details": str(e)}), 500
+
+
 @app.route("/tag/<tag_id>", methods=["DELETE"])
 def delete_tag_by_id(tag_id):
-    result = db["tag"].delete_one({"_id": ObjectId(tag_id)})
-    if result.deleted_count == 0:
+    deleted = db["tag"].find_one_and_delete({"_id": ObjectId(tag_id)})
+    if deleted is None:
         return jsonify({"error": "Tag não encontrada"}), 404
+    refresh_for(db, "tag", deleted)
+    record_change(db, "tag", deleted["_id"], DELETE)
     return jsonify({"success": True})
 
 
@@ -648,8 +929,72 @@ def get_images_by_shoeid(shoe_id):
         return Response(json_util.dumps({"error": str(e)}), status=400, mimetype='application/json')
 
 
+class VersionConflict(Exception):
+    """Raised inside the update transaction when the shoe changed since the editor loaded it."""
+
+
+def load_shoe_state(shoe_id):
+    """
+    Read a shoe together with its images and suggestion documents in a single round trip.
+
+    Returns:
+        dict or None: The shoe with `images` and `suggestion` arrays of the related documents.
+    """
+    pipeline = [
+        {"$match": {"_id": shoe_id}},
+        {"$lookup": {"from": "images", "localField": "_id", "foreignField": "shoeId", "as": "images"}},
+        {"$lookup": {"from": "suggestion", "localField": "_id", "foreignField": "shoeId", "as": "suggestion"}},
+    ]
+    return next(iter(db.shoes.aggregate(pipeline)), None)
+
+
+def diff_shoe_update(current, data):
+    """
+    Compare an /update-shoe-full payload with the stored state.
+
+    Args:
+        current (dict): Result of load_shoe_state.
+        data (dict): Request payload.
+
+    Returns:
+        tuple: (changed shoe fields, new image links or None, new suggestion ids or None);
+        None means the related document is already up to date.
+    """
+    shoe_update = {
+        "code": data["code"],
+        "model": data["model"],
+        "title": data["title"],
+        "description": data["description"],
+        "colors": [ObjectId(color["shoeId"]) for color in data.get("colors", [])],
+        "pinterestId": data["pinterestId"]
+    }
+    shoe_changes = {key: value for key, value in shoe_update.items() if current.get(key) != value}
+
+    # The admin form sends back the (possibly presigned) URLs it was given; links are stored unsigned
+    links = [unsigned_url(link) for link in data.get("images", [])]
+    current_links = current["images"][0].get("links", []) if current["images"] else []
+    suggested = [ObjectId(sug["shoeId"]) for sug in data.get("suggestion", [])]
+    current_suggested = current["suggestion"][0].get("shoes", []) if current["suggestion"] else []
+
+    return (
+        shoe_changes,
+        links if links != current_links else None,
+        suggested if suggested != current_suggested else None,
+    )
+
+
 @app.route('/update-shoe-full', methods=['PUT'])
 def update_shoe_full():
+    """
+    Update a shoe, its image links and its suggestions from the admin detail form.
+
+    Only the documents whose content changed are written, all in one transaction (when the
+    deployment supports transactions). Every change increments the shoe's `version`; a payload
+    carrying the `version` it was loaded with gets a 409 if someone else saved in between.
+
+    Returns:
+        JSON response with the new version, 409 on a version conflict or 404 if the shoe does not exist.
+    """
     data = request.json
 
     if not data:
@@ -658,41 +1003,69 @@ def update_shoe_full():
     try:
         shoe_id = ObjectId(data['_id'])
 
-        # Atualiza a collection "shoes"
-        shoe_update = {
-            "code": data["code"],
-            "model": data["model"],
-            "title": data["title"],
-            "description": data["description"],
-            "colors": [ObjectId(color["shoeId"]) for color in data.get("colors", [])],
-            "pinterestId": data["pinterestId"]
-        }
-        db.shoes.update_one({"_id": shoe_id}, {"$set": shoe_update})
-
-        # Atualiza ou insere em "images"
-        db.images.update_one(
-            {"shoeId": shoe_id},
-            {"$set": {"links": data.get("images", [])}},
-            upsert=True
-        )
-
-        # Atualiza ou insere em "suggestion"
-        db.suggestion.update_one(
-            {"shoeId": shoe_id},
-            {"$set": {
-                "shoes": [ObjectId(sug["shoeId"]) for sug in data.get("suggestion", [])]
-            }},
-            upsert=True
-        )
-
-        return jsonify({"message": "Shoe, images, and suggestions updated successfully"}), 200
+        current = load_shoe_state(shoe_id)
+        if current is None:
+            return jsonify({"error": "Shoe not found"}), 404
+        current_version = current.get("version", 0)
+        if "version" in data and data["version"] != current_version:
+            return jsonify({"error": "Shoe was modified by someone else", "version": current_version}), 409
+
+        shoe_changes, links, suggested = diff_shoe_update(current, data)
+        if not shoe_changes and links is None and suggested is None:
+            return jsonify({"message": "No changes", "version": current_version}), 200
+
+        errors = schema_codecs["shoes"].validate(shoe_changes, partial=True)
+        if links is not None:
+            errors += schema_codecs["images"].validate({"links": links}, partial=True)
+        if errors:
+            return jsonify({"error": "Document failed validation", "details": errors}), 400
+
+        # _ids of the images/suggestion documents written, for the change log
+        related = {}
+
+        def write(session):
+            related.clear()
+            # The version guard makes a concurrent save between our read and this write a conflict
+            result = db.shoes.update_one(
+                {"_id": shoe_id, "version": current.get("version")},
+                {"$set": shoe_changes, "$inc": {"version": 1}} if shoe_changes else {"$inc": {"version": 1}},
+                session=session
+            )
+            if result.matched_count == 0:
+                raise VersionConflict()
+
+            # Atualiza ou insere em "images"
+            if links is not None:
+                related["images"] = db.images.find_one_and_update(
+                    {"shoeId": shoe_id}, {"$set": {"links": links}}, projection={"_id": 1},
+                    upsert=True, return_document=ReturnDocument.AFTER, session=session
+                )["_id"]
+
+            # Atualiza ou insere em "suggestion"
+            if suggested is not None:
+                related["suggestion"] = db.suggestion.find_one_and_update(
+                    {"shoeId": shoe_id}, {"$set": {"shoes": suggested}, **manual_suggestion_unset({})},
+                    projection={"_id": 1},
+                    upsert=True, return_document=ReturnDocument.AFTER, session=session
+                )["_id"]
+
+        try:
+            run_in_transaction(app.mongo_client, write)
+        except VersionConflict:
+            current_version = db.shoes.find_one({"_id": shoe_id}, {"version": 1}).get("version", 0)
+            return jsonify({"error": "Shoe was modified by someone else", "version": current_version}), 409
+
+        refresh_for(db, "shoes", {"_id": shoe_id})
+        record_change(db, "shoes", shoe_id)
+        for related_collection, related_id in related.items():
+            record_change(db, related_collection, related_id)
+        return jsonify({"message": "Shoe, images, and suggestions updated successfully",
+                        "version": current_version + 1}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-
-
 # =======================================
 # Main Function
 # =======================================
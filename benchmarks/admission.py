@@ -0,0 +1,108 @@
+"""
+Kiosk scan latency under admin load, with and without admission control (utils/admission.py).
+
+Serves the app from an in-process threaded WSGI server, then for `--duration` seconds runs
+`--kiosks` clients scanning (GET /tag-by-address then GET /shoe-details) next to `--admins`
+clients hammering the heavy full list (GET /shoes-and-tags). This happens twice: once with the
+default pools and once with pools large enough to admit everything. Reports kiosk scan
+latency, scans served, and heavy requests served or shed with 503.
+
+Usage:
+    python benchmarks/admission.py --shoes 1000 --kiosks 16 --admins 16
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/admission.py --shoes 10000
+
+The catalog is seeded with benchmarks/seed.py and removed afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scan_loop(base_url, tag_addresses, deadline, latencies):
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        tag = session.get(f"{base_url}/tag-by-address", params={"tagAddress": random.choice(tag_addresses)})
+        if tag.status_code == 200:
+            session.get(f"{base_url}/shoe-details", params={"id": tag.json()["shoeId"]})
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def admin_loop(base_url, deadline, statuses, lock):
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        response = session.get(f"{base_url}/shoes-and-tags")
+        with lock:
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        if response.status_code == 503:
+            # A well-behaved client honours Retry-After; a short pause keeps the load high
+            time.sleep(0.05)
+
+
+def run(base_url, tag_addresses, args):
+    deadline = time.monotonic() + args.duration
+    latencies, statuses, lock = [], {}, threading.Lock()
+    threads = [threading.Thread(target=scan_loop, args=(base_url, tag_addresses, deadline, latencies))
+               for _ in range(args.kiosks)]
+    threads += [threading.Thread(target=admin_loop, args=(base_url, deadline, statuses, lock))
+                for _ in range(args.admins)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"scans": len(latencies), "scan_latency_ms": latency_summary(latencies), "heavy_status_counts": statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=1000)
+    parser.add_argument("--kiosks", type=int, default=16)
+    parser.add_argument("--admins", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URI", "mongomock://benchmark")
+    sys.path.insert(0, ROOT)
+    from werkzeug.serving import make_server
+
+    import app as app_module
+    from database import ensure_indexes
+    from utils.admission import DEFAULTS, AdmissionPool
+    from utils.shoe_cards import rebuild
+
+    db = app_module.db
+    ensure_indexes(db)
+    catalog = seed_catalog(db, args.shoes)
+    rebuild(db)
+    tag_addresses = [tag["tagAddress"] for tag in catalog["tag"]]
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    pools = app_module.app.extensions["admission_pools"]
+    report = {"shoes": args.shoes, "kiosks": args.kiosks, "admins": args.admins, "duration": args.duration}
+    try:
+        report["with_admission"] = run(base_url, tag_addresses, args)
+        # Pools as large as the client count admit every request: the behaviour before admission control
+        for name in DEFAULTS:
+            pools[name] = AdmissionPool(name, args.kiosks + args.admins, 3600)
+        report["without_admission"] = run(base_url, tag_addresses, args)
+        print(json.dumps(report, indent=2))
+    finally:
+        server.shutdown()
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Bulk import benchmark for imports/import_shoes.py and imports/import_suggestion.py.
+
+Writes a synthetic catalog of `--shoes` records (same fields as imports/Import.json, codes
+prefixed with BENCH_PREFIX) as a JSON array and/or NDJSON file, imports it, then imports it
+again to show that reruns only overwrite the same documents. A suggestions file pointing
+every imported shoe at three others is then loaded with imports/import_suggestion.py.
+Reports docs/second and peak RSS, which should stay flat regardless of the file size since
+the files are streamed.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bulk_import.py --shoes 500000
+    python benchmarks/bulk_import.py --shoes 20000 --formats ndjson   # mongomock, smoke run
+
+The imported documents are removed afterwards (unless --keep).
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+
+from seed import BENCH_PREFIX, MODELS, cleanup_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_record(index):
+    model = MODELS[index % len(MODELS)]
+    code = f"{BENCH_PREFIX}{index:07d}"
+    record = {
+        "model": model,
+        "title": f"TÊNIS {model} EDIÇÃO {index}",
+        "description": f"Descrição do tênis {model} para benchmark ({code}).",
+        "code": code,
+    }
+    for n in range(1, 4):
+        record[f"image_{n}"] = f"https://dankiadidas.s3.sa-east-1.amazonaws.com/{code}/{n}.png"
+    return record
+
+
+def write_catalog(path, count, file_format):
+    """Write `count` synthetic records to `path` one at a time."""
+    with open(path, "w", encoding="utf-8") as f:
+        if file_format == "ndjson":
+            for index in range(count):
+                f.write(json.dumps(synthetic_record(index), ensure_ascii=False) + "\n")
+            return
+        f.write("[\n")
+        for index in range(count):
+            f.write(("  " if index == 0 else ",\n  ") + json.dumps(synthetic_record(index), ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def write_suggestions(path, shoe_ids, seed=42):
+    """Write one NDJSON suggestion row (extended JSON ids, as exported) per shoe."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for shoe_id in shoe_ids:
+            row = {"shoeId": {"$oid": str(shoe_id)},
+                   "shoes": [{"$oid": str(other)} for other in rng.sample(shoe_ids, min(3, len(shoe_ids)))]}
+            f.write(json.dumps(row) + "\n")
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--formats", nargs="+", choices=["array", "ndjson"], default=["array", "ndjson"])
+    parser.add_argument("--keep", action="store_true", help="Keep the imported documents")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from database import create_mongo_client
+    from imports.import_shoes import import_catalog
+    from imports.import_suggestion import import_suggestions
+
+    db = create_mongo_client(os.getenv("MONGO_URI", "mongomock://bench"))["danki-adidas"]
+    report = {"shoes": args.shoes, "batch_size": args.batch_size, "runs": {}}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for file_format in args.formats:
+                path = os.path.join(directory, f"catalog.{file_format}")
+                write_catalog(path, args.shoes, file_format)
+                cleanup_catalog(db)
+                first = import_catalog(db, path, batch_size=args.batch_size, restart=True)
+                rerun = import_catalog(db, path, batch_size=args.batch_size, restart=True)
+                report["runs"][file_format] = {
+                    "file_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+                    "first": first,
+                    "rerun": rerun,
+                    "shoes_in_db": db["shoes"].count_documents({"code": {"$regex": f"^{BENCH_PREFIX}"}}),
+                }
+
+            shoe_ids = [shoe["_id"] for shoe in db["shoes"].find({"code": {"$regex": f"^{BENCH_PREFIX}"}}, {"_id": 1})]
+            path = os.path.join(directory, "suggestions.ndjson")
+            write_suggestions(path, shoe_ids)
+            report["runs"]["suggestions"] = import_suggestions(db, path, batch_size=args.batch_size)
+        report["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep:
+            cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
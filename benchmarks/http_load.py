@@ -0,0 +1,340 @@
+"""
+HTTP load benchmark for every route of the Flask app (app.py and the admin blueprint).
+
+For each catalog size the script seeds the database with benchmarks/seed.py, serves the app
+from an in-process threaded WSGI server and sends `--requests` requests per route at a fixed
+`--concurrency`. Results are printed (and optionally written) as JSON with p50/p95/p99 latency,
+throughput and status codes per route, so runs from different commits can be compared with
+`--baseline`.
+
+Usage:
+    # in-memory stand-in (mongomock), no mongod needed
+    python benchmarks/http_load.py --sizes 1000,10000 --output bench.json
+
+    # local mongod
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/http_load.py --sizes 1000,10000,100000
+
+    # compare with a previous run
+    python benchmarks/http_load.py --sizes 1000 --baseline bench.json
+
+Routes that call external services (Pinterest, S3, the datalog API) are listed under
+"skipped". A route without a request factory below is reported as unmapped, so new routes are
+noticed instead of silently left out.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bson import ObjectId
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = "1000,10000,100000"
+COLLECTIONS = ["shoes", "suggestion", "pinterest", "images", "tag"]
+
+# Routes that reach services outside the app and the database
+EXTERNAL = {
+    "/add-pinterest-data": "Pinterest API and S3",
+    "/sneaker/upload-file": "S3",
+    "/pinterest/boards": "Pinterest API",
+    "/dados-danki": "datalog API",
+}
+
+_unique = itertools.count()
+
+
+class Multipart(dict):
+    """Request body sent as multipart form data ({field: (filename, content)}) instead of JSON."""
+
+
+class Catalog:
+    """Seeded documents plus helpers that create throwaway documents for write routes."""
+
+    def __init__(self, db, documents):
+        self.db = db
+        self.documents = documents
+        self.shoe = documents["shoes"][len(documents["shoes"]) // 2]
+        self.shoe_id = str(self.shoe["_id"])
+
+    def doc_id(self, collection):
+        return str(self.documents[collection][len(self.documents[collection]) // 2]["_id"])
+
+    def new_document(self, collection):
+        """Fresh document for routes that need something to delete."""
+        return {
+            "shoes": lambda: {"model": "BENCH TMP", "title": "tmp", "description": "tmp", "code": f"BENCHTMP{next(_unique)}"},
+            "tag": lambda: {"shoeId": self.shoe_id, "tagAddress": f"BENCH-TMP-{next(_unique)}"},
+        }.get(collection, lambda: {"shoeId": self.shoe["_id"], "links": [], "shoes": []})()
+
+    def changes_cursor(self, behind):
+        """Change log cursor `behind` entries before the last write (see utils/changes.py)."""
+        counter = self.db["_meta"].find_one({"_id": "changes"}) or {}
+        return max(0, counter.get("seq", 0) - behind)
+
+    def insert_throwaway(self, collection):
+        return str(self.db[collection].insert_one(self.new_document(collection)).inserted_id)
+
+
+def collection_cases(catalog, name):
+    """Request factories for the CRUD routes generated for one collection."""
+    return {
+        (f"/{name}", "GET"): lambda: ("GET", f"/{name}", None),
+        (f"/{name}", "POST"): lambda: ("POST", f"/{name}", json_ready(catalog.new_document(name))),
+        (f"/{name}/<id>", "GET"): lambda: ("GET", f"/{name}/{catalog.doc_id(name)}", None),
+        (f"/{name}/<id>", "PUT"): lambda: ("PUT", f"/{name}/{catalog.doc_id(name)}", {"benchTouched": next(_unique)}),
+        (f"/{name}/<id>", "DELETE"): lambda: ("DELETE", f"/{name}/{catalog.insert_throwaway(name)}", None),
+    }
+
+
+def json_ready(document):
+    """Convert ObjectIds to the {"$oid": ...} form the API accepts."""
+    return {key: ({"$oid": str(value)} if isinstance(value, ObjectId) else value) for key, value in document.items()}
+
+
+def route_cases(catalog):
+    shoe = catalog.shoe
+    tag_address = catalog.documents["tag"][len(catalog.documents["tag"]) // 2]["tagAddress"]
+    cases = {}
+    for name in COLLECTIONS:
+        cases.update(collection_cases(catalog, name))
+    cases.update({
+        ("/", "GET"): lambda: ("GET", "/", None),
+        ("/sneaker/list", "GET"): lambda: ("GET", "/sneaker/list", None),
+        ("/sneaker/detail", "GET"): lambda: ("GET", f"/sneaker/detail?id={catalog.shoe_id}", None),
+        ("/sneaker/create", "GET"): lambda: ("GET", "/sneaker/create", None),
+        ("/sneaker/scan-tag", "GET"): lambda: ("GET", "/sneaker/scan-tag", None),
+        ("/sneaker/reports", "GET"): lambda: ("GET", "/sneaker/reports", None),
+        ("/sneaker/slow-queries", "GET"): lambda: ("GET", "/sneaker/slow-queries", None),
+        ("/static/<path:filename>", "GET"): lambda: ("GET", "/static/css/list-sneaker.css", None),
+        ("/metrics", "GET"): lambda: ("GET", "/metrics", None),
+        ("/shoes-with-images", "GET"): lambda: ("GET", "/shoes-with-images", None),
+        ("/shoe-with-pinterest", "GET"): lambda: ("GET", f"/shoe-with-pinterest?id={catalog.shoe_id}", None),
+        ("/shoe-details", "GET"): lambda: ("GET", f"/shoe-details?id={catalog.shoe_id}", None),
+        ("/tag-by-address", "GET"): lambda: ("GET", f"/tag-by-address?tagAddress={tag_address}", None),
+        # A shelf check: 200 tags of the catalog plus a few unknown ones, with the joined cards
+        ("/tags/resolve", "POST"): lambda: ("POST", "/tags/resolve", {
+            "tagAddresses": [tag["tagAddress"] for tag in catalog.documents["tag"][:200]] + ["BENCH-UNKNOWN"],
+            "cards": True,
+        }),
+        # The admin list's remote mode: a middle page sorted by model
+        ("/shoes-and-tags", "GET"): lambda: (
+            "GET", f"/shoes-and-tags?page={max(1, len(catalog.documents['shoes']) // 40)}&size=20"
+                   "&sort[0][field]=model&sort[0][dir]=asc", None
+        ),
+        ("/catalog/snapshot", "GET"): lambda: ("GET", "/catalog/snapshot", None),
+        # A sync client slightly behind: the last writes of the routes benchmarked before this one
+        ("/changes", "GET"): lambda: ("GET", f"/changes?since={catalog.changes_cursor(200)}", None),
+        ("/shoes/search", "GET"): lambda: ("GET", f"/shoes/search?q={shoe['model'].split()[0][:3].lower()}", None),
+        ("/sneaker/<shoe_id>/tags", "GET"): lambda: ("GET", f"/sneaker/{catalog.shoe_id}/tags", None),
+        ("/sneaker/<shoe_id>/tags", "POST"): lambda: (
+            "POST", f"/sneaker/{catalog.shoe_id}/tags", {"tagAddress": f"BENCH-TAG-{next(_unique)}"}
+        ),
+        ("/tag/<tag_id>", "DELETE"): lambda: ("DELETE", f"/tag/{catalog.insert_throwaway('tag')}", None),
+        # A store rollout batch: 100 new addresses per request, linked by shoe code
+        ("/tags/assign", "POST"): lambda: ("POST", "/tags/assign", {"assignments": [
+            {"tagAddress": f"BENCH-ASSIGN-{next(_unique)}", "code": shoe["code"]} for _ in range(100)
+        ]}),
+        ("/tags/import", "POST"): lambda: ("POST", "/tags/import", Multipart(file=("tags.csv", "tagAddress;code\n" + "".join(
+            f"BENCH-IMPORT-{next(_unique)};{shoe['code']}\n" for _ in range(100)
+        )))),
+        ("/suggestion-by-shoe-id/<shoe_id>", "GET"): lambda: ("GET", f"/suggestion-by-shoe-id/{catalog.shoe_id}", None),
+        ("/images-by-shoe-id/<shoe_id>", "GET"): lambda: ("GET", f"/images-by-shoe-id/{catalog.shoe_id}", None),
+        ("/update-shoe-full", "PUT"): lambda: ("PUT", "/update-shoe-full", {
+            "_id": catalog.shoe_id,
+            "code": shoe["code"],
+            "model": shoe["model"],
+            "title": f"{shoe['title']} {next(_unique)}",
+            "description": shoe["description"],
+            "pinterestId": shoe["pinterestId"],
+            "colors": [{"shoeId": str(color)} for color in shoe["colors"]],
+            "images": [f"https://dankiadidas.s3.amazonaws.com/{shoe['code']}/1.png"],
+            "suggestion": [],
+            "version": catalog.db["shoes"].find_one({"_id": shoe["_id"]}, {"version": 1}).get("version", 0),
+        }),
+    })
+    return cases
+
+
+def app_routes(app):
+    """(rule, method) pairs served by the app, excluding automatic HEAD/OPTIONS."""
+    for rule in app.url_map.iter_rules():
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            yield rule.rule, method
+
+
+def drive(base_url, factory, total, concurrency, max_seconds):
+    """Send `total` requests built by `factory` with `concurrency` workers."""
+    local = threading.local()
+    latencies, statuses, errors = [], {}, []
+    lock = threading.Lock()
+    deadline = time.monotonic() + max_seconds
+    remaining = itertools.count()
+
+    def worker():
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        while next(remaining) < total and time.monotonic() < deadline:
+            method, path, body = factory()
+            started = time.perf_counter()
+            try:
+                options = {"files": body} if isinstance(body, Multipart) else {"json": body}
+                response = session.request(method, base_url + path, **options)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(str(e))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors) + sum(count for status, count in statuses.items() if int(status) >= 500),
+        "status_counts": statuses,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def reset_database(db, in_memory):
+    if in_memory:
+        for name in db.list_collection_names():
+            db.drop_collection(name)
+    else:
+        cleanup_catalog(db)
+
+
+def run_size(app_module, size, args):
+    from werkzeug.serving import make_server
+
+    from database import ensure_indexes
+    from utils.admission import AdmissionPool
+    from utils.shoe_cards import rebuild
+
+    db = app_module.db
+    reset_database(db, args.in_memory)
+    ensure_indexes(db)
+    catalog = Catalog(db, seed_catalog(db, size))
+    # seed_catalog writes the collections directly, so the list cards are built afterwards
+    rebuild(db)
+    cases = route_cases(catalog)
+
+    # Routes are measured one at a time: pools sized to the concurrency admit every request
+    # (benchmarks/admission.py measures the shedding itself)
+    pools = app_module.app.extensions["admission_pools"]
+    for name in list(pools):
+        pools[name] = AdmissionPool(name, args.concurrency, 3600)
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results, skipped = {}, {}
+    try:
+        for rule, method in app_routes(app_module.app):
+            name = f"{method} {rule}"
+            if rule in EXTERNAL:
+                skipped[name] = f"calls {EXTERNAL[rule]}"
+                continue
+            factory = cases.get((rule, method))
+            if factory is None:
+                skipped[name] = "unmapped: add a request factory to benchmarks/http_load.py"
+                continue
+            results[name] = drive(base_url, factory, args.requests, args.concurrency, args.max_seconds)
+            print(f"[{size}] {name}: p95={results[name]['latency_ms']['p95']} ms "
+                  f"rps={results[name]['throughput_rps']}", file=sys.stderr)
+    finally:
+        server.shutdown()
+        reset_database(db, args.in_memory)
+    return results, skipped
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Print p95/throughput ratios against a baseline report; return the regressed routes."""
+    regressions = []
+    for size, routes in report["results"].items():
+        for name, result in routes.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if not previous or not previous["latency_ms"]["p95"] or not result["latency_ms"]["p95"]:
+                continue
+            ratio = result["latency_ms"]["p95"] / previous["latency_ms"]["p95"]
+            print(f"[{size}] {name}: p95 x{ratio:.2f}, rps {previous['throughput_rps']} -> {result['throughput_rps']}",
+                  file=sys.stderr)
+            if ratio > tolerance:
+                regressions.append({"size": size, "route": name, "p95_ratio": round(ratio, 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated catalog sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-seconds", type=float, default=30, help="Time budget per route")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="Allowed p95 ratio before failing")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URI", "mongomock://benchmark")
+    args.in_memory = os.environ["MONGO_URI"].startswith("mongomock://")
+    sys.path.insert(0, ROOT)
+    import app as app_module
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "database": "mongomock" if args.in_memory else "mongod",
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+        },
+        "results": {},
+        "skipped": {},
+    }
+    for size in [int(value) for value in args.sizes.split(",")]:
+        results, skipped = run_size(app_module, size, args)
+        report["results"][str(size)] = results
+        report["skipped"] = skipped
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
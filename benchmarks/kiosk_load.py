@@ -0,0 +1,124 @@
+"""
+Kiosk scan load test: Flask sync worker vs. the asyncio kiosk server (kiosk_async.py).
+
+A scan is what a kiosk does after reading a tag: GET /tag-by-address, then
+GET /shoe-details?id=<shoeId>. Each server runs as a single worker - one single-threaded Flask
+process and one aiohttp event loop - against the same local mongod, and `--concurrency`
+simulated kiosks scan in a closed loop for `--duration` seconds. The report shows how many
+concurrent scans one worker serves and at what latency.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/kiosk_load.py --shoes 1000 --concurrency 32
+
+The catalog is seeded with benchmarks/seed.py and removed afterwards (unless --keep).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import aiohttp
+from pymongo import MongoClient
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask_sync": "from app import app; app.run(host='127.0.0.1', port={port}, threaded=False)",
+    "aiohttp_async": (
+        "import kiosk_async; from aiohttp import web; "
+        "web.run_app(kiosk_async.create_async_app(), host='127.0.0.1', port={port}, print=None)"
+    ),
+}
+
+
+async def wait_until_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/tag-by-address") as response:
+                    if response.status == 400:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def kiosk(session, base_url, tag_addresses, deadline, latencies, errors):
+    """One simulated kiosk scanning random tags back to back."""
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            address = random.choice(tag_addresses)
+            async with session.get(f"{base_url}/tag-by-address", params={"tagAddress": address}) as response:
+                shoe_id = (await response.json())["shoeId"]
+            async with session.get(f"{base_url}/shoe-details", params={"id": shoe_id}) as response:
+                await response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"status {response.status}")
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception:
+            errors.append(1)
+
+
+async def drive(base_url, tag_addresses, concurrency, duration):
+    latencies, errors = [], []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*[
+            kiosk(session, base_url, tag_addresses, deadline, latencies, errors) for _ in range(concurrency)
+        ])
+    return {
+        "scans": len(latencies),
+        "errors": len(errors),
+        "scans_per_sec_per_worker": round(len(latencies) / duration, 1),
+        "latency_ms": latency_summary(latencies),
+    }
+
+
+def run_server(name, port, tag_addresses, args):
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVERS[name].format(port=port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(wait_until_ready(base_url))
+        return asyncio.run(drive(base_url, tag_addresses, args.concurrency, args.duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Simulated kiosks scanning at once")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load per server")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded catalog")
+    args = parser.parse_args()
+
+    db = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))["danki-adidas"]
+    catalog = seed_catalog(db, args.shoes)
+    tag_addresses = [tag["tagAddress"] for tag in catalog["tag"]]
+    try:
+        report = {"shoes": args.shoes, "concurrency": args.concurrency, "duration_s": args.duration, "servers": {}}
+        for port, name in enumerate(SERVERS, start=5601):
+            report["servers"][name] = run_server(name, port, tag_addresses, args)
+        print(json.dumps(report, indent=2))
+    finally:
+        if not args.keep:
+            cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Payload size and latency of /shoe-details for each fields/expand combination.
+
+Seeds a synthetic catalog, then requests the detail of random shoes through the Flask test
+client (no network) `--requests` times per combination, reporting response bytes, latency
+percentiles and how many Mongo commands each combination sends.
+
+Usage:
+    python benchmarks/payload_sizes.py --shoes 1000 --requests 200
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/payload_sizes.py
+
+The in-memory stand-in is used unless MONGO_URI points at a server; seeded documents are
+removed afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMBINATIONS = {
+    "full (no parameters)": "",
+    "kiosk first screen": "fields=title,code,images&imagesLimit=3",
+    "basic fields only": "fields=code,model,title,description,images,pinterestId,version",
+    "basic + colors": "expand=colors",
+    "basic + suggestion": "expand=suggestion",
+    "basic + pinterest": "expand=pinterest",
+    "basic + all expansions": "expand=colors,suggestion,pinterest",
+}
+
+
+def command_counter():
+    """Listener counting the commands sent to MongoDB (real servers only; the stand-in has no monitoring)."""
+    from pymongo import monitoring
+
+    class CommandCounter(monitoring.CommandListener):
+        count = 0
+
+        def started(self, event):
+            self.count += 1
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    counter = CommandCounter()
+    monitoring.register(counter)
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URI", "mongomock://bench")
+    sys.path.insert(0, ROOT)
+    # Registered before the app creates its client so the listener applies to it
+    counter = command_counter()
+    import app as app_module
+    from database import is_in_memory
+
+    db = app_module.db
+    catalog = seed_catalog(db, args.shoes)
+    shoe_ids = [str(shoe["_id"]) for shoe in catalog["shoes"]]
+    client = app_module.app.test_client()
+    rng = random.Random(42)
+
+    report = {"shoes": args.shoes, "requests": args.requests, "combinations": {}}
+    try:
+        for name, params in COMBINATIONS.items():
+            latencies, sizes = [], []
+            commands_before = counter.count
+            for _ in range(args.requests):
+                url = f"/shoe-details?id={rng.choice(shoe_ids)}" + (f"&{params}" if params else "")
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+                sizes.append(len(response.get_data()))
+            report["combinations"][name] = {
+                "params": params,
+                "bytes_mean": round(statistics.mean(sizes)),
+                "latency_ms": latency_summary(latencies),
+                "mongo_commands_per_request": None if is_in_memory(os.environ["MONGO_URI"])
+                else round((counter.count - commands_before) / args.requests, 2),
+            }
+        print(json.dumps(report, indent=2))
+    finally:
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
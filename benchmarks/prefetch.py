@@ -0,0 +1,104 @@
+"""
+First-scan latency of /shoe-details for the most scanned shoes, with and without the popularity
+prefetch of utils/prefetch.py.
+
+Seeds `--shoes` shoes and a synthetic datalog where scans follow a Zipf-like popularity (a few
+models get most of them). Then it requests the kiosk first screen
+(`?id=...&fields=title,code,images&imagesLimit=3`) for `--requests` scans drawn from the same
+popularity. This happens twice through the Flask test client: once cold, as right after a
+deploy, and once after DetailPrefetcher.refresh() loaded the `--top` most scanned shoes.
+Reports latency percentiles, the prefetch load time and the share of scans served from the cache.
+
+Usage:
+    python benchmarks/prefetch.py --shoes 2000 --top 200 --requests 2000
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/prefetch.py --shoes 10000
+
+The in-memory stand-in is used unless MONGO_URI points at a server; seeded documents are
+removed afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KIOSK_FIELDS = "fields=title,code,images&imagesLimit=3"
+
+
+def popular_choices(rng, shoes, count):
+    """`count` shoes drawn with weight 1/rank, the shape of the kiosk datalog."""
+    weights = [1 / (rank + 1) for rank in range(len(shoes))]
+    return rng.choices(shoes, weights=weights, k=count)
+
+
+def synthetic_feed(shoes, rng, count):
+    now = datetime(2025, 4, 6, 12, 0)
+    return [{"mac": f"6C:FD:22:76:00:{index % 20:02X}", "start": now - timedelta(minutes=index),
+             "code": shoe["code"]} for index, shoe in enumerate(popular_choices(rng, shoes, count))]
+
+
+def timed_scans(client, shoes):
+    latencies = []
+    for shoe in shoes:
+        started = time.perf_counter()
+        response = client.get(f"/shoe-details?id={shoe['_id']}&{KIOSK_FIELDS}")
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=2000)
+    parser.add_argument("--top", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URI", "mongomock://benchmark")
+    # The benchmark drives the prefetcher itself instead of the background thread
+    os.environ["PREFETCH_TOP_N"] = "0"
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    from database import ensure_indexes
+    from utils.metrics import REGISTRY
+    from utils.prefetch import DetailPrefetcher
+
+    db = app_module.db
+    ensure_indexes(db)
+    catalog = seed_catalog(db, args.shoes)
+    rng = random.Random(7)
+    shoes = catalog["shoes"]
+    feed = synthetic_feed(shoes, rng, args.requests * 5)
+    scans = popular_choices(rng, shoes, args.requests)
+    client = app_module.app.test_client()
+    report = {"shoes": args.shoes, "top": args.top, "requests": args.requests}
+    try:
+        report["cold"] = timed_scans(client, scans)
+
+        prefetcher = DetailPrefetcher(db, load_events=lambda: feed, top_n=args.top)
+        started = time.perf_counter()
+        report["prefetched_shoes"] = prefetcher.refresh()
+        report["prefetch_load_seconds"] = round(time.perf_counter() - started, 3)
+        app_module.app.extensions["detail_prefetch"] = prefetcher
+
+        def hits():
+            return REGISTRY.get_sample_value("danki_detail_prefetch_lookups_total", {"outcome": "hit"}) or 0
+
+        before = hits()
+        report["prefetched"] = timed_scans(client, scans)
+        report["prefetched"]["cache_hit_share"] = round((hits() - before) / len(scans), 3)
+        print(json.dumps(report, indent=2))
+    finally:
+        app_module.app.extensions.pop("detail_prefetch", None)
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
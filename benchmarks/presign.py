@@ -0,0 +1,76 @@
+"""
+Presigned image URLs for list responses: botocore's generate_presigned_url per link against the
+batch signer and cache of utils/boto.py (PresignedUrls).
+
+Builds the links of `--shoes` shoe cards (three images each, like shoe_cards) and times signing
+every link of the list:
+    - botocore: one s3v4 generate_presigned_url call per link;
+    - batch cold: PresignedUrls.sign_links on an empty cache (first request of a period);
+    - batch cached: the same call again (every later request of the period).
+Reports milliseconds per list and microseconds per link (best of `--rounds`). No AWS access is
+needed: presigning is computed locally from the credentials.
+
+Usage:
+    python benchmarks/presign.py --shoes 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUCKET = "dankiadidas"
+CREDENTIALS = ("AKIDEXAMPLE", "benchmark-secret", None)
+
+
+def best_of(rounds, function):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import boto3
+    from botocore.config import Config
+
+    from utils.boto import PresignedUrls, key_from_url
+
+    links = [f"https://{BUCKET}.s3.amazonaws.com/B{index:06d}/{n}.png"
+             for index in range(args.shoes) for n in range(1, 4)]
+    s3 = boto3.client("s3", region_name="sa-east-1", aws_access_key_id=CREDENTIALS[0],
+                      aws_secret_access_key=CREDENTIALS[1], endpoint_url="https://s3.sa-east-1.amazonaws.com",
+                      config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}))
+
+    def botocore_each():
+        for link in links:
+            s3.generate_presigned_url("get_object", Params={"Bucket": BUCKET, "Key": key_from_url(link, BUCKET)},
+                                      ExpiresIn=6 * 3600)
+
+    def batch_cold():
+        PresignedUrls(BUCKET, region="sa-east-1", credentials=CREDENTIALS).sign_links(links)
+
+    warm = PresignedUrls(BUCKET, region="sa-east-1", credentials=CREDENTIALS)
+    warm.sign_links(links)
+
+    report = {"shoes": args.shoes, "links": len(links)}
+    for name, function in (("botocore", botocore_each), ("batch_cold", batch_cold),
+                           ("batch_cached", lambda: warm.sign_links(links))):
+        seconds = best_of(args.rounds, function)
+        report[name] = {"ms_per_list": round(seconds * 1000, 2), "us_per_link": round(seconds / len(links) * 1e6, 2)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
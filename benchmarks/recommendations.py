@@ -0,0 +1,91 @@
+"""
+Benchmark for imports/recommendations.py (co-interaction suggestions).
+
+Seeds a synthetic catalog, generates `--events` datalog events from `--kiosks` kiosks
+(sessions of 1-6 shoes drawn with a skewed popularity, like a real store), then runs the job
+twice: a full run over the first 90% of the feed and an incremental run once the remaining
+10% arrives. Reports sessions, suggestions written and events/second for each run.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/recommendations.py --shoes 10000 --events 500000
+    python benchmarks/recommendations.py --shoes 500 --events 20000   # mongomock, smoke run
+
+Seeded documents, their co-occurrence counts and the job state are removed/restored afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from seed import cleanup_catalog, seed_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_events(codes, count, kiosks, seed=42):
+    """Datalog events in time order: each kiosk alternates short sessions and idle gaps."""
+    rng = random.Random(seed)
+    # Popularity skew: a few shoes get most of the interactions
+    weights = [1 / (rank + 1) for rank in range(len(codes))]
+    clock = {f"BENCH:{kiosk:04d}": datetime(2025, 1, 1) for kiosk in range(kiosks)}
+    events = []
+    while len(events) < count:
+        mac = rng.choice(list(clock))
+        start = clock[mac] + timedelta(hours=rng.uniform(1, 6))
+        for offset, code in enumerate(rng.choices(codes, weights=weights, k=rng.randint(1, 6))):
+            events.append({"mac": mac, "start": start + timedelta(seconds=40 * offset), "code": code})
+        clock[mac] = events[-1]["start"]
+    events.sort(key=lambda event: event["start"])
+    return events[:count]
+
+
+def timed_run(update, db, events, **kwargs):
+    started = time.perf_counter()
+    stats = update(db, events, **kwargs)
+    seconds = time.perf_counter() - started
+    return {
+        "events": stats["events"],
+        "sessions": stats["sessions"],
+        "suggestions_written": stats["suggestionsWritten"],
+        "seconds": round(seconds, 2),
+        "events_per_second": round(stats["events"] / seconds) if seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--kiosks", type=int, default=50)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from database import META_COLLECTION, create_mongo_client
+    from imports.recommendations import CO_OCCURRENCE_COLLECTION, STATE_ID, update_recommendations
+
+    db = create_mongo_client(os.getenv("MONGO_URI", "mongomock://bench"))["danki-adidas"]
+    previous_state = db[META_COLLECTION].find_one({"_id": STATE_ID})
+    catalog = seed_catalog(db, args.shoes)
+    shoe_ids = [shoe["_id"] for shoe in catalog["shoes"]]
+    events = synthetic_events([shoe["code"] for shoe in catalog["shoes"]], args.events, args.kiosks)
+    cut = int(len(events) * 0.9)
+
+    report = {"shoes": args.shoes, "events": args.events, "kiosks": args.kiosks}
+    try:
+        db[META_COLLECTION].delete_one({"_id": STATE_ID})
+        report["full"] = timed_run(update_recommendations, db, events[:cut], overwrite_manual=True)
+        report["incremental"] = timed_run(update_recommendations, db, events, overwrite_manual=True)
+        print(json.dumps(report, indent=2))
+    finally:
+        db[CO_OCCURRENCE_COLLECTION].delete_many({"_id": {"$in": shoe_ids}})
+        db[META_COLLECTION].delete_one({"_id": STATE_ID})
+        if previous_state:
+            db[META_COLLECTION].insert_one(previous_state)
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+S3 inventory and orphan reconciliation (utils/s3_inventory.py) against moto's in-process S3.
+
+Fills a mocked bucket with `--objects` images, references `--referenced` of them from `images`
+and `pinterest` documents, then runs a dry-run reconciliation and a deleting one (with the
+clock moved past the minimum orphan age). Reports the S3 calls of each phase (list pages,
+delete_objects batches), the seconds spent and checks that exactly the referenced objects remain.
+
+Usage:
+    python benchmarks/s3_reconcile.py --objects 20000 --referenced 0.7
+
+Needs the `moto` package. Uploads and listings inside moto cost milliseconds each and its
+listing re-sorts the bucket per page, so most of the time at 100k objects is spent in the mock
+itself; the call counts are what carries over to the real bucket. The in-memory Mongo stand-in is used unless MONGO_URI points at a
+server; the documents and inventory written are removed afterwards.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUCKET = "danki-benchmark"
+PREFIX = "BENCH/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=20_000)
+    parser.add_argument("--referenced", type=float, default=0.7, help="Share of objects cited by some document")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    sys.path.insert(0, ROOT)
+    import boto3
+    from moto import mock_aws
+
+    from database import create_mongo_client, ensure_indexes
+    from utils.s3_inventory import INVENTORY_COLLECTION, iter_objects, reconcile
+
+    db = create_mongo_client(os.getenv("MONGO_URI", "mongomock://bench"))["danki-adidas"]
+    ensure_indexes(db)
+    calls = Counter()
+
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket=BUCKET)
+        s3.meta.events.register("before-call.s3.*", lambda event_name, **_: calls.update([event_name.split(".")[-1]]))
+
+        started = time.perf_counter()
+        keys = [f"{PREFIX}{index // 8:06d}/{index % 8}.png" for index in range(args.objects)]
+        for key in keys:
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"")
+        fill_seconds = time.perf_counter() - started
+
+        # Eight images per shoe; the first `referenced` share of shoes are cited, alternating collections
+        cited = keys[:int(args.objects * args.referenced)]
+        documents = {"images": [], "pinterest": []}
+        for start in range(0, len(cited), 8):
+            collection = "images" if start // 8 % 2 == 0 else "pinterest"
+            documents[collection].append({"shoeId": ObjectId(), "links": [
+                f"https://{BUCKET}.s3.amazonaws.com/{key}" for key in cited[start:start + 8]]})
+        for collection, docs in documents.items():
+            if docs:
+                db[collection].insert_many(docs)
+        ids = {collection: [doc["_id"] for doc in docs] for collection, docs in documents.items()}
+
+        report = {"objects": args.objects, "referenced": len(cited), "fill_seconds": round(fill_seconds, 1)}
+        try:
+            for phase, kwargs in (("dry_run", {}),
+                                  ("delete", {"delete": True, "now": datetime.now(timezone.utc) + timedelta(days=2)})):
+                calls.clear()
+                started = time.perf_counter()
+                result = reconcile(db, s3, BUCKET, PREFIX, **kwargs)
+                report[phase] = {"seconds": round(time.perf_counter() - started, 2), "s3_calls": dict(calls),
+                                 **{key: value for key, value in result.items() if key != "errors"},
+                                 "errors": len(result["errors"])}
+            remaining = sum(1 for _ in iter_objects(s3, BUCKET, PREFIX))
+            report["remaining_objects"] = remaining
+            report["remaining_matches_referenced"] = remaining == len(cited)
+            print(json.dumps(report, indent=2))
+        finally:
+            for collection, collection_ids in ids.items():
+                db[collection].delete_many({"_id": {"$in": collection_ids}})
+            db[INVENTORY_COLLECTION].delete_many({"bucket": BUCKET})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of the schema-compiled converters and validators of utils/schema.py against the
+recursive convert_object_ids the CRUD routes used before.
+
+Builds `--docs` request-shaped documents per collection ({"$oid": ...} ids, like the admin and
+bulk loaders send them, plus a few free-form fields) and times, on fresh copies:
+    - recursive: the old convert_object_ids walk (no validation; bad documents only failed at
+      Mongo's $jsonSchema validator);
+    - compiled: CompiledSchema.convert + CompiledSchema.validate.
+Copying the payloads is measured apart and subtracted. Reports documents/second.
+
+Usage:
+    python benchmarks/schema_codecs.py --docs 100000
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def convert_object_ids(data):
+    """The recursive conversion removed from app.py, kept here as the baseline."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, dict) and "$oid" in value:
+                data[key] = ObjectId(value["$oid"])
+            elif isinstance(value, (dict, list)):
+                data[key] = convert_object_ids(value)
+    elif isinstance(data, list):
+        return [convert_object_ids(item) for item in data]
+    return data
+
+
+def oid():
+    return {"$oid": str(ObjectId())}
+
+
+def payloads(collection, count, rng):
+    if collection == "suggestion":
+        return [{"shoeId": oid(), "shoes": [oid() for _ in range(rng.randint(3, 10))],
+                 "scores": [rng.random() for _ in range(3)], "source": "bulk"} for _ in range(count)]
+    if collection == "images":
+        return [{"shoeId": oid(), "links": [f"https://cdn.example/{rng.getrandbits(64):x}.png" for _ in range(8)]}
+                for _ in range(count)]
+    return [{"model": "SAMBA OG", "title": "TÊNIS SAMBA OG", "description": "x" * 200, "code": f"B{index:06d}",
+             "pinterestId": str(index), "version": 0} for index in range(count)]
+
+
+def timed(function, documents, rounds):
+    best = None
+    for _ in range(rounds):
+        copies = copy.deepcopy(documents)
+        started = time.perf_counter()
+        for document in copies:
+            function(document)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from utils.schema import compile_schemas
+
+    started = time.perf_counter()
+    codecs = compile_schemas(["shoes", "suggestion", "images"])
+    report = {"docs": args.docs, "compile_ms": round((time.perf_counter() - started) * 1000, 2)}
+    rng = random.Random(3)
+    for collection, codec in codecs.items():
+        documents = payloads(collection, args.docs, rng)
+
+        def compiled(document):
+            codec.validate(codec.convert(document))
+
+        results = {
+            "recursive": timed(convert_object_ids, documents, args.rounds),
+            "compiled": timed(compiled, documents, args.rounds),
+        }
+        report[collection] = {name: {"seconds": round(seconds, 3), "docs_per_second": round(args.docs / seconds)}
+                              for name, seconds in results.items()}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
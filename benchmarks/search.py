@@ -0,0 +1,112 @@
+"""
+Latency of the ranked prefix search behind /shoes/search (utils/search.py) against the 5 ms
+p99 target.
+
+Seeds `--shoes` shoes and their cards, then runs `--queries` searches (top `--limit`) of each
+kind of text an admin types:
+    - exact_code: a full code (first tier, exact match first);
+    - code_prefix: a code without its last two digits (~100 codes);
+    - model_prefix: the first three letters of a model (a sixth of the catalog);
+    - title_words: "tenis <model> <edition>", which only the capped searchKeys tier answers;
+    - broad: a single letter matching every shoe.
+Reports p50/p95/p99/max in milliseconds per kind and overall, and whether the overall p99 is
+within `--target-ms`. Against a real server (MONGO_URI) it also reports, per kind, the keys and
+documents each tier examined (explain); the in-memory stand-in has no indexes and scans the
+whole collection for every query, so only server numbers are comparable with the target.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/search.py --shoes 100000
+    python benchmarks/search.py --shoes 10000 --queries 10    # in-memory, ~10 min (seeding)
+
+Seeded documents and cards are removed afterwards.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from seed import cleanup_catalog, seed_catalog
+from stats import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def texts(catalog, kind, count, rng):
+    shoes = rng.choices(catalog["shoes"], k=count)
+    if kind == "exact_code":
+        return [shoe["code"] for shoe in shoes]
+    if kind == "code_prefix":
+        return [shoe["code"][:-2].lower() for shoe in shoes]
+    if kind == "model_prefix":
+        return [shoe["model"][:3].lower() for shoe in shoes]
+    if kind == "title_words":
+        return [f"tenis {shoe['model'].split()[0].lower()} {shoe['title'].rsplit(' ', 1)[1]}" for shoe in shoes]
+    return [rng.choice("tgs") for _ in shoes]
+
+
+def tier_stats(collection, text, limit):
+    """Keys and documents examined by each tier of the search (server explain)."""
+    from utils.search import KEYWORD_INDEX, SEARCH_SCAN_LIMIT, keyword_query, ranked_queries
+
+    cursors = [collection.find(query).sort(sort).limit(limit) for query, sort in ranked_queries(text)]
+    cursors.append(collection.find(keyword_query(text)[0]).hint(KEYWORD_INDEX).limit(SEARCH_SCAN_LIMIT))
+    stats = []
+    for cursor in cursors:
+        execution = cursor.explain()["executionStats"]
+        stats.append({"keys": execution["totalKeysExamined"], "docs": execution["totalDocsExamined"]})
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200, help="Searches per kind of text")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from database import create_mongo_client, ensure_indexes, is_in_memory
+    from utils.search import search
+    from utils.shoe_cards import SHOE_CARDS_COLLECTION, refresh_cards
+
+    uri = os.getenv("MONGO_URI", "mongomock://bench")
+    db = create_mongo_client(uri)["danki-adidas"]
+    ensure_indexes(db)
+    catalog = seed_catalog(db, args.shoes)
+    shoe_ids = [shoe["_id"] for shoe in catalog["shoes"]]
+
+    rng = random.Random(7)
+    cards = db[SHOE_CARDS_COLLECTION]
+    projection = {"model": 1, "code": 1, "title": 1, "images": {"$slice": 2}}
+    report = {"shoes": args.shoes, "limit": args.limit, "server": not is_in_memory(uri), "target_ms": args.target_ms}
+    try:
+        for start in range(0, len(shoe_ids), 1000):
+            refresh_cards(db, shoe_ids[start:start + 1000])
+
+        everything = []
+        for kind in ("exact_code", "code_prefix", "model_prefix", "title_words", "broad"):
+            latencies = []
+            kind_texts = texts(catalog, kind, args.queries, rng)
+            for text in kind_texts:
+                started = time.perf_counter()
+                results = search(cards, text, args.limit, projection)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if kind == "exact_code":
+                    assert results[0]["code"] == text, text
+            everything.extend(latencies)
+            report[kind] = latency_summary(latencies)
+            if report["server"]:
+                report[kind]["tiers"] = tier_stats(cards, kind_texts[0], args.limit)
+
+        report["overall"] = latency_summary(everything)
+        report["meets_target"] = report["overall"]["p99"] <= args.target_ms
+        print(json.dumps(report, indent=2))
+    finally:
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
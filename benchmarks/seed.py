@@ -0,0 +1,83 @@
+"""
+Synthetic catalog used by the benchmark scripts.
+
+Every generated shoe gets an images document, a Pinterest document, a suggestion document
+pointing at three other shoes, two color variants and one kiosk tag. All codes start with
+BENCH_PREFIX so a seeded catalog can be removed again without touching real data.
+"""
+import random
+
+from bson import ObjectId
+
+BENCH_PREFIX = "BENCH"
+MODELS = ["SAMBA OG", "GAZELLE", "CAMPUS 00S", "HANDBALL SPEZIAL", "SL 72 RS", "GAZELLE INDOOR"]
+BATCH_SIZE = 5000
+
+
+def tag_address(index):
+    """MAC-like tag address, unique per seeded shoe."""
+    raw = f"{index:012X}"
+    return ":".join(raw[i:i + 2] for i in range(0, 12, 2))
+
+
+def generate_catalog(count, seed=42):
+    """
+    Build the documents of a synthetic catalog without touching the database.
+
+    Returns:
+        dict: Collection name -> list of documents.
+    """
+    rng = random.Random(seed)
+    ids = [ObjectId() for _ in range(count)]
+    shoes, images, pinterest, suggestion, tags = [], [], [], [], []
+
+    for index, shoe_id in enumerate(ids):
+        model = MODELS[index % len(MODELS)]
+        code = f"{BENCH_PREFIX}{index:07d}"
+        shoes.append({
+            "_id": shoe_id,
+            "model": model,
+            "code": code,
+            "title": f"TÊNIS {model} EDIÇÃO {index}",
+            "description": f"Descrição do tênis {model} para benchmark ({code}).",
+            "colors": rng.sample(ids, min(2, count)),
+            "pinterestId": str(1000000 + index)
+        })
+        images.append({
+            "shoeId": shoe_id,
+            "links": [f"https://dankiadidas.s3.amazonaws.com/{code}/{n}.png" for n in range(1, 4)]
+        })
+        pinterest.append({
+            "shoeId": shoe_id,
+            "links": [f"https://dankiadidas.s3.amazonaws.com/PINTEREST_IMAGES/{code}/{n}.jpg" for n in range(4)]
+        })
+        suggestion.append({"shoeId": shoe_id, "shoes": rng.sample(ids, min(3, count))})
+        tags.append({"shoeId": str(shoe_id), "tagAddress": tag_address(index)})
+
+    return {"shoes": shoes, "images": images, "pinterest": pinterest, "suggestion": suggestion, "tag": tags}
+
+
+def seed_catalog(db, count, seed=42):
+    """
+    Insert a synthetic catalog of `count` shoes into `db`.
+
+    Returns:
+        dict: The generated documents, so callers can pick ids and tag addresses to request.
+    """
+    catalog = generate_catalog(count, seed)
+    for collection, documents in catalog.items():
+        for start in range(0, len(documents), BATCH_SIZE):
+            db[collection].insert_many(documents[start:start + BATCH_SIZE], ordered=False)
+    return catalog
+
+
+def cleanup_catalog(db):
+    """Remove every document created by seed_catalog."""
+    shoe_ids = [shoe["_id"] for shoe in db["shoes"].find({"code": {"$regex": f"^{BENCH_PREFIX}"}}, {"_id": 1})]
+    for start in range(0, len(shoe_ids), BATCH_SIZE):
+        batch = shoe_ids[start:start + BATCH_SIZE]
+        for collection in ("images", "pinterest", "suggestion"):
+            db[collection].delete_many({"shoeId": {"$in": batch}})
+        db["tag"].delete_many({"shoeId": {"$in": [str(shoe_id) for shoe_id in batch]}})
+        db["shoe_cards"].delete_many({"_id": {"$in": batch}})
+        db["shoes"].delete_many({"_id": {"$in": batch}})
@@ -0,0 +1,77 @@
+"""
+Build time and size of the offline catalog snapshot (utils/snapshot.py).
+
+Seeds `--shoes` shoes, then measures:
+    - the full build (every entry computed, assembled and gzip-compressed), as done in the
+      background when the app starts;
+    - an incremental refresh after `--edits` shoes change (only those entries and the shoes
+      showing them as colors/suggestions are recomputed, then the JSON is reassembled);
+    - a refresh with nothing changed (only the version is read);
+    - what a request waits for: the last assembled snapshot, with no database work.
+Reports milliseconds, raw and gzip sizes and bytes per shoe.
+
+The in-memory stand-in has no indexes, so its build times are far above a server's; sizes and
+the request wait do not depend on the backend.
+
+Usage:
+    python benchmarks/snapshot.py --shoes 10000    # in-memory, ~13 min (full build)
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/snapshot.py --shoes 10000
+
+Seeded documents and snapshot entries are removed afterwards.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from seed import cleanup_catalog, seed_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=10_000)
+    parser.add_argument("--edits", type=int, default=10)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from database import create_mongo_client, ensure_indexes
+    from utils.shoe_cards import refresh_for
+    from utils.snapshot import SNAPSHOT_COLLECTION, CatalogSnapshot
+
+    db = create_mongo_client(os.getenv("MONGO_URI", "mongomock://bench"))["danki-adidas"]
+    ensure_indexes(db)
+    catalog = seed_catalog(db, args.shoes)
+    shoe_ids = [shoe["_id"] for shoe in catalog["shoes"]]
+
+    report = {"shoes": args.shoes, "edits": args.edits}
+    try:
+        catalog_snapshot = CatalogSnapshot(db, check_interval=float("inf"))
+        snapshot, report["full_build_ms"] = timed(catalog_snapshot.update)
+        report["raw_bytes"] = snapshot["size"]
+        report["gzip_bytes"] = len(snapshot["body"])
+        report["gzip_bytes_per_shoe"] = round(len(snapshot["body"]) / args.shoes, 1)
+
+        for shoe_id in shoe_ids[:args.edits]:
+            db["shoes"].update_one({"_id": shoe_id}, {"$set": {"title": "BENCH EDIT"}})
+            refresh_for(db, "shoes", {"_id": shoe_id})
+        _, report["incremental_refresh_ms"] = timed(catalog_snapshot.update)
+        _, report["unchanged_refresh_ms"] = timed(catalog_snapshot.update)
+        # A request never refreshes on its own thread; at most it starts a background refresh
+        _, report["request_ms"] = timed(catalog_snapshot.get)
+        print(json.dumps(report, indent=2))
+    finally:
+        db[SNAPSHOT_COLLECTION].delete_many({"_id": {"$in": shoe_ids}})
+        cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
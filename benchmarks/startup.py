@@ -0,0 +1,92 @@
+"""
+Startup benchmark for the Flask application.
+
+Each run starts a fresh interpreter, imports `app` (which connects to MongoDB and applies the
+schema validators) and serves one request through the Flask test client. The report gives the
+import time, the first request time and their sum ("ready"), which is compared against the
+target for a worker to be ready to serve traffic.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/startup.py --runs 5
+
+The first run against an empty database applies the validators; later runs exercise the
+fingerprint fast path, so the median is the number to watch.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGET_READY_MS = 300
+
+# Executed in a clean interpreter so module caches from previous runs do not hide import costs
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+t2 = time.perf_counter()
+heavy = [name for name in ("boto3", "requests", "lib2to3") if name in sys.modules]
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_request_ms": (t2 - t1) * 1000,
+    "status": response.status_code,
+    "heavy_modules_loaded": heavy,
+}))
+"""
+
+
+def run_once(path):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    wall_ms = (time.perf_counter() - started) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    result["ready_ms"] = result["import_ms"] + result["first_request_ms"]
+    result["process_wall_ms"] = wall_ms
+    return result
+
+
+def summarize(runs, key):
+    values = [run[key] for run in runs]
+    return {
+        "median": round(statistics.median(values), 1),
+        "min": round(min(values), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/tag-by-address?tagAddress=startup-benchmark",
+                        help="Request served as the first request of each worker")
+    parser.add_argument("--target-ms", type=float, default=TARGET_READY_MS)
+    args = parser.parse_args()
+
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "path": args.path,
+        "import_ms": summarize(runs, "import_ms"),
+        "first_request_ms": summarize(runs, "first_request_ms"),
+        "ready_ms": summarize(runs, "ready_ms"),
+        "process_wall_ms": summarize(runs, "process_wall_ms"),
+        "heavy_modules_loaded": sorted({name for run in runs for name in run["heavy_modules_loaded"]}),
+        "target_ready_ms": args.target_ms,
+    }
+    report["target_met"] = report["ready_ms"]["median"] <= args.target_ms
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["target_met"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Small statistics helpers shared by the benchmark scripts."""
+import math
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list (fraction in 0..1): the smallest value
+    with at least `fraction` of the list at or below it, i.e. rank ceil(fraction * n).
+    """
+    if not sorted_values:
+        return None
+    # round() drops float noise such as 0.07 * 100 = 7.000000000000001 before the ceiling
+    index = max(0, math.ceil(round(fraction * len(sorted_values), 9)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def latency_summary(latencies_ms):
+    """p50/p95/p99/max of a list of latencies in milliseconds, rounded for reports."""
+    values = sorted(latencies_ms)
+    summary = {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else None,
+    }
+    return {key: round(value, 2) if value is not None else None for key, value in summary.items()}
@@ -0,0 +1,79 @@
+"""
+Benchmark for the bulk tag assignment of utils/tags.py (POST /tags/import and the CLI).
+
+Seeds `--shoes` shoes, writes a CSV linking `--tags` new tag addresses to them by code (the
+way a store rollout spreadsheet looks, with a few repeated addresses), then imports it twice:
+the first run creates every tag, the second finds them all unchanged. Reports rows/second and
+the conflict count of each run.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/tag_assignment.py --shoes 10000 --tags 50000
+    python benchmarks/tag_assignment.py --shoes 500 --tags 5000   # mongomock, smoke run
+
+Seeded documents and the imported tags are removed afterwards.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from seed import cleanup_catalog, seed_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TAG_PREFIX = "BENCH-ROLLOUT-"
+
+
+def write_csv(path, codes, count):
+    with open(path, "w", encoding="utf-8") as csv_file:
+        csv_file.write("tagAddress;code\n")
+        for index in range(count):
+            # One row in a thousand repeats the previous address, as a typo in the spreadsheet would
+            number = index - 1 if index and index % 1000 == 0 else index
+            csv_file.write(f"{TAG_PREFIX}{number:07d};{codes[index % len(codes)]}\n")
+
+
+def timed_import(assign_tags, read_csv, db, path):
+    started = time.perf_counter()
+    with open(path, "rb") as stream:
+        report = assign_tags(db, read_csv(stream))
+    seconds = time.perf_counter() - started
+    return {
+        "created": report["created"],
+        "unchanged": report["unchanged"],
+        "conflicts": len(report["conflicts"]),
+        "seconds": round(seconds, 2),
+        "rows_per_second": round((report["created"] + report["unchanged"] + len(report["conflicts"])) / seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shoes", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=50_000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from database import create_mongo_client, ensure_indexes
+    from utils.tags import assign_tags, read_csv
+
+    db = create_mongo_client(os.getenv("MONGO_URI", "mongomock://bench"))["danki-adidas"]
+    ensure_indexes(db)
+    catalog = seed_catalog(db, args.shoes)
+    report = {"shoes": args.shoes, "tags": args.tags}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tags.csv")
+        write_csv(path, [shoe["code"] for shoe in catalog["shoes"]], args.tags)
+        try:
+            report["first_import"] = timed_import(assign_tags, read_csv, db, path)
+            report["rerun"] = timed_import(assign_tags, read_csv, db, path)
+            print(json.dumps(report, indent=2))
+        finally:
+            db["tag"].delete_many({"tagAddress": {"$regex": f"^{TAG_PREFIX}"}})
+            cleanup_catalog(db)
+
+
+if __name__ == "__main__":
+    main()
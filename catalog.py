@@ -0,0 +1,169 @@
+"""
+Catalog read services shared by the JSON routes (app.py) and the admin pages (admin.py).
+
+Each function takes the database and returns plain Python structures; serializing them (or
+rendering a template with them) is left to the caller. The detail lookup is written once as a
+read plan (utils/reads.py) and run with pymongo by shoe_details or with motor by
+shoe_details_async (kiosk_async.py), so both servers return the same bodies.
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from utils.fieldsets import DETAIL_EXPANSIONS, DETAIL_FIELDS, RELATED_IMAGES_PROJECTION, DetailFieldset
+from utils.reads import Read, run, run_async
+
+FULL_DETAIL = DetailFieldset(DETAIL_FIELDS, DETAIL_EXPANSIONS)
+
+
+class CatalogError(ValueError):
+    """Lookup parameters that do not identify a shoe."""
+
+
+def detail_query(args):
+    """
+    Build the `shoes` filter of a detail lookup from request arguments.
+
+    Args:
+        args (Mapping): Request arguments with `id`, `model` or `code` (checked in this order).
+
+    Returns:
+        dict: Filter on `_id`, `model` or `code`.
+
+    Raises:
+        CatalogError: No lookup parameter was given or `id` is not an ObjectId.
+    """
+    if args.get("id"):
+        try:
+            return {"_id": ObjectId(args["id"])}
+        except (InvalidId, TypeError):
+            raise CatalogError(f"Invalid shoe id: {args['id']}")
+    if args.get("model"):
+        return {"model": args["model"]}
+    if args.get("code"):
+        return {"code": args["code"]}
+    raise CatalogError("No valid query parameter provided (id, model, or code).")
+
+
+def presign_cards(cards, presigner):
+    """
+    Replace the image links of list cards with presigned URLs, signing the whole list in one batch.
+
+    Args:
+        cards (list): Cards read from shoe_cards; their `images` lists are replaced in place.
+        presigner (PresignedUrls): Signer of the private bucket (see utils/boto.py).
+
+    Returns:
+        list: The same cards.
+    """
+    signed = iter(presigner.sign_links([link for card in cards for link in card.get("images") or []]))
+    for card in cards:
+        if card.get("images"):
+            card["images"] = [next(signed) for _ in card["images"]]
+    return cards
+
+
+def presign_detail(detail, presigner):
+    """
+    Copy of a shoe detail with its image, Pinterest and color/suggestion card links presigned.
+
+    The detail itself is left untouched, since prefetched payloads are shared between requests.
+
+    Args:
+        detail (dict): Result of shoe_details.
+        presigner (PresignedUrls): Signer of the private bucket (see utils/boto.py).
+
+    Returns:
+        dict: The presigned detail.
+    """
+    lists = [field for field in ("images", "pinterest") if field in detail]
+    cards = [field for field in ("colors", "suggestion") if field in detail]
+    links = [link for field in lists for link in detail[field]]
+    links += [card["image"] for field in cards for card in detail[field]]
+    signed = iter(presigner.sign_links(links))
+
+    result = dict(detail)
+    for field in lists:
+        result[field] = [next(signed) for _ in detail[field]]
+    for field in cards:
+        result[field] = [{**card, "image": next(signed)} for card in detail[field]]
+    return result
+
+
+def detail_plan(query, fieldset=FULL_DETAIL, prefetcher=None, presigner=None):
+    """
+    Read plan (see utils/reads.py) of the detail of one shoe, as returned by /shoe-details.
+
+    Only the queries needed by the requested fields run; images, Pinterest links and the
+    suggestion are read together once the shoe is known, and colors/suggestions are resolved
+    with one `$in` query per collection.
+
+    Args:
+        query (dict): Filter from detail_query.
+        fieldset (DetailFieldset, optional): Fields and expansions to return; all by default.
+        prefetcher (DetailPrefetcher, optional): Preloaded payloads of the most scanned shoes
+            (see utils/prefetch.py), used for lookups by `_id`.
+        presigner (PresignedUrls, optional): Signer of a private bucket; image links are then
+            returned as presigned URLs (see presign_detail).
+
+    Returns:
+        dict or None: The detail, or None when no shoe matches.
+    """
+    if prefetcher is not None and "_id" in query:
+        prefetched = yield from prefetcher.lookup(str(query["_id"]))
+        if prefetched is not None:
+            detail = fieldset.project(prefetched)
+            return presign_detail(detail, presigner) if presigner is not None else detail
+
+    shoe, = yield [Read("shoes", query, fieldset.shoe_projection(), one=True)]
+    if not shoe:
+        return None
+
+    reads = {}
+    if fieldset.wants("images"):
+        reads["images"] = Read("images", {"shoeId": shoe['_id']}, fieldset.images_projection())
+    if fieldset.wants("pinterest"):
+        reads["pinterest"] = Read("pinterest", {"shoeId": shoe['_id']}, {"links": 1})
+    if fieldset.wants("suggestion"):
+        reads["suggestion"] = Read("suggestion", {"shoeId": shoe['_id']}, {"shoes": 1}, one=True)
+    found = dict(zip(reads, (yield list(reads.values()))))
+    images, pinterest, suggestion = found.get("images", []), found.get("pinterest", []), found.get("suggestion")
+
+    # Colors and suggestions share one lookup of the related shoes and their images
+    related_shoes, related_images = [], []
+    related_ids = fieldset.related_ids(shoe, suggestion)
+    if related_ids:
+        related_shoes, related_images = yield [
+            Read("shoes", {"_id": {"$in": related_ids}}, {"code": 1, "model": 1}),
+            Read("images", {"shoeId": {"$in": related_ids}}, RELATED_IMAGES_PROJECTION, sort=(("_id", 1),)),
+        ]
+
+    detail = fieldset.build(shoe, images, pinterest, suggestion, related_shoes, related_images)
+    return presign_detail(detail, presigner) if presigner is not None else detail
+
+
+def shoe_details(db, query, fieldset=FULL_DETAIL, prefetcher=None, presigner=None):
+    """
+    Detail of one shoe, as returned by /shoe-details (detail_plan run with pymongo).
+
+    Args:
+        db: Application database.
+        query, fieldset, prefetcher, presigner: See detail_plan.
+
+    Returns:
+        dict or None: The detail, or None when no shoe matches.
+    """
+    return run(detail_plan(query, fieldset, prefetcher, presigner), db)
+
+
+async def shoe_details_async(db, query, fieldset=FULL_DETAIL, prefetcher=None, presigner=None):
+    """
+    Detail of one shoe for the asyncio kiosk server (detail_plan run with motor).
+
+    Args:
+        db: Motor database.
+        query, fieldset, prefetcher, presigner: See detail_plan.
+
+    Returns:
+        dict or None: The detail, or None when no shoe matches.
+    """
+    return await run_async(detail_plan(query, fieldset, prefetcher, presigner), db)
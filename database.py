@@ -1,10 +1,135 @@
 import logging
 import json
+import os
+import hashlib
+from datetime import datetime, timezone
+
+from pymongo.mongo_client import MongoClient
 
 # Set up logging to provide insights into the application's operation, both during development and after deployment
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schemas are resolved relative to this file so boot does not depend on the working directory
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas")
+
+# Collections that receive a $jsonSchema validator and the schema file describing them
+SCHEMAS = {
+    "shoes": "shoes.json",
+    "suggestion": "suggestion.json",
+    "pinterest": "pinterest.json",
+    "images": "images.json"
+}
+
+# Indexes kept in place together with the validators. `code` is the natural key of a shoe:
+# imports upsert on it, so it must be unique for reruns to be idempotent.
+INDEXES = {
+    "shoes": [{"keys": [["code", 1]], "unique": True}],
+    "images": [{"keys": [["shoeId", 1]]}],
+    "suggestion": [{"keys": [["shoeId", 1]]}],
+    # A tag belongs to at most one shoe; also serves /tag-by-address and /tags/resolve.
+    # Existing duplicates keep this index from being created: see `python -m utils.tags duplicates`
+    "tag": [{"keys": [["tagAddress", 1]], "unique": True}],
+    # hasTag filter and the sortable columns of the paginated admin list, each with the _id tiebreaker
+    "shoe_cards": [
+        {"keys": [["tagCount", 1], ["_id", 1]]},
+        {"keys": [["code", 1], ["_id", 1]]},
+        {"keys": [["model", 1], ["_id", 1]]},
+        # Prefix search (utils/search.py): anchored regexes become index ranges on this multikey index,
+        # walked in (key, _id) order by the capped keyword tier; the code/model tiers of the ranked
+        # top-k are read in the order of the next two
+        {"keys": [["searchKeys", 1], ["_id", 1]]},
+        {"keys": [["codeKey", 1], ["_id", 1]]},
+        {"keys": [["modelKey", 1], ["_id", 1]]},
+        # Tag address prefix of the admin list's free-text search (utils/list_query.py)
+        {"keys": [["tag.tagAddress", 1]]},
+    ],
+    # Catalog snapshot entries waiting to be rebuilt (utils/snapshot.py); only those carry `dirty`
+    "catalog_snapshot": [{"keys": [["dirty", 1]], "sparse": True}],
+    # Delta sync log (utils/changes.py): entries expire after 30 days, ordered by their _id (seq)
+    "changes": [{"keys": [["at", 1]], "expireAfterSeconds": 30 * 24 * 3600}],
+    # S3 bucket inventory (utils/s3_inventory.py): each reconciliation reads back its own scan
+    "s3_inventory": [{"keys": [["scan", 1], ["key", 1]]}]
+}
+
+# Collection holding bookkeeping documents such as the last applied schema fingerprint
+META_COLLECTION = "_meta"
+SCHEMA_FINGERPRINT_ID = "schemas"
+
+# Transaction support detected per client (see transactions_supported)
+_TRANSACTION_SUPPORT = {}
+
+# URI scheme selecting the in-memory stand-in (mongomock) used by tests and benchmarks
+IN_MEMORY_URI_PREFIX = "mongomock://"
+
+
+def is_in_memory(uri):
+    """Tell whether a Mongo URI points at the in-memory stand-in instead of a real server."""
+    return bool(uri) and uri.startswith(IN_MEMORY_URI_PREFIX)
+
+
+def create_mongo_client(uri, **kwargs):
+    """
+    Create the MongoClient for a URI.
+
+    `mongomock://` URIs return an in-memory mongomock client, so the app can run without a
+    mongod; keyword arguments such as event listeners only apply to real servers.
+
+    Args:
+        uri (str): MongoDB connection string.
+        **kwargs: Extra MongoClient options.
+
+    Returns:
+        MongoClient: Connected client (or its in-memory equivalent).
+    """
+    if is_in_memory(uri):
+        import mongomock
+        return mongomock.MongoClient()
+    return MongoClient(uri, **kwargs)
+
+
+def transactions_supported(client):
+    """
+    Tell whether the deployment behind a client accepts multi-document transactions.
+
+    Transactions need a replica set or a sharded cluster; standalone servers and the
+    in-memory stand-in do not support them. The answer is cached per client.
+
+    Args:
+        client: MongoClient (or its in-memory equivalent).
+
+    Returns:
+        bool: True if `start_transaction` can be used.
+    """
+    if id(client) not in _TRANSACTION_SUPPORT:
+        try:
+            hello = client.admin.command("ismaster")
+            _TRANSACTION_SUPPORT[id(client)] = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            logger.warning(f"Could not detect transaction support: {e}")
+            _TRANSACTION_SUPPORT[id(client)] = False
+    return _TRANSACTION_SUPPORT[id(client)]
+
+
+def run_in_transaction(client, callback):
+    """
+    Run `callback(session)` inside a transaction, retried on transient errors by the driver.
+
+    Where transactions are unavailable (standalone server, in-memory stand-in) the callback
+    runs once with `session=None`, so the same write code works in development and tests.
+
+    Args:
+        client: MongoClient used by the callback.
+        callback (callable): Receives the session to pass to every read and write.
+
+    Returns:
+        The callback's return value.
+    """
+    if not transactions_supported(client):
+        return callback(None)
+    with client.start_session() as session:
+        return session.with_transaction(callback)
+
 
 def load_schema(schema_file):
     """
@@ -31,46 +156,153 @@ def load_schema(schema_file):
         raise e
 
 
-def ensure_collection_exists(db, collection_name):
+def ensure_collection_exists(db, collection_name, existing=None):
     """
     Ensures that a collection exists in the database before applying a schema validator.
 
     Args:
         db: The MongoDB database connection object.
         collection_name (str): The name of the collection to check or create.
+        existing (set, optional): Collection names already fetched by the caller, so that
+            checking several collections costs a single `list_collection_names` round trip.
     """
-    if collection_name not in db.list_collection_names():
+    if existing is None:
+        existing = db.list_collection_names()
+    if collection_name not in existing:
         db.create_collection(collection_name)
         logger.info(f"Created new collection: {collection_name}")
     else:
         logger.info(f"Collection {collection_name} already exists.")
 
-def apply_schemas(db):
+def load_schemas():
+    """
+    Load every schema listed in SCHEMAS.
+
+    Returns:
+        dict: Mapping of collection name to its loaded JSON schema.
     """
-    Apply defined JSON schemas to MongoDB collections as validators to ensure data consistency.
+    return {
+        collection: load_schema(os.path.join(SCHEMA_DIR, schema_file))
+        for collection, schema_file in SCHEMAS.items()
+    }
+
+
+def schema_fingerprint(schemas, indexes=INDEXES):
+    """
+    Compute a stable fingerprint for a set of schemas and indexes.
+
+    The fingerprint covers the collection names, the schema contents and the index
+    definitions, so renaming a mapping, editing any schema file or declaring a new index
+    produces a different value.
+
+    Args:
+        schemas (dict): Mapping of collection name to schema, as returned by load_schemas.
+        indexes (dict): Mapping of collection name to index specifications.
+
+    Returns:
+        str: Hex encoded SHA-256 digest.
+    """
+    payload = json.dumps({"schemas": schemas, "indexes": indexes}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def index_failures(db, indexes=INDEXES):
+    """
+    Create the given indexes and report the ones that could not be created.
+
+    Creating an index that already exists is a no-op. A failure (e.g. duplicated codes
+    preventing a unique index) is logged rather than raised, so an inconsistent collection
+    does not keep the app from booting.
+
+    Args:
+        db: The database connection object.
+        indexes (dict): Mapping of collection name to index specifications.
+
+    Returns:
+        dict: The specifications that failed, in the same shape as `indexes` (empty if none).
+    """
+    failed = {}
+    for collection, specs in indexes.items():
+        for spec in specs:
+            options = {key: value for key, value in spec.items() if key != "keys"}
+            keys = [tuple(key) for key in spec["keys"]]
+            try:
+                db[collection].create_index(keys, **options)
+            except Exception as e:
+                failed.setdefault(collection, []).append(spec)
+                logger.error(f"Failed to create index {keys} on {collection}: {str(e)}")
+    return failed
+
+
+def ensure_indexes(db, indexes=INDEXES):
+    """
+    Create the indexes declared in INDEXES, logging the failures (see index_failures).
 
     Args:
         db: The database connection object.
+        indexes (dict): Mapping of collection name to index specifications.
+
+    Returns:
+        bool: True if every index is in place.
+    """
+    return not index_failures(db, indexes)
+
+
+def apply_schemas(db, force=False):
+    """
+    Apply defined JSON schemas to MongoDB collections as validators to ensure data consistency,
+    and create the indexes declared in INDEXES.
+
+    The fingerprint of the applied schemas is stored in the META_COLLECTION. When it matches
+    the schema files on disk the validators are already in place and the collection listing
+    and `collMod` commands are skipped, which keeps worker boot to a single round trip.
+
+    Indexes that fail to build (e.g. duplicates blocking a unique index) are stored next to
+    the fingerprint as `failedIndexes`; later boots retry only those until they succeed,
+    instead of re-applying every validator.
+
+    Args:
+        db: The database connection object.
+        force (bool): Re-apply the validators even if the stored fingerprint matches.
+
+    Returns:
+        bool: True if the validators were applied, False if they were already up to date.
     """
     try:
-        # Define schemas and their corresponding collections
-        schemas = {
-            "shoes": "schemas/shoes.json",
-            "suggestion": "schemas/suggestion.json",
-            "pinterest": "schemas/pinterest.json",
-            "images": "schemas/images.json"
-        }
+        schemas = load_schemas()
+        fingerprint = schema_fingerprint(schemas)
+
+        meta = db[META_COLLECTION]
+        if not force:
+            stored = meta.find_one({"_id": SCHEMA_FINGERPRINT_ID})
+            if stored and stored.get("fingerprint") == fingerprint:
+                logger.info(f"Schemas unchanged (fingerprint {fingerprint[:12]}), skipping validators.")
+                if stored.get("failedIndexes"):
+                    failed = index_failures(db, stored["failedIndexes"])
+                    meta.update_one({"_id": SCHEMA_FINGERPRINT_ID}, {"$set": {"failedIndexes": failed}})
+                return False
+
+        # A single listing is shared by every collection check
+        existing = set(db.list_collection_names())
 
         # Iterate over each collection and schema
-        for collection, schema_path in schemas.items():
+        for collection, schema in schemas.items():
             # Ensure the collection exists
-            ensure_collection_exists(db, collection)
+            ensure_collection_exists(db, collection, existing)
 
-            # Load and apply the schema
-            schema = load_schema(schema_path)
+            # Apply the schema
             db.command('collMod', collection, validator={"$jsonSchema": schema})
             logger.info(f"{collection.capitalize()} schema applied successfully.")
 
+        # The validators are in place either way; only the failed indexes are retried next boot
+        failed = index_failures(db)
+        meta.update_one(
+            {"_id": SCHEMA_FINGERPRINT_ID},
+            {"$set": {"fingerprint": fingerprint, "appliedAt": datetime.now(timezone.utc), "failedIndexes": failed}},
+            upsert=True
+        )
+        return True
+
     except Exception as e:
         logger.error(f"Failed to apply schemas: {str(e)}")
         raise
@@ -0,0 +1,280 @@
+"""
+Recomendações por co-interação: preenche `suggestion` a partir do datalog dos quiosques.
+
+Cada evento do datalog diz que um quiosque (MAC) mostrou um tênis (código) em um horário.
+Eventos do mesmo MAC separados por até SESSION_GAP formam uma sessão, e dois tênis vistos na
+mesma sessão co-ocorrem. Com a matriz esparsa sessão × tênis X, as co-ocorrências são X.T @ X
+(a diagonal é n_i, o número de sessões com o tênis i) e a pontuação de cada par é o cosseno
+c_ij / sqrt(n_i · n_j). Os TOP_K vizinhos de cada tênis vão para `suggestion` com as pontuações.
+
+Incremental: as contagens ficam em `co_occurrence` ({_id: shoeId, n, pairs: {shoeId: c}}) e
+cada execução só soma as sessões novas e já encerradas (último evento a mais de SESSION_GAP do
+evento mais recente do feed), guardando em `_meta` até onde cada MAC foi processado. Só os
+tênis afetados e seus vizinhos têm as sugestões recalculadas. Sugestões curadas à mão (sem
+`source`) não são sobrescritas, a menos que --overwrite-manual.
+
+Uso (a partir da raiz do repositório, com MONGO_URI no ambiente ou no .env):
+    python -m imports.recommendations                    # lê o datalog da API
+    python -m imports.recommendations --file dados.json  # exportação do datalog (generate_fakes.py)
+    python -m imports.recommendations --full             # descarta as contagens e recalcula tudo
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from scipy import sparse
+
+from database import META_COLLECTION, create_mongo_client, run_in_transaction
+from utils.changes import record_changes
+from utils.datalog import load_events
+from utils.snapshot import mark_dirty
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DB_NAME = "danki-adidas"
+
+CO_OCCURRENCE_COLLECTION = "co_occurrence"
+
+# Documento em META_COLLECTION com o último evento processado de cada MAC
+STATE_ID = "recommendations"
+
+# Valor de `source` das sugestões geradas aqui (as curadas à mão não têm source)
+SOURCE = "co-interaction"
+
+SESSION_GAP = timedelta(minutes=30)
+TOP_K = 3
+BATCH_SIZE = 1000
+
+
+def closed_sessions(events, watermarks, gap=SESSION_GAP):
+    """
+    Agrupa em sessões os eventos ainda não processados de cada MAC.
+
+    A última sessão de um MAC só é devolvida quando está encerrada (o evento mais recente do
+    feed é posterior ao seu último evento em mais de `gap`); as abertas ficam para a próxima
+    execução, para que uma sessão nunca seja contada em pedaços.
+
+    Args:
+        events (list): Eventos de utils.datalog.parse_event.
+        watermarks (dict): MAC -> início do último evento já processado.
+        gap (timedelta): Intervalo máximo entre eventos da mesma sessão.
+
+    Returns:
+        tuple: (sessões como listas de códigos, watermarks atualizados).
+    """
+    updated = dict(watermarks)
+    if not events:
+        return [], updated
+    as_of = max(event["start"] for event in events)
+
+    by_mac = {}
+    for event in events:
+        until = watermarks.get(event["mac"])
+        if until is None or event["start"] > until:
+            by_mac.setdefault(event["mac"], []).append(event)
+
+    sessions = []
+    for mac, mac_events in by_mac.items():
+        mac_events.sort(key=lambda event: event["start"])
+        current = [mac_events[0]]
+        for event in mac_events[1:]:
+            if event["start"] - current[-1]["start"] > gap:
+                sessions.append([e["code"] for e in current])
+                updated[mac] = current[-1]["start"]
+                current = []
+            current.append(event)
+        if as_of - current[-1]["start"] > gap:
+            sessions.append([e["code"] for e in current])
+            updated[mac] = current[-1]["start"]
+    return sessions, updated
+
+
+def co_occurrence_matrix(sessions, shoe_ids):
+    """
+    Co-ocorrências X.T @ X das sessões, com X a matriz binária esparsa sessão × tênis.
+
+    Args:
+        sessions (list): Conjuntos de shoeIds, um por sessão.
+        shoe_ids (list): Ordem das linhas/colunas da matriz.
+
+    Returns:
+        scipy.sparse.csr_matrix: Matriz simétrica; a diagonal é o número de sessões de cada tênis.
+    """
+    index = {shoe_id: position for position, shoe_id in enumerate(shoe_ids)}
+    rows = np.repeat(np.arange(len(sessions)), [len(session) for session in sessions])
+    cols = np.fromiter((index[shoe_id] for session in sessions for shoe_id in session), dtype=np.int64, count=len(rows))
+    incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                                  shape=(len(sessions), len(shoe_ids)))
+    return (incidence.T @ incidence).tocsr()
+
+
+def count_operations(matrix, shoe_ids):
+    """Um $inc por tênis somando as co-ocorrências novas às gravadas em `co_occurrence`."""
+    operations = []
+    for row, shoe_id in enumerate(shoe_ids):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        increments = {}
+        for col, count in zip(matrix.indices[start:end], matrix.data[start:end]):
+            increments["n" if col == row else f"pairs.{shoe_ids[col]}"] = int(count)
+        if increments:
+            operations.append(UpdateOne({"_id": shoe_id}, {"$inc": increments}, upsert=True))
+    return operations
+
+
+def top_neighbors(db, shoe_ids, top_k=TOP_K):
+    """
+    Calcula os top_k vizinhos por cosseno a partir das contagens gravadas.
+
+    Returns:
+        dict: shoeId -> lista de (shoeId vizinho, pontuação), da maior para a menor pontuação.
+    """
+    documents = list(db[CO_OCCURRENCE_COLLECTION].find({"_id": {"$in": list(shoe_ids)}}))
+    documents = [document for document in documents if document.get("pairs")]
+    if not documents:
+        return {}
+
+    neighbor_ids = sorted({ObjectId(key) for document in documents for key in document["pairs"]})
+    column = {neighbor_id: position for position, neighbor_id in enumerate(neighbor_ids)}
+    totals = {document["_id"]: document.get("n", 0)
+              for document in db[CO_OCCURRENCE_COLLECTION].find({"_id": {"$in": neighbor_ids}}, {"n": 1})}
+
+    rows, cols, counts = [], [], []
+    for row, document in enumerate(documents):
+        for key, count in document["pairs"].items():
+            rows.append(row)
+            cols.append(column[ObjectId(key)])
+            counts.append(count)
+    matrix = sparse.csr_matrix((np.array(counts, dtype=np.float64), (rows, cols)),
+                               shape=(len(documents), len(neighbor_ids)))
+
+    # cosseno: c_ij / sqrt(n_i · n_j), em duas escalas vetorizadas (linhas e colunas)
+    row_norms = np.sqrt(np.array([max(document.get("n", 0), 1) for document in documents], dtype=np.float64))
+    col_norms = np.sqrt(np.array([max(totals.get(neighbor_id, 0), 1) for neighbor_id in neighbor_ids], dtype=np.float64))
+    scores = sparse.diags(1 / row_norms) @ matrix @ sparse.diags(1 / col_norms)
+    scores = scores.tocsr()
+    scores.sort_indices()
+
+    neighbors = {}
+    for row, document in enumerate(documents):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        values, indices = scores.data[start:end], scores.indices[start:end]
+        # estável: empates ficam na ordem dos ids
+        best = np.argsort(-values, kind="stable")[:top_k]
+        neighbors[document["_id"]] = [(neighbor_ids[indices[i]], round(float(values[i]), 6)) for i in best]
+    return neighbors
+
+
+def write_suggestions(db, neighbors, overwrite_manual=False):
+    """
+    Grava os vizinhos em `suggestion` ({shoeId, shoes, scores, source}) com um bulk_write.
+
+    Returns:
+        int: Quantidade de sugestões gravadas.
+    """
+    manual = set() if overwrite_manual else set(
+        db["suggestion"].distinct("shoeId", {"shoeId": {"$in": list(neighbors)}, "source": {"$ne": SOURCE}})
+    )
+    shoe_ids = [shoe_id for shoe_id, ranked in neighbors.items() if ranked and shoe_id not in manual]
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne({"shoeId": shoe_id}, {"$set": {
+            "shoes": [neighbor_id for neighbor_id, _ in neighbors[shoe_id]],
+            "scores": [score for _, score in neighbors[shoe_id]],
+            "source": SOURCE,
+            "updatedAt": now,
+        }}, upsert=True)
+        for shoe_id in shoe_ids
+    ]
+    for start in range(0, len(operations), BATCH_SIZE):
+        db["suggestion"].bulk_write(operations[start:start + BATCH_SIZE], ordered=False)
+    # As sugestões fazem parte do payload de detalhe do snapshot dos quiosques e do log de alterações
+    mark_dirty(db, shoe_ids)
+    record_changes(db, "suggestion", db["suggestion"].distinct("_id", {"shoeId": {"$in": shoe_ids}}))
+    return len(operations)
+
+
+def update_recommendations(db, events, top_k=TOP_K, full=False, overwrite_manual=False):
+    """
+    Soma as sessões novas às contagens e recalcula as sugestões dos tênis afetados.
+
+    Args:
+        db: Banco da aplicação.
+        events (list): Eventos de utils.datalog.parse_event (o feed inteiro; os já processados são ignorados).
+        top_k (int): Vizinhos por tênis.
+        full (bool): Descarta contagens e watermarks e reprocessa todos os eventos.
+        overwrite_manual (bool): Também substitui sugestões curadas à mão.
+
+    Returns:
+        dict: Eventos, sessões novas, códigos desconhecidos e sugestões gravadas.
+    """
+    if full:
+        db[CO_OCCURRENCE_COLLECTION].drop()
+        db[META_COLLECTION].delete_one({"_id": STATE_ID})
+    state = db[META_COLLECTION].find_one({"_id": STATE_ID}) or {}
+    session_codes, watermarks = closed_sessions(events, state.get("macs", {}))
+
+    codes = {code for session in session_codes for code in session}
+    code_ids = {shoe["code"]: shoe["_id"] for shoe in db["shoes"].find({"code": {"$in": list(codes)}}, {"code": 1})}
+    sessions = [{code_ids[code] for code in session if code in code_ids} for session in session_codes]
+    sessions = [session for session in sessions if session]
+    shoe_ids = sorted({shoe_id for session in sessions for shoe_id in session})
+
+    operations = count_operations(co_occurrence_matrix(sessions, shoe_ids), shoe_ids) if sessions else []
+
+    # Contagens e watermarks juntos: uma execução interrompida não conta sessões duas vezes
+    def write(session):
+        for start in range(0, len(operations), BATCH_SIZE):
+            db[CO_OCCURRENCE_COLLECTION].bulk_write(operations[start:start + BATCH_SIZE], ordered=False,
+                                                    session=session)
+        db[META_COLLECTION].update_one({"_id": STATE_ID},
+                                       {"$set": {"macs": watermarks, "updatedAt": datetime.now(timezone.utc)}},
+                                       upsert=True, session=session)
+
+    run_in_transaction(db.client, write)
+
+    # Mudou n_i: as pontuações dos vizinhos dos tênis afetados também mudam
+    affected = set(shoe_ids)
+    for document in db[CO_OCCURRENCE_COLLECTION].find({"_id": {"$in": shoe_ids}}, {"pairs": 1}):
+        affected.update(ObjectId(key) for key in document.get("pairs", {}))
+    written = write_suggestions(db, top_neighbors(db, affected, top_k), overwrite_manual) if affected else 0
+
+    return {
+        "events": len(events),
+        "sessions": len(sessions),
+        "unknownCodes": sorted(codes - set(code_ids)),
+        "suggestionsWritten": written,
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Exportação JSON do datalog em vez da API")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--full", action="store_true", help="Recalcula tudo a partir do feed")
+    parser.add_argument("--overwrite-manual", action="store_true", help="Substitui também as sugestões curadas à mão")
+    args = parser.parse_args()
+
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        parser.error("MONGO_URI não definido")
+
+    db = create_mongo_client(uri)[DB_NAME]
+    stats = update_recommendations(db, load_events(args.file), top_k=args.top_k, full=args.full,
+                                   overwrite_manual=args.overwrite_manual)
+    if stats["unknownCodes"]:
+        logger.warning(f"Códigos do datalog sem tênis cadastrado: {', '.join(stats['unknownCodes'])}")
+    logger.info(
+        f"{stats['sessions']} sessões novas de {stats['events']} eventos; "
+        f"{stats['suggestionsWritten']} sugestões gravadas."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Leitura em streaming de catálogos JSON grandes.
+
+Dois formatos são aceitos, detectados pelo primeiro caractere não branco:
+    - array JSON de objetos ("[{...}, {...}]"), o formato do Import.json;
+    - NDJSON, um objeto por linha.
+
+Os registros são entregues um a um junto com uma posição de retomada, de modo que a memória
+não cresce com o arquivo e uma importação interrompida pode continuar de onde parou.
+"""
+import json
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\r\n"
+
+
+def detect_format(path):
+    """Retorna "array" ou "ndjson" conforme o início do arquivo."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        while True:
+            char = f.read(1)
+            if not char:
+                return "ndjson"
+            if char not in WHITESPACE:
+                return "array" if char == "[" else "ndjson"
+
+
+def iter_ndjson(path, start=0):
+    """
+    Percorre um arquivo NDJSON gerando (registro, posição) para cada linha.
+
+    Args:
+        path (str): Arquivo a ler.
+        start (int): Offset em bytes de onde retomar (uma posição gerada anteriormente).
+
+    Yields:
+        tuple: O objeto decodificado e o offset em bytes logo após ele.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        position = start
+        for line in f:
+            position += len(line)
+            line = line.strip()
+            if line:
+                yield json.loads(line.decode("utf-8-sig")), position
+
+
+def iter_json_array(path, start=0, chunk_size=CHUNK_SIZE):
+    """
+    Percorre um array JSON de nível superior gerando (registro, posição), sem carregar o arquivo.
+
+    Args:
+        path (str): Arquivo a ler.
+        start (int): Quantidade de elementos a pular (uma posição gerada anteriormente).
+        chunk_size (int): Caracteres lidos do disco por vez.
+
+    Yields:
+        tuple: O elemento decodificado e o número de elementos consumidos até ali.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def skip(characters):
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in characters:
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill()
+
+        fill()
+        skip(WHITESPACE)
+        if buffer[pos:pos + 1] != "[":
+            raise ValueError(f"{path} não contém um array JSON")
+        pos += 1
+
+        index = 0
+        while True:
+            skip(WHITESPACE + ",")
+            if pos >= len(buffer):
+                raise ValueError(f"Fim de arquivo inesperado em {path}")
+            if buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Um valor que termina exatamente no fim do buffer pode ser um número truncado
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            pos = end
+            index += 1
+            if index > start:
+                yield record, index
+
+
+def iter_records(path, start=0):
+    """Gera (registro, posição) de um array JSON ou NDJSON, retomando em `start`."""
+    if detect_format(path) == "array":
+        return iter_json_array(path, start)
+    return iter_ndjson(path, start)
+
+
+def iter_batches(records, size):
+    """Agrupa pares (registro, posição) em listas de `size`, gerando (registros, última posição)."""
+    batch, position = [], None
+    for record, position in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch, position
+            batch = []
+    if batch:
+        yield batch, position
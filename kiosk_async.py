@@ -0,0 +1,186 @@
+# =======================================
+# Library Imports
+# =======================================
+
+# Asyncio serving path for the kiosk read endpoints. The Flask app (app.py) holds one worker
+# thread for the whole Atlas round trip of every scan; this server answers the same routes with
+# the same response bodies from a single event loop, so a burst of scans from several kiosks
+# waits on MongoDB concurrently instead of queueing behind a fixed number of threads. The detail
+# lookup is the shared catalog.detail_plan, so features added to it reach both servers.
+import logging
+import os
+import ssl
+
+from aiohttp import web
+from bson import ObjectId, json_util
+from bson.json_util import dumps
+from dotenv import load_dotenv
+from pymongo.server_api import ServerApi
+
+from catalog import CatalogError, detail_query, shoe_details_async
+from database import create_mongo_client
+from utils.boto import PresignedUrls, create_presigner
+from utils.fieldsets import DetailFieldset, FieldsetError
+from utils.prefetch import DetailPrefetcher, create_prefetcher
+
+load_dotenv()
+
+# =======================================
+# Variables
+# =======================================
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'danki-adidas'
+
+# Keys used to keep the Mongo handles on the aiohttp application
+MONGO_CLIENT_KEY = web.AppKey("mongo_client", object)
+DB_KEY = web.AppKey("db", object)
+# Detail prefetch (utils/prefetch.py); its background loads use a synchronous client of their own
+PREFETCH_KEY = web.AppKey("detail_prefetch", DetailPrefetcher)
+# Presigned image links when the bucket is private (S3_PRIVATE_BUCKET), as in app.py
+PRESIGN_KEY = web.AppKey("presigned_urls", PresignedUrls)
+
+
+# =======================================
+# Auxiliary Methods
+# =======================================
+
+def json_response(body, status=200):
+    """Serialize a payload with bson's json_util, as the Flask routes do."""
+    return web.Response(text=dumps(body), status=status, content_type='application/json')
+
+
+# =======================================
+# Routes
+# =======================================
+
+routes = web.RouteTableDef()
+
+
+@routes.get('/tag-by-address')
+async def get_shoe_by_tag(request):
+    """
+    Retrieves the shoeId associated with a given tagAddress from the 'tag' collection.
+
+    Query Parameters:
+        tagAddress (str): The tag address used to find the associated shoeId.
+    """
+    tag_address = request.query.get('tagAddress')
+
+    if not tag_address:
+        return json_response({"error": "tagAddress is required"}, 400)
+
+    try:
+        tag = await request.app[DB_KEY]['tag'].find_one({"tagAddress": tag_address})
+
+        if not tag:
+            logger.warning(f"No tag found with tagAddress: {tag_address}")
+            return json_response({"error": "Tag not found"}, 404)
+
+        return json_response({"shoeId": str(tag.get("shoeId"))})
+
+    except Exception as e:
+        logger.error(f"Failed to fetch shoe by tagAddress: {e}")
+        return json_response({"error": "Failed to retrieve data", "details": str(e)}, 500)
+
+
+@routes.get('/shoe-details')
+async def get_shoe_details(request):
+    """
+    Retrieves detailed information about a single shoe based on its ID, model, or code.
+
+    Accepts the same `fields`, `expand` and `imagesLimit` parameters as app.py and runs the same
+    catalog.detail_plan, with the reads of each step sent to MongoDB concurrently.
+    """
+    try:
+        query = detail_query(request.query)
+        fieldset = DetailFieldset.from_args(request.query)
+    except (CatalogError, FieldsetError) as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        result = await shoe_details_async(request.app[DB_KEY], query, fieldset,
+                                          prefetcher=request.app.get(PREFETCH_KEY),
+                                          presigner=request.app.get(PRESIGN_KEY))
+        if result is None:
+            return json_response({"error": "Shoe not found with the given criteria."}, 404)
+        return json_response(result)
+
+    except Exception as e:
+        logger.error(f"Failed to aggregate shoe details: {e}")
+        return json_response({"error": "Failed to retrieve data", "details": str(e)}, 500)
+
+
+@routes.get('/suggestion-by-shoe-id/{shoe_id}')
+async def get_suggestion_by_shoeid(request):
+    try:
+        suggestion = await request.app[DB_KEY].suggestion.find_one({"shoeId": ObjectId(request.match_info['shoe_id'])})
+        if suggestion:
+            return web.Response(text=json_util.dumps(suggestion), content_type='application/json')
+        return json_response({"error": "Suggestion not found"}, 404)
+    except Exception as e:
+        return json_response({"error": str(e)}, 400)
+
+
+# =======================================
+# Setup and App Configuration
+# =======================================
+
+async def connect_mongo(app):
+    """Open the Motor client when the event loop starts and close it on shutdown."""
+    # Imported here: motor 2.x only imports on the Python versions it supports, and tests run
+    # this app with an in-memory client instead
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    mongo_client = AsyncIOMotorClient(os.getenv('MONGO_URI'), server_api=ServerApi('1'))
+    app[MONGO_CLIENT_KEY] = mongo_client
+    app[DB_KEY] = mongo_client[DB_NAME]
+    logger.info("Async kiosk server connected to MongoDB.")
+    yield
+    mongo_client.close()
+
+
+def create_async_app(mongo_client=None):
+    """
+    Create the aiohttp application serving the kiosk read endpoints.
+
+    Args:
+        mongo_client (optional): Motor client to use instead of connecting to MONGO_URI when
+            the event loop starts (tests pass an in-memory one).
+
+    Returns:
+        web.Application: Application exposing /tag-by-address, /shoe-details and
+        /suggestion-by-shoe-id/<shoe_id> with the same responses as app.py.
+    """
+    app = web.Application()
+    app.add_routes(routes)
+    presigner = create_presigner()
+    if presigner is not None:
+        app[PRESIGN_KEY] = presigner
+    if mongo_client is None:
+        app.cleanup_ctx.append(connect_mongo)
+        # Same configuration as app.py (PREFETCH_TOP_N...); None when disabled
+        prefetcher = create_prefetcher(create_mongo_client(os.getenv('MONGO_URI'))[DB_NAME])
+        if prefetcher is not None:
+            app[PREFETCH_KEY] = prefetcher
+    else:
+        app[MONGO_CLIENT_KEY] = mongo_client
+        app[DB_KEY] = mongo_client[DB_NAME]
+    return app
+
+
+# =======================================
+# Main Function
+# =======================================
+
+if __name__ == "__main__":
+    # Runs beside the Flask server; kiosks point their scan lookups at this port
+    port = int(os.getenv('KIOSK_ASYNC_PORT', '5051'))
+    ssl_context = None
+    if os.path.exists('static/fullchain.pem') and os.path.exists('static/privkey.pem'):
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain('static/fullchain.pem', 'static/privkey.pem')
+    logger.info(f"Starting async kiosk server on port {port}...")
+    web.run_app(create_async_app(), host='0.0.0.0', port=port, ssl_context=ssl_context)
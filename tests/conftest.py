@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+# Os testes de rotas usam o mongomock em memória, nunca o banco configurado no .env
+os.environ["MONGO_URI"] = "mongomock://tests"
+# Sem pré-carga em segundo plano (ela leria o datalog pela rede); os testes criam a sua
+os.environ["PREFETCH_TOP_N"] = "0"
+# Snapshot do catálogo só atualizado quando o teste chama update(), nunca por um pedido
+os.environ["SNAPSHOT_CHECK_INTERVAL"] = "3600"
+
+
+@pytest.fixture
+def app_module():
+    """Módulo app.py com o banco em memória limpo a cada teste."""
+    import app as app_module
+    from database import ensure_indexes
+    for name in app_module.db.list_collection_names():
+        app_module.db.drop_collection(name)
+    ensure_indexes(app_module.db)
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def catalog(app_module):
+    """Catálogo sintético pequeno (mesmo gerador dos benchmarks)."""
+    from benchmarks.seed import seed_catalog
+    from utils.shoe_cards import rebuild
+    documents = seed_catalog(app_module.db, 20)
+    rebuild(app_module.db)
+    return documents
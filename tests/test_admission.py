@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from utils.admission import HEAVY, KIOSK, AdmissionPool
+from utils.metrics import REGISTRY
+
+
+@pytest.fixture
+def pools(app_module):
+    """Pools de uma vaga com orçamentos curtos, restaurados ao fim do teste."""
+    pools = app_module.app.extensions["admission_pools"]
+    original = dict(pools)
+    pools[KIOSK] = AdmissionPool(KIOSK, 1, 2.0)
+    pools[HEAVY] = AdmissionPool(HEAVY, 1, 0.05)
+    yield pools
+    pools.update(original)
+
+
+def rejected(reason):
+    return REGISTRY.get_sample_value("danki_admission_rejected_total", {"pool": HEAVY, "reason": reason}) or 0
+
+
+def test_heavy_route_rejected_after_queue_budget(client, catalog, pools):
+    assert client.get("/shoes-and-tags").status_code == 200
+    before = rejected("budget")
+
+    pools[HEAVY].acquire()
+    try:
+        response = client.get("/shoes-and-tags")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        # Rotas fora dos pools não são afetadas
+        assert client.get("/sneaker/shoe-not-in-pool/tags").status_code == 200
+    finally:
+        pools[HEAVY].release()
+    assert client.get("/shoes-and-tags").status_code == 200
+
+    assert rejected("budget") == before + 1
+    assert 'danki_admission_queue_seconds_count{outcome="admitted",pool="heavy"}' in client.get("/metrics").get_data(as_text=True)
+
+
+def test_kiosks_waiting_shed_heavy_work(app_module, catalog, pools):
+    tag = catalog["tag"][0]
+    pools[KIOSK].acquire()
+    results = []
+    waiting_kiosk = threading.Thread(target=lambda: results.append(
+        app_module.app.test_client().get(f"/tag-by-address?tagAddress={tag['tagAddress']}").status_code))
+    waiting_kiosk.start()
+    try:
+        for _ in range(200):
+            if pools[KIOSK].waiting:
+                break
+            threading.Event().wait(0.01)
+        # Com um quiosque na fila a rota pesada é recusada sem esperar, mesmo com vaga no seu pool
+        assert app_module.app.test_client().get("/shoes-and-tags").status_code == 503
+    finally:
+        pools[KIOSK].release()
+        waiting_kiosk.join()
+    assert results == [200]
@@ -0,0 +1,276 @@
+import json
+
+from bson import ObjectId
+
+
+def test_tag_by_address_returns_shoe_id(client, catalog):
+    tag = catalog["tag"][3]
+    response = client.get(f"/tag-by-address?tagAddress={tag['tagAddress']}")
+    assert response.status_code == 200
+    assert response.get_json() == {"shoeId": tag["shoeId"]}
+
+
+def test_tag_by_address_requires_parameter(client):
+    assert client.get("/tag-by-address").status_code == 400
+
+
+def test_tags_resolve_batches_addresses_and_reports_unknown(client, catalog):
+    tags = catalog["tag"][:4]
+    addresses = [tag["tagAddress"] for tag in tags] + ["FF:FF:FF:FF:FF:FF", tags[0]["tagAddress"]]
+    response = client.post("/tags/resolve", json={"tagAddresses": addresses, "cards": True})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["tags"] == {tag["tagAddress"]: tag["shoeId"] for tag in tags}
+    assert data["unknown"] == ["FF:FF:FF:FF:FF:FF"]
+    card = data["shoes"][tags[0]["shoeId"]]
+    assert card["code"] and card["tagCount"] >= 1 and "searchKeys" not in card
+
+    # Sem `cards` só o mapeamento tag -> tênis
+    assert "shoes" not in client.post("/tags/resolve", json={"tagAddresses": addresses}).get_json()
+    assert client.post("/tags/resolve", json={"tagAddresses": "AA"}).status_code == 400
+    assert client.post("/tags/resolve", json={"tagAddresses": [str(i) for i in range(5001)]}).status_code == 400
+
+
+def test_shoe_details_joins_images_colors_and_suggestions(client, catalog):
+    shoe = catalog["shoes"][5]
+    response = client.get(f"/shoe-details?id={shoe['_id']}")
+    assert response.status_code == 200
+    details = json.loads(response.get_data(as_text=True))
+    assert details["code"] == shoe["code"]
+    assert details["images"] == catalog["images"][5]["links"]
+    assert [color["shoeId"] for color in details["colors"]] == [str(color) for color in shoe["colors"]]
+    assert len(details["suggestion"]) == 3
+
+
+def test_shoe_details_unknown_code(client, catalog):
+    assert client.get("/shoe-details?code=NOPE").status_code == 404
+    assert client.get("/shoe-details?id=123").status_code == 400
+
+
+def test_admin_detail_page_renders_the_catalog_detail(client, catalog):
+    shoe = catalog["shoes"][5]
+    page = client.get(f"/sneaker/detail?id={shoe['_id']}")
+    assert page.status_code == 200
+    html = page.get_data(as_text=True)
+    assert shoe["code"] in html and catalog["images"][5]["links"][0] in html
+    assert client.get("/sneaker/detail?code=NOPE").status_code == 404
+    assert client.get("/sneaker/detail").status_code == 400
+
+
+def list_shoes(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return {shoe["code"]: shoe for shoe in json.loads(response.get_data(as_text=True))}
+
+
+def test_shoes_with_images_reads_cards(client, catalog):
+    shoes = list_shoes(client, "/shoes-with-images")
+    shoe = catalog["shoes"][2]
+    assert len(shoes) == len(catalog["shoes"])
+    assert shoes[shoe["code"]]["images"] == catalog["images"][2]["links"]
+    assert shoes[shoe["code"]]["id"] == {"$oid": str(shoe["_id"])}
+    assert "tag" not in shoes[shoe["code"]]
+
+
+def test_tag_writes_update_shoes_and_tags(client, catalog):
+    shoe = catalog["shoes"][4]
+    for tag in client.get(f"/sneaker/{shoe['_id']}/tags").get_json():
+        assert client.delete(f"/tag/{tag['_id']}").status_code == 200
+    assert shoe["code"] in list_shoes(client, "/shoes-and-tags?hasTag=false")
+    assert shoe["code"] not in list_shoes(client, "/shoes-and-tags?hasTag=true")
+
+    client.post(f"/sneaker/{shoe['_id']}/tags", json={"tagAddress": "AA:BB"})
+    tagged = list_shoes(client, "/shoes-and-tags?hasTag=true")
+    assert tagged[shoe["code"]]["tag"] == [{"tagAddress": "AA:BB"}]
+
+
+def test_crud_writes_update_cards(client, catalog, app_module):
+    from utils.shoe_cards import check
+
+    shoe = catalog["shoes"][6]
+    images_id = catalog["images"][6]["_id"]
+    client.put(f"/images/{images_id}", json={"links": ["https://exemplo/nova.png"]})
+    assert list_shoes(client, "/shoes-with-images")[shoe["code"]]["images"] == ["https://exemplo/nova.png"]
+
+    client.post("/shoes", json={"model": "NOVO", "title": "t", "description": "d", "code": "NOVO1"})
+    assert "NOVO1" in list_shoes(client, "/shoes-with-images")
+
+    assert client.delete(f"/shoes/{shoe['_id']}").status_code == 200
+    assert shoe["code"] not in list_shoes(client, "/shoes-with-images")
+    assert check(app_module.db) == []
+
+
+def test_crud_converts_and_validates_before_writing(client, catalog, app_module):
+    shoe_id = str(catalog["shoes"][2]["_id"])
+    created = client.post("/images", json={"shoeId": {"$oid": shoe_id}, "links": ["https://exemplo/a.png"]})
+    assert created.status_code == 201
+    stored = app_module.db["images"].find_one({"_id": ObjectId(created.get_json()["id"])})
+    assert str(stored["shoeId"]) == shoe_id
+
+    # Recusados no processo, sem chegar ao Mongo
+    count = app_module.db["images"].count_documents({})
+    invalid = client.post("/images", json={"shoeId": shoe_id, "links": "https://exemplo/a.png"})
+    assert invalid.status_code == 400
+    assert set(invalid.get_json()["details"]) == {"shoeId: esperado objectId, recebido str",
+                                                  "links: esperado array, recebido str"}
+    assert client.post("/images", json={"shoeId": {"$oid": "xyz"}, "links": []}).status_code == 400
+    assert client.put(f"/shoes/{shoe_id}", json={"title": 7}).status_code == 400
+    assert app_module.db["images"].count_documents({}) == count
+
+
+def test_check_reports_and_rebuild_repairs_cards(app_module, catalog):
+    from utils.shoe_cards import SHOE_CARDS_COLLECTION, check, rebuild
+
+    db = app_module.db
+    db["images"].update_one({"_id": catalog["images"][0]["_id"]}, {"$set": {"links": []}})
+    db["shoes"].delete_one({"_id": catalog["shoes"][1]["_id"]})
+    db[SHOE_CARDS_COLLECTION].delete_one({"_id": catalog["shoes"][2]["_id"]})
+
+    problems = {problem["problem"] for problem in check(db)}
+    assert problems == {"stale", "orphan", "missing"}
+
+    rebuild(db)
+    assert check(db) == []
+
+
+def full_payload(shoe, **changes):
+    payload = {
+        "_id": str(shoe["_id"]),
+        "code": shoe["code"],
+        "model": shoe["model"],
+        "title": shoe["title"],
+        "description": shoe["description"],
+        "pinterestId": shoe["pinterestId"],
+        "colors": [{"shoeId": str(color)} for color in shoe["colors"]],
+        "images": [f"https://dankiadidas.s3.amazonaws.com/{shoe['code']}/{n}.png" for n in range(1, 4)],
+    }
+    payload.update(changes)
+    return payload
+
+
+def test_update_shoe_full_skips_unchanged_documents(client, catalog, app_module):
+    shoe = catalog["shoes"][3]
+    suggestion = [{"shoeId": str(shoe_id)} for shoe_id in catalog["suggestion"][3]["shoes"]]
+
+    response = client.put("/update-shoe-full", json=full_payload(shoe, suggestion=suggestion, version=0))
+    assert response.get_json() == {"message": "No changes", "version": 0}
+    assert "version" not in app_module.db.shoes.find_one({"_id": shoe["_id"]})
+
+
+def test_update_shoe_full_bumps_version_and_detects_conflicts(client, catalog, app_module):
+    shoe = catalog["shoes"][3]
+
+    first = client.put("/update-shoe-full", json=full_payload(shoe, title="NOVO TÍTULO", version=0))
+    assert first.status_code == 200
+    assert first.get_json()["version"] == 1
+
+    # Segundo editor ainda com a versão carregada antes do primeiro salvar
+    second = client.put("/update-shoe-full", json=full_payload(shoe, images=["https://exemplo/1.png"], version=0))
+    assert second.status_code == 409
+    assert second.get_json()["version"] == 1
+
+    stored = app_module.db.shoes.find_one({"_id": shoe["_id"]})
+    assert (stored["title"], stored["version"]) == ("NOVO TÍTULO", 1)
+    assert app_module.db.images.find_one({"shoeId": shoe["_id"]})["links"] == catalog["images"][3]["links"]
+
+    details = json.loads(client.get(f"/shoe-details?id={shoe['_id']}").get_data(as_text=True))
+    assert details["version"] == 1
+
+
+def test_generic_shoe_update_is_versioned(client, catalog, app_module):
+    shoe = catalog["shoes"][3]
+
+    # Um save pelo CRUD genérico também conta como versão, e `version` nunca vem do corpo
+    saved = client.put(f"/shoes/{shoe['_id']}", json={"title": "PELO CRUD", "version": 0})
+    assert saved.get_json()["version"] == 1
+    assert client.put(f"/shoes/{shoe['_id']}", json={"title": "OUTRO"}).get_json()["version"] == 2
+
+    # O formulário carregado antes desses saves não os sobrescreve
+    stale = client.put("/update-shoe-full", json=full_payload(shoe, title="FORMULÁRIO", version=0))
+    assert stale.status_code == 409
+    conflict = client.put(f"/shoes/{shoe['_id']}", json={"title": "ATRASADO", "version": 1})
+    assert conflict.status_code == 409
+    assert conflict.get_json()["version"] == 2
+
+    stored = app_module.db.shoes.find_one({"_id": shoe["_id"]})
+    assert (stored["title"], stored["version"]) == ("OUTRO", 2)
+    assert client.put(f"/shoes/{catalog['shoes'][0]['_id']}", json={"version": "1"}).status_code == 400
+
+
+def test_shoe_details_sparse_fields(client, catalog):
+    shoe = catalog["shoes"][7]
+    response = client.get(f"/shoe-details?id={shoe['_id']}&fields=title,code,images&imagesLimit=2")
+    assert response.status_code == 200
+    details = json.loads(response.get_data(as_text=True))
+    assert details == {"_id": str(shoe["_id"]), "code": shoe["code"], "title": shoe["title"],
+                       "images": catalog["images"][7]["links"][:2]}
+
+
+def test_shoe_details_expand_and_invalid_fields(client, catalog):
+    shoe = catalog["shoes"][7]
+    details = json.loads(client.get(f"/shoe-details?id={shoe['_id']}&expand=pinterest").get_data(as_text=True))
+    assert details["pinterest"] == catalog["pinterest"][7]["links"]
+    assert "colors" not in details and "suggestion" not in details
+
+    assert client.get(f"/shoe-details?id={shoe['_id']}&fields=preco").status_code == 400
+
+
+def test_shoes_and_tags_remote_pagination(client, catalog):
+    codes = sorted(shoe["code"] for shoe in catalog["shoes"])
+    url = "/shoes-and-tags?page=2&size=6&sort[0][field]=code&sort[0][dir]=desc"
+    page = json.loads(client.get(url).get_data(as_text=True))
+    assert page["last_page"] == 4
+    assert page["last_row"] == len(codes)
+    assert [shoe["code"] for shoe in page["data"]] == codes[::-1][6:12]
+
+    code = catalog["shoes"][9]["code"]
+    filtered = json.loads(client.get(f"/shoes-and-tags?page=1&q={code.lower()}").get_data(as_text=True))
+    assert [shoe["code"] for shoe in filtered["data"]] == [code]
+    assert filtered["last_row"] == 1
+
+    # A mesma busca por prefixo do /shoes/search (sem acentos) e o começo do tagAddress
+    tag = catalog["tag"][4]
+    by_tag = json.loads(client.get(f"/shoes-and-tags?page=1&q={tag['tagAddress']}").get_data(as_text=True))
+    assert [shoe["id"] for shoe in by_tag["data"]] == [{"$oid": tag["shoeId"]}]
+    accents = json.loads(client.get("/shoes-and-tags?page=1&size=100&q=tênis edi").get_data(as_text=True))
+    assert accents["last_row"] == len(catalog["shoes"])
+
+    # Filtros de coluna do Tabulator ("like" por padrão): prefixos nas chaves normalizadas
+    shoe = catalog["shoes"][9]
+    by_code = json.loads(client.get(f"/shoes-and-tags?page=1&filter[0][field]=code"
+                                    f"&filter[0][value]={shoe['code'].lower()}").get_data(as_text=True))
+    assert [card["code"] for card in by_code["data"]] == [shoe["code"]]
+    model = shoe["model"].split()[0].lower()
+    by_model = json.loads(client.get(f"/shoes-and-tags?page=1&size=100&filter[0][field]=model"
+                                     f"&filter[0][value]={model}").get_data(as_text=True))
+    expected = [item for item in catalog["shoes"] if item["model"].lower().startswith(model)]
+    assert by_model["last_row"] == len(expected)
+
+    assert client.get("/shoes-and-tags?page=1&sort[0][field]=images").status_code == 400
+
+
+def test_shoes_search_prefix_and_accents(client, catalog):
+    shoe = catalog["shoes"][11]
+    index = shoe["title"].rsplit(" ", 1)[1]
+    # "tenis" sem acento, modelo pela metade e o número da edição do título
+    words = shoe["model"].split()
+    response = client.get(f"/shoes/search?q=tenis {words[0][:3].lower()} {index}")
+    assert response.status_code == 200
+    results = json.loads(response.get_data(as_text=True))
+    assert [result["code"] for result in results] == [shoe["code"]]
+    assert results[0]["images"] == catalog["images"][11]["links"][:2]
+
+    assert len(json.loads(client.get("/shoes/search?q=edi&limit=3").get_data(as_text=True))) == 3
+    assert client.get("/shoes/search?q=--").status_code == 400
+    assert client.get("/shoes/search?q=samba&limit=0").status_code == 400
+
+
+def test_cards_rebuilt_when_format_changes(app_module, catalog):
+    from database import META_COLLECTION
+    from utils.shoe_cards import CARDS_VERSION_ID, SHOE_CARDS_COLLECTION, ensure_built
+
+    db = app_module.db
+    db[SHOE_CARDS_COLLECTION].update_many({}, {"$unset": {"searchKeys": ""}})
+    db[META_COLLECTION].update_one({"_id": CARDS_VERSION_ID}, {"$set": {"format": 1}})
+    ensure_built(db)
+    assert db[SHOE_CARDS_COLLECTION].count_documents({"searchKeys": {"$exists": False}}) == 0
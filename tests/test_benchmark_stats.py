@@ -0,0 +1,24 @@
+from benchmarks.stats import latency_summary, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    # Posto ceil(p · n): em 100 valores o p99 é o 99º, não o máximo
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.07) == 7
+    assert percentile(values, 1.0) == 100
+    assert percentile(values, 0.0) == 1
+
+    # Tamanhos pares e pequenos: p50 de 4 valores é o 2º
+    assert percentile([1, 2, 3, 4], 0.50) == 2
+    assert percentile([10, 20], 0.50) == 10
+    assert percentile([10, 20], 0.51) == 20
+    assert percentile([5], 0.99) == 5
+    assert percentile([], 0.5) is None
+
+
+def test_latency_summary():
+    summary = latency_summary([float(value) for value in range(1000, 0, -1)])
+    assert summary == {"p50": 500.0, "p95": 950.0, "p99": 990.0, "max": 1000.0}
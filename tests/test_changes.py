@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+
+def changes(client, since, **params):
+    response = client.get("/changes", query_string={"since": since, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_changes_follow_every_write_path(client, catalog):
+    cursor = client.get("/changes").get_json()["next"]
+    shoe = catalog["shoes"][2]
+
+    created = client.post("/shoes", json={"model": "NOVO", "code": "NOVO1", "title": "t", "description": "d"})
+    new_id = created.get_json()["id"]
+    client.put(f"/shoes/{new_id}", json={"title": "primeira"})
+    client.put(f"/shoes/{new_id}", json={"title": "segunda"})
+    tag_id = client.post(f"/sneaker/{shoe['_id']}/tags", json={"tagAddress": "AA:01"}).get_json()["_id"]
+    client.delete(f"/tag/{tag_id}")
+    client.put("/update-shoe-full", json={
+        "_id": str(shoe["_id"]), "code": shoe["code"], "model": shoe["model"], "title": "EDITADO",
+        "description": shoe.get("description", ""), "pinterestId": shoe.get("pinterestId", ""),
+        "images": ["https://img/nova.jpg"], "suggestion": [{"shoeId": str(catalog["shoes"][5]["_id"])}],
+    })
+
+    delta = changes(client, cursor)
+    assert delta["hasMore"] is False
+    by_key = {(change["collection"], change["id"]["$oid"]): change for change in delta["changes"]}
+    # Três escritas no mesmo tênis viram um único upsert com o estado atual
+    assert by_key[("shoes", new_id)]["doc"]["title"] == "segunda"
+    assert by_key[("tag", tag_id)]["op"] == "delete" and "doc" not in by_key[("tag", tag_id)]
+    assert by_key[("shoes", str(shoe["_id"]))]["doc"]["title"] == "EDITADO"
+    assert [change["collection"] for change in delta["changes"]][-3:] == ["shoes", "images", "suggestion"]
+
+    # Nada novo depois do cursor devolvido
+    assert changes(client, delta["next"])["changes"] == []
+
+
+def test_changes_pagination_and_cursor_errors(client, app_module, catalog):
+    cursor = client.get("/changes").get_json()["next"]
+    ids = [client.post("/tag", json={"shoeId": str(catalog["shoes"][0]["_id"]), "tagAddress": f"BB:{i}"})
+           .get_json()["id"] for i in range(5)]
+
+    first = changes(client, cursor, limit=3)
+    assert first["hasMore"] is True and len(first["changes"]) == 3
+    second = changes(client, first["next"], limit=3)
+    assert second["hasMore"] is False
+    assert [change["id"]["$oid"] for change in first["changes"] + second["changes"]] == ids
+
+    assert client.get("/changes?since=abc").status_code == 400
+    assert client.get(f"/changes?since={second['next'] + 10}").status_code == 410
+
+    # Entradas expiradas (TTL) invalidam cursores anteriores a elas
+    app_module.db["changes"].delete_many({"_id": {"$lte": cursor + 2}})
+    assert client.get(f"/changes?since={cursor}").status_code == 410
+    assert client.get(f"/changes?since={cursor + 2}").status_code == 200
+
+
+def test_changes_stop_at_recent_gap(app_module):
+    from utils.changes import CHANGES_COLLECTION, changes_since, record_change
+
+    db = app_module.db
+    record_change(db, "shoes", "a")
+    record_change(db, "shoes", "b")
+    record_change(db, "shoes", "c")
+    # seq 2 alocado mas ainda não inserido (escrita em andamento)
+    db[CHANGES_COLLECTION].delete_one({"_id": 2})
+
+    delta = changes_since(db, 0)
+    assert delta["next"] == 1 and delta["hasMore"] is True
+
+    # Passado o período de tolerância a lacuna é tratada como escrita perdida
+    db[CHANGES_COLLECTION].update_many({}, {"$set": {"at": datetime.now(timezone.utc) - timedelta(minutes=1)}})
+    assert changes_since(db, 0)["next"] == 3
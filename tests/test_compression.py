@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from utils.compression import CompressedCache, negotiate, precompress_static
+
+
+def test_negotiate_prefers_brotli_and_respects_q():
+    pytest.importorskip("brotli")
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("gzip, br;q=0.5") == "gzip"
+    assert negotiate("br;q=0, gzip;q=0") is None
+    assert negotiate("*") == "br"
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompressedCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.get("a")
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    assert cache.size == 10
+
+
+def test_list_is_gzipped_and_cached_per_etag(client, catalog, app_module):
+    plain = client.get("/shoes-with-images")
+    response = client.get("/shoes-with-images", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+    assert len(response.get_data()) < len(plain.get_data())
+
+    # Mesma versão dos cards: o corpo comprimido vem do cache
+    cache = app_module.app.extensions["compression_cache"]
+    etag, _ = response.get_etag()
+    assert cache.get((etag, "gzip")) == response.get_data()
+
+
+def test_brotli_when_accepted(client, catalog):
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/shoes-and-tags", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert len(json.loads(brotli.decompress(response.get_data()))) == len(catalog["shoes"])
+
+
+def test_small_responses_are_not_compressed(client, catalog):
+    tag = catalog["tag"][0]
+    response = client.get(f"/tag-by-address?tagAddress={tag['tagAddress']}", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_list_etag_returns_304_until_cards_change(client, catalog):
+    first = client.get("/shoes-and-tags?hasTag=true")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"cards-')
+    assert client.get("/shoes-and-tags?hasTag=true", headers={"If-None-Match": etag}).status_code == 304
+    # O query string faz parte do ETag
+    assert client.get("/shoes-and-tags?hasTag=false", headers={"If-None-Match": etag}).status_code == 200
+
+    client.post(f"/sneaker/{catalog['shoes'][0]['_id']}/tags", json={"tagAddress": "CC:DD"})
+    changed = client.get("/shoes-and-tags?hasTag=true", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_static_serves_precompressed_variant(client, app_module, tmp_path, monkeypatch):
+    content = b"body { color: black; }\n" * 100
+    (tmp_path / "site.css").write_bytes(content)
+    written = precompress_static(str(tmp_path))
+    assert str(tmp_path / "site.css.gz") in written
+    # Segunda execução não reescreve variantes atualizadas
+    assert precompress_static(str(tmp_path)) == []
+
+    monkeypatch.setattr(app_module.app, "static_folder", str(tmp_path))
+    response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert gzip.decompress(response.get_data()) == content
+    response.close()
+
+    # Original editado depois do build: a variante velha é ignorada
+    later = os.path.getmtime(tmp_path / "site.css.gz") + 10
+    os.utime(tmp_path / "site.css", (later, later))
+    response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == content
+    response.close()
@@ -0,0 +1,121 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_db(stored=None, existing=None):
+    """Monta um banco falso com a coleção de metadados e a listagem de coleções."""
+    meta = MagicMock()
+    meta.find_one.return_value = stored
+    db = MagicMock()
+    db.__getitem__.side_effect = lambda name: meta if name == database.META_COLLECTION else MagicMock()
+    db.list_collection_names.return_value = list(database.SCHEMAS) if existing is None else existing
+    return db, meta
+
+
+class TestApplySchemas(unittest.TestCase):
+
+    def test_first_boot_applies_validators_and_stores_fingerprint(self):
+        db, meta = make_db(stored=None, existing=[])
+
+        self.assertTrue(database.apply_schemas(db))
+
+        self.assertEqual(db.list_collection_names.call_count, 1)
+        self.assertEqual(db.create_collection.call_count, len(database.SCHEMAS))
+        self.assertEqual(db.command.call_count, len(database.SCHEMAS))
+        fingerprint = database.schema_fingerprint(database.load_schemas())
+        update = meta.update_one.call_args[0][1]["$set"]
+        self.assertEqual(update["fingerprint"], fingerprint)
+
+    def test_matching_fingerprint_skips_listing_and_collmod(self):
+        fingerprint = database.schema_fingerprint(database.load_schemas())
+        db, meta = make_db(stored={"_id": database.SCHEMA_FINGERPRINT_ID, "fingerprint": fingerprint})
+
+        self.assertFalse(database.apply_schemas(db))
+
+        db.list_collection_names.assert_not_called()
+        db.command.assert_not_called()
+        meta.update_one.assert_not_called()
+
+    def test_stale_fingerprint_reapplies(self):
+        db, meta = make_db(stored={"_id": database.SCHEMA_FINGERPRINT_ID, "fingerprint": "old"})
+
+        self.assertTrue(database.apply_schemas(db))
+
+        self.assertEqual(db.command.call_count, len(database.SCHEMAS))
+        db.create_collection.assert_not_called()
+
+    def test_force_ignores_stored_fingerprint(self):
+        fingerprint = database.schema_fingerprint(database.load_schemas())
+        db, meta = make_db(stored={"_id": database.SCHEMA_FINGERPRINT_ID, "fingerprint": fingerprint})
+
+        self.assertTrue(database.apply_schemas(db, force=True))
+        meta.find_one.assert_not_called()
+
+    def test_failed_index_is_stored_with_the_fingerprint(self):
+        db, meta = make_db(stored=None)
+        failed = {"shoes": database.INDEXES["shoes"]}
+
+        with patch.object(database, "index_failures", return_value=failed):
+            self.assertTrue(database.apply_schemas(db))
+
+        update = meta.update_one.call_args[0][1]["$set"]
+        self.assertEqual(update["fingerprint"], database.schema_fingerprint(database.load_schemas()))
+        self.assertEqual(update["failedIndexes"], failed)
+
+    def test_matching_fingerprint_retries_only_failed_indexes(self):
+        fingerprint = database.schema_fingerprint(database.load_schemas())
+        failed = {"shoes": database.INDEXES["shoes"]}
+        db, meta = make_db(stored={"_id": database.SCHEMA_FINGERPRINT_ID, "fingerprint": fingerprint,
+                                   "failedIndexes": failed})
+
+        with patch.object(database, "index_failures", return_value={}) as retry:
+            self.assertFalse(database.apply_schemas(db))
+
+        retry.assert_called_once_with(db, failed)
+        db.command.assert_not_called()
+        meta.update_one.assert_called_once_with({"_id": database.SCHEMA_FINGERPRINT_ID},
+                                                {"$set": {"failedIndexes": {}}})
+
+    def test_fingerprint_depends_on_indexes(self):
+        schemas = database.load_schemas()
+        indexes = dict(database.INDEXES, pinterest=[{"keys": [["shoeId", 1]]}])
+        self.assertNotEqual(database.schema_fingerprint(schemas), database.schema_fingerprint(schemas, indexes))
+
+    def test_fingerprint_depends_on_schema_contents(self):
+        schemas = database.load_schemas()
+        changed = dict(schemas, shoes=dict(schemas["shoes"], required=["model"]))
+        self.assertNotEqual(database.schema_fingerprint(schemas), database.schema_fingerprint(changed))
+
+
+class TestEnsureIndexes(unittest.TestCase):
+
+    def test_creates_declared_indexes_and_reports_failures(self):
+        collections = {name: MagicMock() for name in database.INDEXES}
+        collections["shoes"].create_index.side_effect = Exception("E11000 duplicate key")
+        db = MagicMock()
+        db.__getitem__.side_effect = collections.__getitem__
+
+        self.assertFalse(database.ensure_indexes(db))
+
+        collections["shoes"].create_index.assert_called_once_with([("code", 1)], unique=True)
+        collections["images"].create_index.assert_called_once_with([("shoeId", 1)])
+        self.assertEqual(database.index_failures(db), {"shoes": database.INDEXES["shoes"]})
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_utils_do_not_import_boto3_on_import(self):
+        code = "import sys, utils.boto, utils.pinterest; print('boto3' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
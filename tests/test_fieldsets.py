@@ -0,0 +1,51 @@
+import unittest
+
+from bson import ObjectId
+
+from utils.fieldsets import DETAIL_EXPANSIONS, DETAIL_FIELDS, DetailFieldset, FieldsetError
+
+
+class TestDetailFieldset(unittest.TestCase):
+
+    def test_no_parameters_keeps_the_full_payload(self):
+        fieldset = DetailFieldset.from_args({})
+        self.assertEqual(fieldset.fields, set(DETAIL_FIELDS))
+        self.assertEqual(fieldset.expansions, set(DETAIL_EXPANSIONS))
+
+    def test_sparse_fields_push_projections_down(self):
+        fieldset = DetailFieldset.from_args({"fields": "title,code,images", "imagesLimit": "3"})
+        self.assertEqual(fieldset.shoe_projection(), {"code": 1, "title": 1})
+        self.assertEqual(fieldset.images_projection(), {"links": {"$slice": 3}})
+        self.assertFalse(any(fieldset.wants(name) for name in DETAIL_EXPANSIONS))
+
+    def test_expand_adds_to_the_basic_fields(self):
+        fieldset = DetailFieldset.from_args({"expand": "colors"})
+        self.assertEqual(fieldset.expansions, {"colors"})
+        self.assertIn("colors", fieldset.shoe_projection())
+        self.assertIn("description", fieldset.fields)
+
+    def test_unknown_names_are_rejected(self):
+        with self.assertRaises(FieldsetError):
+            DetailFieldset.from_args({"fields": "title,preco"})
+        with self.assertRaises(FieldsetError):
+            DetailFieldset.from_args({"expand": "title"})
+        with self.assertRaises(FieldsetError):
+            DetailFieldset.from_args({"imagesLimit": "-1"})
+
+    def test_related_cards_are_built_from_batched_results(self):
+        color, missing = ObjectId(), ObjectId()
+        shoe = {"_id": ObjectId(), "colors": [color, missing]}
+        fieldset = DetailFieldset.from_args({"fields": "colors"})
+
+        result = fieldset.build(
+            shoe,
+            related_shoes=[{"_id": color, "code": "C1", "model": "M"}],
+            related_images=[{"shoeId": color, "links": ["a", "b"]}, {"shoeId": color, "links": ["x", "y"]}]
+        )
+
+        self.assertEqual(result["colors"], [{"shoeId": str(color), "image": "b", "code": "C1", "model": "M"}])
+        self.assertEqual(set(result), {"_id", "colors"})
+
+
+if __name__ == "__main__":
+    unittest.main()
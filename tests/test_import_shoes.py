@@ -0,0 +1,110 @@
+import json
+
+import mongomock
+import pytest
+
+from imports import import_shoes
+from imports.stream import iter_json_array, iter_ndjson, iter_records
+
+RECORDS = [
+    {"model": "SAMBA OG", "code": f"CODE{index}", "title": "TÊNIS [ESPECIAL], \"ÚNICO\"", "price": 599.9 + index,
+     "image_1": f"https://exemplo/{index}/1.png", "image_2": f"https://exemplo/{index}/2.png"}
+    for index in range(7)
+]
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["danki-adidas"]
+
+
+def write_array(path):
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+def write_ndjson(path):
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in RECORDS), encoding="utf-8")
+    return str(path)
+
+
+def test_array_stream_survives_chunk_boundaries(tmp_path):
+    path = write_array(tmp_path / "catalogo.json")
+    # Blocos minúsculos cortam strings, números e escapes no meio
+    for chunk_size in (1, 3, 17):
+        assert [record for record, _ in iter_json_array(path, chunk_size=chunk_size)] == RECORDS
+
+
+def test_streams_resume_from_position(tmp_path):
+    for path in (write_array(tmp_path / "catalogo.json"), write_ndjson(tmp_path / "catalogo.ndjson")):
+        positions = [position for _, position in iter_records(path)]
+        resumed = [record for record, _ in iter_records(path, positions[2])]
+        assert resumed == RECORDS[3:]
+
+
+def test_ndjson_ignores_blank_lines(tmp_path):
+    path = tmp_path / "catalogo.ndjson"
+    path.write_text(json.dumps(RECORDS[0]) + "\n\n" + json.dumps(RECORDS[1]) + "\n", encoding="utf-8")
+    assert [record for record, _ in iter_ndjson(str(path))] == RECORDS[:2]
+
+
+def test_rerun_is_idempotent(tmp_path, db):
+    path = write_ndjson(tmp_path / "catalogo.ndjson")
+
+    first = import_shoes.import_catalog(db, path, batch_size=3)
+    second = import_shoes.import_catalog(db, path, batch_size=3)
+
+    assert first["shoes"] == second["shoes"] == len(RECORDS)
+    assert db["shoes"].count_documents({}) == len(RECORDS)
+    assert db["images"].count_documents({}) == len(RECORDS)
+    shoe = db["shoes"].find_one({"code": "CODE4"})
+    assert "image_1" not in shoe
+    images = db["images"].find_one({"shoeId": shoe["_id"]})
+    assert images["links"] == ["https://exemplo/4/1.png", "https://exemplo/4/2.png"]
+
+
+def test_interrupted_import_resumes_from_checkpoint(tmp_path, db, monkeypatch):
+    path = write_array(tmp_path / "catalogo.json")
+    original = import_shoes.import_batch
+    calls = []
+    failed = []
+
+    def failing_batch(db, records):
+        calls.append([record["code"] for record in records])
+        if len(calls) == 2 and not failed:
+            failed.append(True)
+            raise RuntimeError("conexão perdida")
+        return original(db, records)
+
+    monkeypatch.setattr(import_shoes, "import_batch", failing_batch)
+    with pytest.raises(RuntimeError):
+        import_shoes.import_catalog(db, path, batch_size=3)
+    assert import_shoes.load_checkpoint(path) == (3, 3)
+
+    calls.clear()
+    stats = import_shoes.import_catalog(db, path, batch_size=3)
+
+    # Só os lotes ainda não gravados são reenviados
+    assert calls[0][0] == "CODE3"
+    assert stats["resumedAfter"] == 3
+    assert db["shoes"].count_documents({}) == len(RECORDS)
+    assert import_shoes.load_checkpoint(path) == (0, 0)
+
+
+def test_records_without_code_are_skipped(db):
+    shoes, images, skipped = import_shoes.import_batch(db, [{"model": "SEM CÓDIGO"}, RECORDS[0], RECORDS[0]])
+    assert (shoes, images, skipped) == (1, 1, 1)
+
+
+def test_import_refreshes_cards_and_change_log(tmp_path, client, app_module):
+    cursor = client.get("/changes").get_json()["next"]
+    import_shoes.import_catalog(app_module.db, write_ndjson(tmp_path / "catalogo.ndjson"), batch_size=3)
+
+    # Os cards da listagem já trazem os tênis importados, sem rebuild manual
+    cards = {card["code"]: card for card in json.loads(client.get("/shoes-with-images").get_data(as_text=True))}
+    assert cards["CODE4"]["images"] == [RECORDS[4]["image_1"], RECORDS[4]["image_2"]]
+
+    delta = client.get("/changes", query_string={"since": cursor}).get_json()
+    imported = {change["collection"] for change in delta["changes"]}
+    assert imported == {"shoes", "images"} and len(delta["changes"]) == 2 * len(RECORDS)
+    assert app_module.db["catalog_snapshot"].count_documents({"dirty": {"$exists": True}}) == len(RECORDS)
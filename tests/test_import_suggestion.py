@@ -0,0 +1,86 @@
+import json
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from imports import import_suggestion
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()["danki-adidas"]
+    db["shoes"].insert_many([{"_id": ObjectId(), "code": f"CODE{index}"} for index in range(5)])
+    return db
+
+
+def shoe_ids(db):
+    return [shoe["_id"] for shoe in db["shoes"].find({}, {"_id": 1})]
+
+
+def write_rows(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_valid_rows_are_upserted_by_shoe_id(tmp_path, db):
+    ids = shoe_ids(db)
+    rows = [{"shoeId": {"$oid": str(ids[0])}, "shoes": [{"$oid": str(ids[1])}, {"$oid": str(ids[2])}]},
+            {"shoeId": {"$oid": str(ids[1])}, "shoes": [{"$oid": str(ids[0])}]}]
+    path = write_rows(tmp_path / "sugestoes.ndjson", rows)
+
+    assert import_suggestion.import_suggestions(db, path)["imported"] == 2
+    assert import_suggestion.import_suggestions(db, path)["imported"] == 2
+
+    assert db["suggestion"].count_documents({}) == 2
+    stored = db["suggestion"].find_one({"shoeId": ids[0]})
+    assert stored["shoes"] == [ids[1], ids[2]]
+
+    # Entradas do snapshot marcadas e uma alteração por sugestão gravada em cada execução
+    assert {entry["_id"] for entry in db["catalog_snapshot"].find({"dirty": {"$exists": True}})} == {ids[0], ids[1]}
+    logged = [entry for entry in db["changes"].find() if entry["collection"] == "suggestion"]
+    assert len(logged) == 4 and {entry["docId"] for entry in logged} == set(db["suggestion"].distinct("_id"))
+
+
+def test_invalid_rows_are_rejected_without_blocking_the_batch(tmp_path, db):
+    ids = shoe_ids(db)
+    unknown = ObjectId()
+    rows = [
+        {"shoeId": {"$oid": str(ids[0])}, "shoes": [{"$oid": str(ids[1])}]},
+        {"shoeId": {"$oid": "não-é-um-id"}, "shoes": []},
+        {"shoeId": {"$oid": str(ids[2])}},
+        {"shoeId": {"$oid": str(ids[3])}, "shoes": [{"$oid": str(unknown)}]},
+    ]
+    rejects = tmp_path / "recusadas.ndjson"
+
+    stats = import_suggestion.import_suggestions(db, write_rows(tmp_path / "sugestoes.ndjson", rows),
+                                                 rejects_path=str(rejects))
+
+    assert (stats["imported"], stats["rejected"]) == (1, 3)
+    rejected = [json.loads(line) for line in rejects.read_text(encoding="utf-8").splitlines()]
+    assert [rejection["line"] for rejection in rejected] == [2, 3, 4]
+    assert "shoes: campo obrigatório ausente" in rejected[1]["reason"]
+    assert str(unknown) in rejected[2]["reason"]
+
+
+def test_existence_check_is_one_query_per_batch(db):
+    ids = shoe_ids(db)
+    rows = [{"shoeId": {"$oid": str(shoe_id)}, "shoes": [{"$oid": str(other)} for other in ids if other != shoe_id]}
+            for shoe_id in ids]
+    finds = []
+    original_find = db["shoes"].find
+
+    class CountingShoes:
+        def find(self, *args, **kwargs):
+            finds.append(args)
+            return original_find(*args, **kwargs)
+
+    class CountingDb:
+        def __getitem__(self, name):
+            return CountingShoes() if name == "shoes" else db[name]
+
+    codec = import_suggestion.compile_schemas(["suggestion"])["suggestion"]
+    imported, rejected = import_suggestion.import_batch(CountingDb(), rows, codec)
+
+    assert (imported, rejected) == (len(ids), [])
+    assert len(finds) == 1
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+pytest.importorskip("pytest_aiohttp")
+
+import kiosk_async  # noqa: E402
+from utils.metrics import REGISTRY  # noqa: E402
+from utils.prefetch import DetailPrefetcher  # noqa: E402
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def kiosk_app(app_module):
+    """Servidor assíncrono sobre o mesmo banco em memória do app Flask."""
+    mongo_client = mongomock_motor.AsyncMongoMockClient(mock_mongo_client=app_module.app.mongo_client)
+    return kiosk_async.create_async_app(mongo_client)
+
+
+async def same_response(flask_client, kiosk_client, url):
+    expected = flask_client.get(url)
+    response = await kiosk_client.get(url)
+    body = await response.text()
+    assert response.status == expected.status_code, url
+    assert json.loads(body) == json.loads(expected.get_data(as_text=True)), url
+    return json.loads(body)
+
+
+async def test_tag_and_detail_bodies_match_the_flask_app(client, catalog, kiosk_app, aiohttp_client):
+    kiosk_client = await aiohttp_client(kiosk_app)
+    tag = catalog["tag"][3]
+    shoe = catalog["shoes"][5]
+
+    urls = [
+        f"/tag-by-address?tagAddress={tag['tagAddress']}",
+        "/tag-by-address?tagAddress=FF:FF:FF:FF:FF:FF",
+        "/tag-by-address",
+        f"/shoe-details?id={shoe['_id']}",
+        f"/shoe-details?code={shoe['code']}",
+        f"/shoe-details?id={shoe['_id']}&fields=code,title,images&imagesLimit=2",
+        f"/shoe-details?id={shoe['_id']}&fields=code&expand=colors,suggestion",
+        f"/shoe-details?model={shoe['model']}&expand=pinterest",
+        "/shoe-details?id=123",
+        "/shoe-details?code=NOPE",
+        f"/shoe-details?id={shoe['_id']}&fields=preco",
+        "/shoe-details",
+    ]
+    bodies = [await same_response(client, kiosk_client, url) for url in urls]
+    assert bodies[0] == {"shoeId": tag["shoeId"]}
+    assert len(bodies[3]["suggestion"]) == 3 and bodies[3]["colors"]
+
+
+async def test_detail_uses_the_prefetched_payloads(client, app_module, catalog, kiosk_app, aiohttp_client):
+    prefetcher = DetailPrefetcher(app_module.db, load_events=lambda: [], top_n=1)
+    prefetcher._ranked = [catalog["shoes"][3]["_id"]]
+    prefetcher.reload()
+    kiosk_app[kiosk_async.PREFETCH_KEY] = prefetcher
+    kiosk_client = await aiohttp_client(kiosk_app)
+
+    hits = REGISTRY.get_sample_value("danki_detail_prefetch_lookups_total", {"outcome": "hit"}) or 0
+    await same_response(client, kiosk_client, f"/shoe-details?id={catalog['shoes'][3]['_id']}&fields=code,images")
+    assert REGISTRY.get_sample_value("danki_detail_prefetch_lookups_total", {"outcome": "hit"}) == hits + 1
+
+
+async def test_detail_links_are_presigned_like_the_flask_app(client, app_module, catalog, kiosk_app, aiohttp_client,
+                                                             monkeypatch):
+    from utils.boto import PresignedUrls
+
+    signer = PresignedUrls("dankiadidas", region="sa-east-1", credentials=("AKIDEXAMPLE", "segredo", None))
+    monkeypatch.setitem(app_module.app.extensions, "presigned_urls", signer)
+    kiosk_app[kiosk_async.PRESIGN_KEY] = signer
+    kiosk_client = await aiohttp_client(kiosk_app)
+
+    detail = await same_response(client, kiosk_client, f"/shoe-details?id={catalog['shoes'][5]['_id']}")
+    assert all("X-Amz-Signature=" in link for link in detail["images"])
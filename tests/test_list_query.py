@@ -0,0 +1,71 @@
+import re
+import unittest
+
+from utils.list_query import CardListQuery, ListQueryError, indexed_params, is_paginated
+
+
+class TestCardListQuery(unittest.TestCase):
+
+    def test_tabulator_parameters(self):
+        args = {
+            "page": "3", "size": "50",
+            "sort[0][field]": "model", "sort[0][dir]": "desc",
+            "filter[0][field]": "code", "filter[0][type]": "starts", "filter[0][value]": "G.X",
+        }
+        query = CardListQuery.from_args(args)
+        self.assertEqual(query.skip, 100)
+        self.assertEqual(query.sort_spec(), [("model", -1), ("_id", 1)])
+        # Prefixo ancorado no código normalizado (codeKey), servido pelo índice
+        self.assertEqual(query.match(), {"codeKey": {"$regex": "^gx"}})
+
+    def test_column_filters_are_indexed_prefixes(self):
+        def match(field, value, filter_type=None):
+            args = {"filter[0][field]": field, "filter[0][value]": value}
+            if filter_type:
+                args["filter[0][type]"] = filter_type
+            return CardListQuery.from_args(args).match()
+
+        # "like" é o padrão do Tabulator: nenhum tipo vira um regex sem âncora
+        self.assertEqual(match("code", "gx-12"), {"codeKey": {"$regex": "^gx12"}})
+        self.assertEqual(match("model", "Ultra Bo"),
+                         {"$and": [{"searchKeys": {"$regex": "^ultra"}}, {"searchKeys": {"$regex": "^bo"}}]})
+        self.assertEqual(match("model", "Ultra  Bo", "starts"), {"modelKey": {"$regex": "^ultra\\ bo"}})
+        self.assertEqual(match("tag", "aa:b"), {"tag.tagAddress": {"$in": [re.compile("^aa:b"), re.compile("^AA:B")]}})
+        self.assertEqual(match("code", "GX-1234", "="), {"code": "GX-1234"})
+        # Valor só com separadores: não há prefixo para filtrar
+        self.assertEqual(match("code", "--"), {})
+
+    def test_base_query_and_search_are_combined(self):
+        query = CardListQuery.from_args({"page": "1", "q": "Têni sam"})
+        match = query.match({"tagCount": {"$gt": 0}})
+        self.assertEqual(match["$and"][0], {"tagCount": {"$gt": 0}})
+        # Prefixos ancorados e sensíveis a maiúsculas: intervalos nos índices, sem "contém"
+        words, tag = match["$and"][1]["$or"]
+        self.assertEqual(words, {"$and": [{"searchKeys": {"$regex": "^teni"}}, {"searchKeys": {"$regex": "^sam"}}]})
+        self.assertEqual([pattern.pattern for pattern in tag["tag.tagAddress"]["$in"]], ["^Têni\\ sam", "^TÊNI\\ SAM"])
+
+        address = CardListQuery.from_args({"q": "AA:BB"}).match()
+        self.assertEqual(address["$or"][1], {"tag.tagAddress": {"$regex": "^AA:BB"}})
+        self.assertEqual(CardListQuery.from_args({"q": ":"}).match(), {"tag.tagAddress": {"$regex": "^:"}})
+
+    def test_size_is_capped_and_last_page_counts_partial_pages(self):
+        query = CardListQuery.from_args({"size": "1000"})
+        self.assertEqual(query.size, 100)
+        self.assertEqual(query.last_page(201), 3)
+        self.assertEqual(query.last_page(0), 1)
+
+    def test_invalid_parameters(self):
+        for args in ({"page": "0"}, {"size": "abc"}, {"sort[0][field]": "images"},
+                     {"filter[0][field]": "code", "filter[0][type]": "regex", "filter[0][value]": "x"}):
+            with self.assertRaises(ListQueryError):
+                CardListQuery.from_args(args)
+
+    def test_indexed_params_and_mode(self):
+        args = {"sort[1][field]": "code", "sort[0][field]": "model", "sort[0][dir]": "asc"}
+        self.assertEqual(indexed_params(args, "sort"), [{"field": "model", "dir": "asc"}, {"field": "code"}])
+        self.assertFalse(is_paginated({"hasTag": "true"}))
+        self.assertTrue(is_paginated({"size": "20"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from itertools import count
+from types import SimpleNamespace
+
+from flask import Flask, jsonify
+
+from utils import metrics
+
+_request_ids = count(1)
+
+
+def run_command(listener, name, command, reply, micros=1500):
+    """Simula o ciclo started/succeeded de um comando do pymongo."""
+    request_id = next(_request_ids)
+    listener.started(SimpleNamespace(request_id=request_id, command_name=name, command=command))
+    listener.succeeded(SimpleNamespace(request_id=request_id, command_name=name, reply=reply, duration_micros=micros))
+
+
+def sample(name, labels):
+    return metrics.REGISTRY.get_sample_value(name, labels)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = metrics.MongoCommandMetrics()
+        app = Flask(__name__)
+        metrics.init_metrics(app)
+
+        @app.route('/items/<item_id>')
+        def item(item_id):
+            run_command(self.listener, "find", {"find": "shoes", "filter": {}},
+                        {"cursor": {"firstBatch": [{}, {}, {}]}})
+            for _ in range(4):
+                run_command(self.listener, "find", {"find": "images", "filter": {}}, {"cursor": {"firstBatch": [{}]}})
+            return jsonify({"id": item_id})
+
+        self.client = app.test_client()
+
+    def test_request_latency_and_round_trips_by_endpoint(self):
+        before = sample("danki_http_request_duration_seconds_count",
+                        {"endpoint": "/items/<item_id>", "method": "GET", "status": "200"}) or 0
+
+        self.assertEqual(self.client.get('/items/1').status_code, 200)
+
+        self.assertEqual(sample("danki_http_request_duration_seconds_count",
+                                {"endpoint": "/items/<item_id>", "method": "GET", "status": "200"}), before + 1)
+        self.assertGreaterEqual(sample("danki_http_request_mongo_round_trips_sum", {"endpoint": "/items/<item_id>"}), 5)
+
+    def test_commands_are_linked_to_the_issuing_endpoint(self):
+        labels = {"command": "find", "collection": "images", "endpoint": "/items/<item_id>"}
+        before = sample("danki_mongo_docs_returned_total", labels) or 0
+
+        self.client.get('/items/2')
+
+        self.assertEqual(sample("danki_mongo_docs_returned_total", labels), before + 4)
+        self.assertIsNotNone(sample("danki_mongo_command_duration_seconds_count", labels))
+
+    def test_commands_outside_requests_use_placeholder_endpoint(self):
+        run_command(self.listener, "getMore", {"getMore": 1, "collection": "tag"}, {"cursor": {"nextBatch": [{}]}})
+        labels = {"command": "getMore", "collection": "tag", "endpoint": metrics.NO_REQUEST}
+        self.assertGreaterEqual(sample("danki_mongo_docs_returned_total", labels), 1)
+
+    def test_metrics_endpoint_uses_prometheus_text_format(self):
+        self.client.get('/items/3')
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        body = response.get_data(as_text=True)
+        self.assertIn("# TYPE danki_http_request_duration_seconds histogram", body)
+        self.assertIn('danki_mongo_command_duration_seconds_bucket{collection="shoes"', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from utils.pinterest_boards import BoardCatalog, fetch_boards, filter_boards
+
+BOARDS = [
+    {"id": "1", "name": "Tênis Corrida", "image_cover_url": "https://img/1.jpg"},
+    {"id": "2", "name": "ULTRABOOST lançamentos", "image_cover_url": ""},
+    {"id": "3", "name": "Casual", "image_cover_url": ""},
+]
+
+
+def test_fetch_follows_bookmarks():
+    pages = [
+        {"items": [{"id": "1", "name": "A", "media": {"image_cover_url": "x"}}], "bookmark": "b1"},
+        {"items": [{"id": "2", "name": "B"}], "bookmark": None},
+    ]
+    responses = [MagicMock(json=MagicMock(return_value=page)) for page in pages]
+    with patch("requests.get", side_effect=responses) as get:
+        boards = fetch_boards(token="t")
+    assert [board["id"] for board in boards] == ["1", "2"]
+    assert boards[1]["image_cover_url"] == ""
+    assert get.call_args_list[1].kwargs["params"]["bookmark"] == "b1"
+
+
+def test_filter_by_name_without_accents_or_by_id():
+    assert [board["id"] for board in filter_boards(BOARDS, "tenis")] == ["1"]
+    assert [board["id"] for board in filter_boards(BOARDS, "lanca ultra")] == ["2"]
+    assert [board["id"] for board in filter_boards(BOARDS, "3")] == ["3"]
+    assert len(filter_boards(BOARDS, "")) == 3
+
+
+def test_stale_list_served_while_refreshing_in_background(app_module):
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(5)
+            return BOARDS
+        return BOARDS[:1]
+
+    catalog = BoardCatalog(app_module.db, fetch=fetch, ttl=0)
+    assert catalog.boards()[0] == BOARDS[:1]
+
+    # TTL vencido: devolve a lista antiga na hora e busca a nova em segundo plano, uma vez só
+    boards, _, stale = catalog.boards()
+    assert boards == BOARDS[:1] and stale
+    catalog.boards()
+    release.set()
+    for _ in range(100):
+        if catalog._boards == BOARDS:
+            break
+        threading.Event().wait(0.01)
+    assert len(calls) == 2 and catalog._boards == BOARDS
+
+    # Outro worker começa com a lista gravada no banco, sem chamar o Pinterest
+    other = BoardCatalog(app_module.db, fetch=lambda: 1 / 0, ttl=3600)
+    assert other.boards()[0] == BOARDS
+
+
+def test_route_filters_and_limits(client, app_module):
+    app_module.app.extensions["pinterest_boards"] = BoardCatalog(app_module.db, fetch=lambda: BOARDS, ttl=3600)
+    try:
+        data = client.get("/pinterest/boards?q=a&limit=1").get_json()
+        assert data["total"] == 3 and len(data["items"]) == 1 and data["stale"] is False
+        assert client.get("/pinterest/boards?q=casual").get_json()["items"][0]["id"] == "3"
+        assert client.get("/pinterest/boards?limit=0").status_code == 400
+    finally:
+        del app_module.app.extensions["pinterest_boards"]
+
+
+def test_failed_refresh_backs_off_before_retrying(app_module):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            return BOARDS
+        raise RuntimeError("Pinterest fora do ar")
+
+    catalog = BoardCatalog(app_module.db, fetch=fetch, ttl=3600)
+    catalog.boards()
+    catalog._fetched_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def wait_refresh():
+        for _ in range(100):
+            if not catalog._refreshing.locked():
+                return
+            threading.Event().wait(0.01)
+
+    # A falha é registrada: as próximas requisições não chamam o Pinterest de novo
+    catalog.boards()
+    wait_refresh()
+    for _ in range(5):
+        assert catalog.boards()[0] == BOARDS
+    assert len(calls) == 2
+    assert 25 < (catalog._retry_at - datetime.now(timezone.utc)).total_seconds() <= 30
+
+    # Passado o intervalo, uma nova tentativa; outra falha dobra a espera
+    catalog._retry_at = datetime.now(timezone.utc)
+    catalog.boards()
+    wait_refresh()
+    assert len(calls) == 3
+    assert catalog._failures == 2
+    assert 55 < (catalog._retry_at - datetime.now(timezone.utc)).total_seconds() <= 60
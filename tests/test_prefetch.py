@@ -0,0 +1,65 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.metrics import REGISTRY
+from utils.prefetch import DetailPrefetcher, rank_shoes
+
+NOW = datetime(2025, 4, 6, 12, 0)
+
+
+def events(*codes, start=NOW):
+    return [{"mac": "6C:FD:22:76:00:01", "start": start, "code": code} for code in codes]
+
+
+def lookups(outcome):
+    return REGISTRY.get_sample_value("danki_detail_prefetch_lookups_total", {"outcome": outcome}) or 0
+
+
+@pytest.fixture
+def prefetcher(app_module, catalog):
+    codes = [shoe["code"] for shoe in catalog["shoes"]]
+    feed = events(codes[3], codes[3], codes[5], "NAO-EXISTE")
+    prefetcher = DetailPrefetcher(app_module.db, load_events=lambda: feed, top_n=2)
+    prefetcher.refresh()
+    app_module.app.extensions["detail_prefetch"] = prefetcher
+    yield prefetcher
+    del app_module.app.extensions["detail_prefetch"]
+
+
+def test_rank_by_recent_scans(app_module, catalog):
+    codes = [shoe["code"] for shoe in catalog["shoes"]]
+    # Leituras antigas (fora da janela) não contam; códigos fora do catálogo são ignorados
+    feed = events(codes[1], codes[2], codes[2], "NAO-EXISTE") + events(*[codes[0]] * 5, start=NOW - timedelta(days=30))
+    assert rank_shoes(app_module.db, feed, top_n=5) == [catalog["shoes"][2]["_id"], catalog["shoes"][1]["_id"]]
+    assert rank_shoes(app_module.db, feed, top_n=1) == [catalog["shoes"][2]["_id"]]
+    assert rank_shoes(app_module.db, []) == []
+
+
+def test_prefetched_details_match_the_queried_ones(client, app_module, catalog, prefetcher):
+    shoe_id = str(catalog["shoes"][3]["_id"])
+    urls = [f"/shoe-details?id={shoe_id}", f"/shoe-details?id={shoe_id}&fields=title,code,images&imagesLimit=3",
+            f"/shoe-details?id={shoe_id}&expand=colors"]
+    hits = lookups("hit")
+    cached = [json.loads(client.get(url).get_data(as_text=True)) for url in urls]
+    assert lookups("hit") == hits + len(urls)
+
+    del app_module.app.extensions["detail_prefetch"]
+    try:
+        assert cached == [json.loads(client.get(url).get_data(as_text=True)) for url in urls]
+    finally:
+        app_module.app.extensions["detail_prefetch"] = prefetcher
+
+
+def test_write_invalidates_until_reloaded(client, catalog, prefetcher):
+    shoe_id = str(catalog["shoes"][3]["_id"])
+    client.put(f"/shoes/{shoe_id}", json={"title": "EDITADO"})
+
+    # O cache é ignorado assim que o change log avança, e remontado em segundo plano
+    stale = lookups("stale")
+    assert json.loads(client.get(f"/shoe-details?id={shoe_id}").get_data(as_text=True))["title"] == "EDITADO"
+    assert lookups("stale") == stale + 1
+    with prefetcher._refreshing:
+        pass
+    assert prefetcher.get(shoe_id)["title"] == "EDITADO"
@@ -0,0 +1,145 @@
+import json
+from datetime import datetime, timezone
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from utils.boto import PresignedUrls, unsigned_url
+
+BUCKET = "dankiadidas"
+SIGNED_AT = datetime(2026, 10, 19, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def presigner(clock=None, token=None, **kwargs):
+    return PresignedUrls(BUCKET, region="sa-east-1", credentials=("AKIDEXAMPLE", "segredo", token),
+                         clock=clock or Clock(SIGNED_AT.timestamp()), **kwargs)
+
+
+@pytest.mark.parametrize("region,token", [("sa-east-1", None), ("sa-east-1", "TOKEN/TEMP+="), ("eu-west-1", None)])
+def test_signature_matches_botocore(region, token):
+    boto3 = pytest.importorskip("boto3")
+    from botocore.config import Config
+
+    # Endpoint regional com virtual-hosted: o mesmo host que o PresignedUrls assina
+    s3 = boto3.client("s3", region_name=region, aws_access_key_id="AKIDEXAMPLE",
+                      aws_secret_access_key="segredo", aws_session_token=token,
+                      endpoint_url=f"https://s3.{region}.amazonaws.com",
+                      config=Config(signature_version="s3v4", s3={"addressing_style": "virtual"}))
+    # Período de 1 h sem margem: X-Amz-Date é o próprio SIGNED_AT
+    signer = PresignedUrls(BUCKET, region=region, credentials=("AKIDEXAMPLE", "segredo", token),
+                           expires_in=3600, margin=0, clock=Clock(SIGNED_AT.timestamp()))
+    for key in ["SAMBA OG/1.png", "ç+~/a(1)!.png"]:
+        with mock.patch("botocore.auth.get_current_datetime", return_value=SIGNED_AT.replace(tzinfo=None)):
+            expected = s3.generate_presigned_url("get_object", Params={"Bucket": BUCKET, "Key": key}, ExpiresIn=3600)
+        assert parse_qs(urlsplit(signer.url(key)).query) == parse_qs(urlsplit(expected).query)
+        assert signer.url(key).split("?")[0] == expected.split("?")[0]
+        assert urlsplit(expected).netloc == f"{BUCKET}.s3.{region}.amazonaws.com"
+
+
+def test_urls_are_stable_within_a_period_and_keep_the_margin():
+    clock = Clock(SIGNED_AT.timestamp())
+    signer = presigner(clock, expires_in=3600, margin=600)
+    first = signer.url("a/1.png")
+    epoch = signer.epoch()
+
+    # Até o fim do período (50 min) a mesma URL, que ainda vale pelo menos a margem
+    clock.now += 2999 - clock.now % 3000
+    assert signer.url("a/1.png") == first and signer.epoch() == epoch
+    query = parse_qs(urlsplit(first).query)
+    signed_at = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    assert signed_at.timestamp() + int(query["X-Amz-Expires"][0]) - clock.now >= 600
+
+    clock.now += 1
+    assert signer.epoch() == epoch + 1 and signer.url("a/1.png") != first
+
+    with pytest.raises(ValueError):
+        presigner(expires_in=600, margin=600)
+
+
+def test_sign_links_batches_bucket_links_only():
+    signer = presigner(max_size=2)
+    links = [f"https://{BUCKET}.s3.amazonaws.com/SAMBA%20OG/1.png", "https://i.pinimg.com/x.jpg",
+             f"https://{BUCKET}.s3.amazonaws.com/SAMBA OG/1.png", None]
+    signed = signer.sign_links(links)
+    assert signed[0] == signed[2] == signer.url("SAMBA OG/1.png")
+    assert signed[1] == links[1] and signed[3] is None
+    assert signed[0].startswith(f"https://{BUCKET}.s3.sa-east-1.amazonaws.com/SAMBA%20OG/1.png?")
+    assert unsigned_url(signed[0]) == f"https://{BUCKET}.s3.amazonaws.com/SAMBA%20OG/1.png"
+    assert unsigned_url(links[1]) == links[1]
+
+    # Cache limitado: as menos usadas saem
+    signer.urls(["b.png", "c.png"])
+    assert list(signer._urls) == ["b.png", "c.png"]
+
+
+def test_routes_serve_presigned_links_and_store_them_unsigned(client, catalog, app_module, monkeypatch):
+    clock = Clock(SIGNED_AT.timestamp())
+    signer = presigner(clock)
+    monkeypatch.setitem(app_module.app.extensions, "presigned_urls", signer)
+    shoe = catalog["shoes"][5]
+
+    listed = client.get("/shoes-with-images")
+    card = next(card for card in json.loads(listed.get_data(as_text=True)) if card["code"] == shoe["code"])
+    assert card["images"] == signer.sign_links(catalog["images"][5]["links"])
+    assert "X-Amz-Signature=" in card["images"][0]
+
+    details = json.loads(client.get(f"/shoe-details?id={shoe['_id']}").get_data(as_text=True))
+    assert details["images"] == card["images"]
+    assert all("X-Amz-Signature=" in color["image"] for color in details["colors"])
+
+    # Na virada do período o ETag muda: o cliente não reaproveita URLs prestes a expirar
+    etag = listed.headers["ETag"]
+    assert client.get("/shoes-with-images", headers={"If-None-Match": etag}).status_code == 304
+    clock.now += signer.period
+    assert client.get("/shoes-with-images", headers={"If-None-Match": etag}).status_code == 200
+
+    # O admin devolve as URLs assinadas que recebeu; o banco continua com os links originais
+    payload = {"_id": str(shoe["_id"]), "code": shoe["code"], "model": shoe["model"], "title": "NOVO",
+               "description": shoe["description"], "pinterestId": shoe["pinterestId"],
+               "colors": [{"shoeId": str(color)} for color in shoe["colors"]], "images": details["images"]}
+    assert client.put("/update-shoe-full", json=payload).status_code == 200
+    assert app_module.db.images.find_one({"shoeId": shoe["_id"]})["links"] == catalog["images"][5]["links"]
+
+
+def test_tag_resolve_and_snapshot_serve_presigned_links(client, catalog, app_module, monkeypatch):
+    import gzip
+
+    from utils.snapshot import CatalogSnapshot
+
+    clock = Clock(SIGNED_AT.timestamp())
+    signer = presigner(clock)
+    monkeypatch.setitem(app_module.app.extensions, "presigned_urls", signer)
+    shoe, tag = catalog["shoes"][5], catalog["tag"][5]
+    signed = signer.sign_links(catalog["images"][5]["links"])
+
+    resolved = client.post("/tags/resolve", json={"tagAddresses": [tag["tagAddress"]], "cards": True}).get_json()
+    card = resolved["shoes"][resolved["tags"][tag["tagAddress"]]]
+    assert card["images"] == signed[:len(card["images"])]
+
+    snapshot = CatalogSnapshot(app_module.db, check_interval=3600, presigner=signer, clock=clock)
+    monkeypatch.setitem(app_module.app.extensions, "catalog_snapshot", snapshot)
+    snapshot.update()
+    response = client.get("/catalog/snapshot", headers={"Accept-Encoding": "gzip"})
+    entry = json.loads(gzip.decompress(response.get_data()))["shoes"][str(shoe["_id"])]
+    assert entry["images"] == signed
+    assert all("X-Amz-Signature=" in color["image"] for color in entry["colors"])
+    # As entradas gravadas continuam com os links originais
+    stored = app_module.db["catalog_snapshot"].find_one({"_id": shoe["_id"]})["fragment"]
+    assert "X-Amz-Signature" not in stored
+
+    # Na virada do período o snapshot é remontado com URLs novas e outro ETag
+    etag = response.headers["ETag"]
+    clock.now += signer.period
+    snapshot.update()
+    renewed = client.get("/catalog/snapshot", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert renewed.status_code == 200
+    assert json.loads(gzip.decompress(renewed.get_data()))["shoes"][str(shoe["_id"])]["images"] != signed
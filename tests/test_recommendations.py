@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from imports.recommendations import CO_OCCURRENCE_COLLECTION, SOURCE, closed_sessions, update_recommendations
+from utils.datalog import parse_event
+
+START = datetime(2025, 4, 5, 10, 0)
+
+
+def event(mac, minutes, code):
+    return {"mac": mac, "start": START + timedelta(minutes=minutes), "code": code}
+
+
+def test_parse_event_reads_additional():
+    item = {"additional": "6C:FD:22:76:00:01,2025-04-05T10:00:00Z,2025-04-05T10:00:20Z,00:00:20,B75806,SAMBA OG"}
+    assert parse_event(item) == {"mac": "6C:FD:22:76:00:01", "start": datetime(2025, 4, 5, 10, 0), "code": "B75806"}
+    assert parse_event({"additional": "incompleto"}) is None
+
+
+def test_open_sessions_wait_for_the_next_run():
+    events = [event("A", 0, "x"), event("A", 5, "y"), event("A", 60, "z"), event("B", 70, "w")]
+    sessions, watermarks = closed_sessions(events, {})
+    # A sessão que termina em "z" e a de B ainda podem receber eventos
+    assert sessions == [["x", "y"]]
+    assert watermarks == {"A": START + timedelta(minutes=5)}
+
+    sessions, _ = closed_sessions(events + [event("B", 200, "v")], watermarks)
+    assert sorted(sessions) == [["w"], ["z"]]
+
+
+def test_co_interactions_fill_suggestions_incrementally(app_module, catalog):
+    db = app_module.db
+    codes = [shoe["code"] for shoe in catalog["shoes"]]
+    ids = {shoe["code"]: shoe["_id"] for shoe in catalog["shoes"]}
+    # O catálogo sintético tem sugestões curadas para todos; só a do tênis 0 fica, e deve ser preservada
+    db["suggestion"].delete_many({"shoeId": {"$ne": ids[codes[0]]}})
+    manual = db["suggestion"].find_one({"shoeId": ids[codes[0]]})
+
+    events = [
+        event("A", 0, codes[0]), event("A", 1, codes[1]), event("A", 2, codes[2]),
+        event("B", 0, codes[1]), event("B", 1, codes[2]),
+        event("C", 0, codes[1]), event("C", 1, codes[3]),
+        event("D", 300, "DESCONHECIDO"),
+    ]
+    stats = update_recommendations(db, events, top_k=2)
+    assert stats["sessions"] == 3
+    assert stats["unknownCodes"] == []
+
+    generated = db["suggestion"].find_one({"shoeId": ids[codes[1]]})
+    assert generated["source"] == SOURCE
+    # 1 e 2 aparecem juntos em 2 das 3 sessões de 1: o vizinho mais forte
+    assert generated["shoes"][0] == ids[codes[2]]
+    assert generated["scores"] == sorted(generated["scores"], reverse=True)
+    assert db["suggestion"].find_one({"shoeId": ids[codes[0]]})["shoes"] == manual["shoes"]
+
+    # Reexecutar com o mesmo feed não conta nada de novo
+    counts = db[CO_OCCURRENCE_COLLECTION].find_one({"_id": ids[codes[1]]})
+    assert update_recommendations(db, events, top_k=2)["sessions"] == 0
+    assert db[CO_OCCURRENCE_COLLECTION].find_one({"_id": ids[codes[1]]}) == counts
+
+    # Eventos novos: 3 passa a co-ocorrer mais com 1 e assume o primeiro lugar
+    later = events + [event("E", 400, codes[1]), event("E", 401, codes[3]),
+                      event("F", 400, codes[1]), event("F", 401, codes[3]), event("G", 600, codes[5])]
+    assert update_recommendations(db, later, top_k=2)["sessions"] == 2
+    assert db["suggestion"].find_one({"shoeId": ids[codes[1]]})["shoes"][0] == ids[codes[3]]
+    assert db[CO_OCCURRENCE_COLLECTION].find_one({"_id": ids[codes[1]]})["n"] == 5
+
+
+def test_hand_edited_suggestions_are_kept(client, app_module, catalog):
+    db = app_module.db
+    codes = [shoe["code"] for shoe in catalog["shoes"]]
+    ids = {shoe["code"]: shoe["_id"] for shoe in catalog["shoes"]}
+    db["suggestion"].delete_many({})
+    events = [event("A", 0, codes[0]), event("A", 1, codes[1]), event("A", 2, codes[2]),
+              event("B", 0, codes[1]), event("B", 1, codes[2]), event("C", 300, codes[5])]
+    update_recommendations(db, events, top_k=2)
+
+    # Edição pelo CRUD genérico e pelo formulário de detalhe do admin
+    generic = db["suggestion"].find_one({"shoeId": ids[codes[1]]})
+    edited = [{"$oid": str(ids[codes[7]])}]
+    assert client.put(f"/suggestion/{generic['_id']}", json={"shoes": edited}).status_code == 200
+    shoe = catalog["shoes"][2]
+    payload = {"_id": str(shoe["_id"]), "code": shoe["code"], "model": shoe["model"], "title": shoe["title"],
+               "description": shoe["description"], "pinterestId": shoe["pinterestId"],
+               "colors": [{"shoeId": str(color)} for color in shoe["colors"]],
+               "suggestion": [{"shoeId": str(ids[codes[8]])}]}
+    assert client.put("/update-shoe-full", json=payload).status_code == 200
+
+    for shoe_id in (ids[codes[1]], ids[codes[2]]):
+        stored = db["suggestion"].find_one({"shoeId": shoe_id})
+        assert "source" not in stored and "scores" not in stored
+
+    # Mesmo recalculando tudo, as listas curadas à mão ficam
+    update_recommendations(db, events, top_k=2, full=True)
+    assert db["suggestion"].find_one({"shoeId": ids[codes[1]]})["shoes"] == [ids[codes[7]]]
+    assert db["suggestion"].find_one({"shoeId": ids[codes[2]]})["shoes"] == [ids[codes[8]]]
+    assert db["suggestion"].find_one({"shoeId": ids[codes[0]]})["source"] == SOURCE
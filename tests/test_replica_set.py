@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+
+from database import run_in_transaction, transactions_supported
+
+# Rode com um replica set local de um nó, por exemplo:
+#   mongod --replSet rs0 --dbpath /tmp/rs0 --port 27018 &
+#   mongosh --port 27018 --eval 'rs.initiate()'
+#   MONGO_REPLICA_SET_URI=mongodb://localhost:27018/?replicaSet=rs0 python -m pytest tests/test_replica_set.py
+REPLICA_SET_URI = os.getenv("MONGO_REPLICA_SET_URI")
+
+pytestmark = pytest.mark.skipif(not REPLICA_SET_URI, reason="MONGO_REPLICA_SET_URI não definido")
+
+
+@pytest.fixture
+def replica_db():
+    client = MongoClient(REPLICA_SET_URI)
+    db = client["danki-adidas-test"]
+    for name in ("shoes", "images", "suggestion", "shoe_cards"):
+        db.drop_collection(name)
+        db.create_collection(name)  # coleções não podem ser criadas dentro da transação no MongoDB < 4.4
+    yield db
+    client.drop_database("danki-adidas-test")
+    client.close()
+
+
+def test_failed_transaction_leaves_no_partial_writes(replica_db):
+    assert transactions_supported(replica_db.client)
+    shoe_id = replica_db.shoes.insert_one({"code": "RS1", "model": "M", "title": "T", "description": "D"}).inserted_id
+
+    def write(session):
+        replica_db.images.insert_one({"shoeId": shoe_id, "links": ["x"]}, session=session)
+        raise RuntimeError("falha no meio")
+
+    with pytest.raises(RuntimeError):
+        run_in_transaction(replica_db.client, write)
+    assert replica_db.images.count_documents({"shoeId": shoe_id}) == 0
+
+
+def test_update_shoe_full_in_transaction(replica_db, app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "db", replica_db)
+    monkeypatch.setattr(app_module.app, "mongo_client", replica_db.client)
+    shoe = {"_id": ObjectId(), "code": "RS2", "model": "M", "title": "T", "description": "D", "pinterestId": "1",
+            "colors": []}
+    replica_db.shoes.insert_one(dict(shoe))
+    payload = {**shoe, "_id": str(shoe["_id"]), "images": ["https://exemplo/1.png"], "version": 0}
+
+    assert client.put("/update-shoe-full", json=payload).get_json()["version"] == 1
+    assert client.put("/update-shoe-full", json=dict(payload, title="Outro")).status_code == 409
+    assert replica_db.images.find_one({"shoeId": shoe["_id"]})["links"] == ["https://exemplo/1.png"]
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from utils.boto import key_from_url  # noqa: E402
+from utils.s3_inventory import INVENTORY_COLLECTION, iter_objects, reconcile  # noqa: E402
+
+BUCKET = "danki-teste"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    import boto3
+
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "teste")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_key_from_url_formats():
+    assert key_from_url(f"https://{BUCKET}.s3.amazonaws.com/SAMBA OG/1.png", BUCKET) == "SAMBA OG/1.png"
+    assert key_from_url(f"https://{BUCKET}.s3.sa-east-1.amazonaws.com/a/1.png", BUCKET) == "a/1.png"
+    assert key_from_url(f"https://s3.sa-east-1.amazonaws.com/{BUCKET}/a/1.png", BUCKET) == "a/1.png"
+    assert key_from_url("https://outro.s3.amazonaws.com/a/1.png", BUCKET) is None
+    assert key_from_url("https://i.pinimg.com/a/1.png", BUCKET) is None
+
+
+def test_reconcile_lists_every_page_and_deletes_only_old_orphans(s3, app_module):
+    db = app_module.db
+    keys = [f"tenis/{index:05d}.png" for index in range(1100)]
+    for key in keys:
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+    s3.put_object(Bucket=BUCKET, Key="tenis/SAMBA OG.png", Body=b"x")
+    s3.put_object(Bucket=BUCKET, Key="outros/fora-do-prefixo.png", Body=b"x")
+
+    # Citadas em images e pinterest, uma delas com a chave codificada na URL
+    db["images"].insert_one({"shoeId": 1, "links": [f"https://{BUCKET}.s3.amazonaws.com/{keys[0]}",
+                                                    f"https://{BUCKET}.s3.amazonaws.com/tenis/SAMBA%20OG.png"]})
+    db["pinterest"].insert_one({"shoeId": 1, "links": [f"https://{BUCKET}.s3.sa-east-1.amazonaws.com/{keys[1050]}"]})
+    assert len(list(iter_objects(s3, BUCKET, "tenis/"))) == 1101
+
+    # Tudo recém-enviado: nada é órfão ainda
+    report = reconcile(db, s3, BUCKET, "tenis/", delete=True)
+    assert report["objects"] == 1101 and report["orphans"] == 0 and report["recent"] == 1098
+
+    later = datetime.now(timezone.utc) + timedelta(days=2)
+    report = reconcile(db, s3, BUCKET, "tenis/", delete=True, now=later)
+    assert report["orphans"] == report["deleted"] == 1098 and report["errors"] == []
+    remaining = {item["key"] for item in iter_objects(s3, BUCKET)}
+    assert remaining == {keys[0], keys[1050], "tenis/SAMBA OG.png", "outros/fora-do-prefixo.png"}
+    assert db[INVENTORY_COLLECTION].count_documents({"bucket": BUCKET}) == 3
+
+    # A varredura seguinte substitui a anterior: objeto apagado por fora sai do inventário
+    s3.delete_object(Bucket=BUCKET, Key=keys[0])
+    assert reconcile(db, s3, BUCKET, "tenis/", now=later)["objects"] == 2
+    assert db[INVENTORY_COLLECTION].count_documents({}) == 2
@@ -0,0 +1,59 @@
+import unittest
+
+from bson import ObjectId
+
+from utils.schema import CompiledSchema, load_collection_schema
+
+
+class TestCompiledSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.suggestion = CompiledSchema(load_collection_schema("suggestion"))
+        self.shoes = CompiledSchema(load_collection_schema("shoes"))
+
+    def test_valid_documents(self):
+        self.assertEqual(self.suggestion.validate({"shoeId": ObjectId(), "shoes": [ObjectId(), ObjectId()]}), [])
+        shoe = {"model": "SAMBA OG", "title": "TÊNIS", "description": "...", "code": "B75806", "pinterestId": "1"}
+        self.assertEqual(self.shoes.validate(shoe), [])
+
+    def test_required_and_types_are_reported_with_paths(self):
+        errors = self.suggestion.validate({"shoes": [ObjectId(), "67bfa89b275ac7882c8efd5c"]})
+        self.assertIn("shoeId: campo obrigatório ausente", errors)
+        self.assertIn("shoes[1]: esperado objectId, recebido str", errors)
+
+    def test_bool_is_not_a_number(self):
+        compiled = CompiledSchema({"bsonType": "object", "properties": {"count": {"bsonType": "int"}}})
+        self.assertEqual(compiled.validate({"count": 3}), [])
+        self.assertEqual(len(compiled.validate({"count": True})), 1)
+
+    def test_every_keyword_is_reported(self):
+        schema = {"bsonType": "object", "required": ["a"], "additionalProperties": False, "properties": {
+            "a": {"bsonType": ["int", "null"]}, "b": {"bsonType": "array", "maxItems": 1, "items": {"enum": ["x"]}},
+            "c": {"bsonType": "string", "minLength": 2}}}
+        compiled = CompiledSchema(schema)
+        expected = [
+            ({"a": 1}, []),
+            ({"a": None, "b": ["x"]}, []),
+            ({"a": True, "b": ["y", "x"], "c": "z", "d": 1},
+             ["a: esperado ['int', 'null'], recebido bool", "b: máximo de 1 itens", "b[0]: valor fora de ['x']",
+              "c: mínimo de 2 caracteres", "d: campo não permitido"]),
+            ({"b": []}, ["a: campo obrigatório ausente"]),
+            ([], ["documento: esperado object, recebido list"]),
+            ({"_id": ObjectId(), "a": 2.5}, ["a: esperado ['int', 'null'], recebido float"]),
+        ]
+        for document, errors in expected:
+            self.assertEqual(compiled.validate(document), errors)
+        self.assertEqual(compiled.validate({"c": "zz"}, partial=True), [])
+
+    def test_converts_only_declared_object_ids(self):
+        compiled = CompiledSchema(load_collection_schema("suggestion"))
+        oid = ObjectId()
+        document = compiled.convert({"_id": {"$oid": str(oid)}, "shoeId": {"$oid": str(oid)},
+                                     "shoes": [{"$oid": str(oid)}], "source": {"$oid": str(oid)}})
+        self.assertEqual(document, {"_id": oid, "shoeId": oid, "shoes": [oid], "source": {"$oid": str(oid)}})
+        with self.assertRaises(ValueError):
+            compiled.convert({"shoeId": {"$oid": "123"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+import mongomock
+
+import utils.search as search_module
+from utils.search import code_key, keyword_query, model_key, normalize, search, search_filter, search_keys, terms
+
+
+class TestSearchKeys(unittest.TestCase):
+
+    def test_normalize_strips_accents_and_case(self):
+        self.assertEqual(normalize("TÊNIS Ação Coração"), "tenis acao coracao")
+        self.assertEqual(terms("Samba-OG  samba"), ["samba", "og"])
+
+    def test_keys_cover_model_code_and_title(self):
+        keys = search_keys({"model": "SAMBA OG", "code": "GX-1234", "title": "TÊNIS SAMBA EDIÇÃO"})
+        self.assertEqual(keys, ["1234", "edicao", "gx", "gx1234", "og", "samba", "tenis"])
+
+    def test_filter_anchors_every_term(self):
+        self.assertEqual(search_filter("Têni"), {"searchKeys": {"$regex": "^teni"}})
+        self.assertEqual(search_filter("samba og")["$and"][1], {"searchKeys": {"$regex": "^og"}})
+        self.assertIsNone(search_filter(" - "))
+        self.assertIsNone(search_filter(None))
+
+
+class TestRankedSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.cards = mongomock.MongoClient()["danki-adidas"]["shoe_cards"]
+        shoes = [
+            {"code": "ZZ-9", "model": "NADA", "title": "TÊNIS NADA"},
+            {"code": "AA-2", "model": "SAMBA", "title": "TÊNIS GX12"},
+            {"code": "GX-1234", "model": "GX12 BOOST", "title": "TÊNIS GX12"},
+            {"code": "AB-1", "model": "GX12 RUNNER", "title": "TÊNIS"},
+            {"code": "GX12", "model": "ULTRA", "title": "TÊNIS"},
+        ]
+        self.cards.insert_many([dict(shoe, searchKeys=search_keys(shoe), codeKey=code_key(shoe["code"]),
+                                     modelKey=model_key(shoe["model"])) for shoe in shoes])
+
+    def codes(self, text, limit=10):
+        return [card["code"] for card in search(self.cards, text, limit, {"code": 1})]
+
+    def test_exact_code_then_code_prefix_then_model_prefix_then_other_matches(self):
+        self.assertEqual(self.codes("gx12"), ["GX12", "GX-1234", "AB-1", "AA-2"])
+        self.assertEqual(self.codes("GX-12", limit=2), ["GX12", "GX-1234"])
+        self.assertEqual(self.codes("tenis"), ["AA-2", "AB-1", "GX-1234", "GX12", "ZZ-9"])
+        self.assertEqual(self.codes("--"), [])
+
+    def test_keyword_tier_checks_every_term_and_keeps_the_projection(self):
+        self.assertEqual(self.codes("tenis nad"), ["ZZ-9"])
+        self.assertEqual(keyword_query("tenis gx"), ({"searchKeys": {"$regex": "^tenis"}}, ["gx"]))
+        card = search(self.cards, "tenis", 1, {"model": 1})[0]
+        self.assertEqual(set(card), {"_id", "model"})
+
+    def test_keyword_tier_reads_at_most_the_scan_limit(self):
+        # Só os 2 primeiros cards no índice entram na faixa, ordenados por código entre si
+        with mock.patch.object(search_module, "SEARCH_SCAN_LIMIT", 2):
+            self.assertEqual(len(self.codes("tenis")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
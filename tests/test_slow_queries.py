@@ -0,0 +1,93 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from bson import ObjectId
+
+from utils import slow_queries
+
+EXPLAIN = {
+    "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+    "executionStats": {"nReturned": 1, "totalDocsExamined": 1, "totalKeysExamined": 1, "executionTimeMillis": 3},
+}
+
+
+def find_command(code):
+    return {"find": "shoes", "filter": {"code": code, "_id": {"$in": [ObjectId(), ObjectId()]}},
+            "lsid": {"id": "x"}, "$db": "danki-adidas", "$clusterTime": {}}
+
+
+class TestQueryShape(unittest.TestCase):
+
+    def test_values_do_not_change_the_shape(self):
+        first = slow_queries.query_shape("find", find_command("JI0183"))
+        second = slow_queries.query_shape("find", find_command("B75806"))
+        self.assertEqual(first, second)
+        self.assertEqual(first["filter"], {"code": "?", "_id": {"$in": ["?"]}})
+        self.assertEqual(slow_queries.shape_id(first), slow_queries.shape_id(second))
+
+    def test_pipeline_keeps_structure_and_masks_match_literals(self):
+        command = {"aggregate": "shoes", "pipeline": [
+            {"$match": {"code": "JI0183"}},
+            {"$lookup": {"from": "images", "localField": "_id", "foreignField": "shoeId", "as": "images"}},
+            {"$limit": 20},
+        ]}
+        shape = slow_queries.query_shape("aggregate", command)
+        self.assertEqual(shape["pipeline"][0], {"$match": {"code": "?"}})
+        self.assertEqual(shape["pipeline"][1]["$lookup"]["from"], "images")
+        self.assertEqual(shape["pipeline"][2], {"$limit": "?"})
+
+    def test_explainable_command_drops_driver_fields(self):
+        command = slow_queries.explainable_command(find_command("JI0183"))
+        self.assertEqual(set(command), {"find", "filter"})
+
+    def test_summarize_explain(self):
+        summary = slow_queries.summarize_explain({"stages": [{"$cursor": EXPLAIN}]})
+        self.assertEqual(summary["winningPlan"], "FETCH > IXSCAN")
+        self.assertEqual(summary["totalDocsExamined"], 1)
+
+
+class TestSlowQueryRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.db = self.client["danki-adidas"]
+        self.db.list_collection_names.return_value = [slow_queries.SLOW_QUERY_COLLECTION]
+        self.db.command.return_value = EXPLAIN
+        self.recorder = slow_queries.SlowQueryRecorder(threshold_ms=100, explain_interval=60)
+        self.recorder.attach(self.client)
+        self.recorder._ensure_worker = lambda: None  # registros processados no próprio teste
+
+    def run_find(self, request_id, micros, code="JI0183"):
+        self.recorder.started(SimpleNamespace(request_id=request_id, command_name="find",
+                                              database_name="danki-adidas", command=find_command(code)))
+        self.recorder.succeeded(SimpleNamespace(request_id=request_id, command_name="find",
+                                                duration_micros=micros, reply={}))
+
+    def drain(self):
+        while not self.recorder._queue.empty():
+            self.recorder.record(*self.recorder._queue.get_nowait())
+
+    def test_fast_operations_are_ignored(self):
+        self.run_find(1, micros=5_000)
+        self.assertTrue(self.recorder._queue.empty())
+
+    def test_slow_operations_are_explained_once_per_shape(self):
+        self.run_find(2, micros=250_000, code="JI0183")
+        self.run_find(3, micros=400_000, code="B75806")
+        self.drain()
+
+        self.assertEqual(self.db.command.call_count, 1)
+        explained = self.db.command.call_args[0][0]
+        self.assertEqual(explained["verbosity"], "executionStats")
+        self.assertNotIn("lsid", explained["explain"])
+
+        stored = [call[0][0] for call in self.db[slow_queries.SLOW_QUERY_COLLECTION].insert_one.call_args_list]
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(stored[0]["shapeId"], stored[1]["shapeId"])
+        self.assertEqual(stored[0]["summary"]["winningPlan"], "FETCH > IXSCAN")
+        self.assertNotIn("explain", stored[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import gzip
+import json
+
+
+def load_snapshot(client, **headers):
+    response = client.get("/catalog/snapshot", headers={"Accept-Encoding": "gzip", **headers})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    return response, json.loads(gzip.decompress(response.get_data()))
+
+
+def test_snapshot_matches_tag_lookup_and_details(client, catalog, app_module):
+    app_module.app.extensions["catalog_snapshot"].update()
+    _, snapshot = load_snapshot(client)
+    assert len(snapshot["shoes"]) == len(catalog["shoes"])
+
+    tag = catalog["tag"][4]
+    shoe_id = client.get(f"/tag-by-address?tagAddress={tag['tagAddress']}").get_json()["shoeId"]
+    assert snapshot["tags"][tag["tagAddress"]] == shoe_id
+    details = json.loads(client.get(f"/shoe-details?id={shoe_id}").get_data(as_text=True))
+    assert snapshot["shoes"][shoe_id] == details
+
+    # Sem gzip no Accept-Encoding o mesmo JSON vai descomprimido
+    plain = client.get("/catalog/snapshot", headers={"Accept-Encoding": "identity"})
+    assert json.loads(plain.get_data()) == snapshot
+
+
+def test_snapshot_etag_and_incremental_refresh(client, catalog, app_module):
+    catalog_snapshot = app_module.app.extensions["catalog_snapshot"]
+    catalog_snapshot.update()
+    first, snapshot = load_snapshot(client)
+    etag = first.headers["ETag"]
+    assert client.get("/catalog/snapshot", headers={"If-None-Match": etag}).status_code == 304
+
+    # Novo código de um tênis usado como cor por outro: as duas entradas são recalculadas
+    color_id = catalog["shoes"][3]["colors"][0]
+    client.put(f"/shoes/{color_id}", json={"code": "RECODIFICADO"})
+    client.post(f"/sneaker/{catalog['shoes'][3]['_id']}/tags", json={"tagAddress": "EE:FF"})
+
+    # A rota não recalcula nada: até a próxima atualização o snapshot anterior continua servido
+    assert client.get("/catalog/snapshot", headers={"If-None-Match": etag}).status_code == 304
+    catalog_snapshot.update()
+    second, updated = load_snapshot(client, **{"If-None-Match": etag})
+    assert second.headers["ETag"] != etag
+    assert updated["version"] > snapshot["version"]
+    shoe_id = str(catalog["shoes"][3]["_id"])
+    assert updated["tags"]["EE:FF"] == shoe_id
+    assert updated["shoes"][str(color_id)]["code"] == "RECODIFICADO"
+    assert [color["code"] for color in updated["shoes"][shoe_id]["colors"]][0] == "RECODIFICADO"
+
+    client.delete(f"/shoes/{color_id}")
+    catalog_snapshot.update()
+    _, after_delete = load_snapshot(client)
+    assert str(color_id) not in after_delete["shoes"]
+
+
+def test_snapshot_answers_503_until_the_first_build(client, catalog, app_module):
+    from utils.snapshot import CatalogSnapshot
+    catalog_snapshot = CatalogSnapshot(app_module.db, check_interval=3600)
+    extensions = app_module.app.extensions
+    previous, extensions["catalog_snapshot"] = extensions["catalog_snapshot"], catalog_snapshot
+    try:
+        response = client.get("/catalog/snapshot")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+
+        # O pedido disparou a primeira montagem em segundo plano
+        catalog_snapshot.update()
+        _, snapshot = load_snapshot(client)
+        assert len(snapshot["shoes"]) == len(catalog["shoes"])
+    finally:
+        extensions["catalog_snapshot"] = previous
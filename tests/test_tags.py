@@ -0,0 +1,86 @@
+import io
+
+
+def test_assign_reports_conflicts_per_row(client, catalog, app_module):
+    shoes, tags = catalog["shoes"], catalog["tag"]
+    assignments = [
+        {"tagAddress": "NOVA:01", "shoeId": str(shoes[1]["_id"])},
+        {"tagAddress": "NOVA:02", "code": shoes[2]["code"]},
+        {"tagAddress": tags[0]["tagAddress"], "shoeId": tags[0]["shoeId"]},
+        {"tagAddress": tags[1]["tagAddress"], "shoeId": str(shoes[3]["_id"])},
+        {"tagAddress": "NOVA:01", "shoeId": str(shoes[4]["_id"])},
+        {"tagAddress": "NOVA:03", "code": "NAO-EXISTE"},
+        {"tagAddress": "", "shoeId": str(shoes[1]["_id"])},
+    ]
+    report = client.post("/tags/assign", json={"assignments": assignments}).get_json()
+
+    assert (report["created"], report["moved"], report["unchanged"]) == (2, 0, 1)
+    assert [conflict["row"] for conflict in report["conflicts"]] == [4, 5, 6, 7]
+    assert report["conflicts"][0]["shoeId"] == tags[1]["shoeId"]
+
+    db = app_module.db
+    assert db["tag"].find_one({"tagAddress": "NOVA:02"})["shoeId"] == str(shoes[2]["_id"])
+    card = db["shoe_cards"].find_one({"_id": shoes[1]["_id"]})
+    assert {"tagAddress": "NOVA:01"} in card["tag"]
+
+    # Com move a tag muda de dono e o card do dono anterior perde a tag
+    moved = client.post("/tags/assign", json={"move": True, "assignments": [assignments[3]]}).get_json()
+    assert moved["moved"] == 1 and moved["conflicts"] == []
+    assert db["tag"].count_documents({"tagAddress": tags[1]["tagAddress"]}) == 1
+    assert db["shoe_cards"].find_one({"_id": shoes[3]["_id"]})["tagCount"] == 2
+
+
+def test_import_csv_with_semicolons_and_single_tag_uniqueness(client, catalog):
+    shoes = catalog["shoes"]
+    csv_body = "tagAddress;code\nCSV:01;{}\nCSV:02;{}\nCSV:01;{}\n".format(
+        shoes[5]["code"], shoes[6]["code"], shoes[7]["code"])
+    response = client.post("/tags/import", data={"file": (io.BytesIO(csv_body.encode()), "tags.csv")},
+                           content_type="multipart/form-data")
+    report = response.get_json()
+    assert report["created"] == 2
+    assert report["conflicts"] == [{"row": 4, "tagAddress": "CSV:01",
+                                    "reason": "tagAddress repetido no arquivo (linha 2)"}]
+
+    bad = client.post("/tags/import", data={"file": (io.BytesIO(b"mac,sku\n1,2\n"), "tags.csv")},
+                      content_type="multipart/form-data")
+    assert bad.status_code == 400
+
+    # O índice único também vale para a rota de uma tag por vez
+    duplicate = client.post(f"/sneaker/{shoes[8]['_id']}/tags", json={"tagAddress": "CSV:02"})
+    assert duplicate.status_code == 409
+    assert duplicate.get_json()["shoeId"] == str(shoes[6]["_id"])
+
+
+def test_crud_tag_writes_answer_409_with_the_owner(client, catalog, app_module):
+    tags = catalog["tag"]
+    owner = tags[0]
+
+    created = client.post("/tag", json={"tagAddress": owner["tagAddress"], "shoeId": tags[1]["shoeId"]})
+    assert created.status_code == 409
+    assert created.get_json() == {"error": "tagAddress já vinculado a outro tênis", "shoeId": owner["shoeId"]}
+
+    updated = client.put(f"/tag/{tags[1]['_id']}", json={"tagAddress": owner["tagAddress"]})
+    assert updated.status_code == 409
+    assert updated.get_json()["shoeId"] == owner["shoeId"]
+    assert app_module.db["tag"].find_one({"_id": tags[1]["_id"]})["tagAddress"] == tags[1]["tagAddress"]
+
+    duplicate_code = client.post("/shoes", json={"model": "M", "title": "t", "description": "d",
+                                                 "code": catalog["shoes"][0]["code"]})
+    assert duplicate_code.status_code == 409
+
+
+def test_duplicates_keep_oldest_link(app_module):
+    from database import ensure_indexes
+    from utils.tags import duplicates, remove_duplicates
+
+    db = app_module.db
+    db["tag"].drop_indexes()
+    first = db["tag"].insert_one({"tagAddress": "DUP", "shoeId": "a"}).inserted_id
+    db["tag"].insert_one({"tagAddress": "DUP", "shoeId": "b"})
+    db["tag"].insert_one({"tagAddress": "UNICA", "shoeId": "c"})
+
+    groups = duplicates(db)
+    assert [(group["tagAddress"], group["keep"]) for group in groups] == [("DUP", first)]
+    assert remove_duplicates(db, groups) == 1
+    assert ensure_indexes(db)
+    assert [tag["_id"] for tag in db["tag"].find({"tagAddress": "DUP"})] == [first]
@@ -0,0 +1,164 @@
+"""
+Controle de admissão por prioridade: leituras dos quiosques não esperam atrás das rotas pesadas.
+
+Cada processo tem dois pools de concorrência limitada:
+    - `kiosk`: as leituras de cada escaneamento (/tag-by-address, /shoe-details, sugestões);
+    - `heavy`: listagens e relatórios do admin, snapshot, delta sync e importações.
+As demais rotas não passam por pool.
+
+Uma requisição espera uma vaga no seu pool por no máximo o orçamento de fila do pool; estourado
+o orçamento ela recebe `503` com `Retry-After` em vez de ocupar uma thread esperando. As rotas
+pesadas têm orçamento curto e, enquanto houver quiosque na fila, são recusadas na hora: a
+prioridade é de quem está na frente do quiosque. O tempo de fila e as recusas vão para /metrics
+(danki_admission_queue_seconds, danki_admission_rejected_total, danki_admission_in_flight).
+
+Limites e orçamentos vêm do ambiente (por processo; com vários workers, multiplique):
+    ADMISSION_KIOSK_LIMIT=32  ADMISSION_KIOSK_BUDGET_MS=2000
+    ADMISSION_HEAVY_LIMIT=2   ADMISSION_HEAVY_BUDGET_MS=50
+    ADMISSION_RETRY_AFTER=1   (segundos)
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import jsonify, request
+from prometheus_client import Counter, Gauge, Histogram
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+KIOSK, HEAVY = "kiosk", "heavy"
+
+# "MÉTODO rota" (padrão do url_rule) -> pool
+ROUTE_POOLS = {
+    "GET /tag-by-address": KIOSK,
+    "GET /shoe-details": KIOSK,
+    "GET /suggestion-by-shoe-id/<shoe_id>": KIOSK,
+    "GET /shoes-and-tags": HEAVY,
+    "GET /shoes-with-images": HEAVY,
+    "GET /catalog/snapshot": HEAVY,
+    "GET /changes": HEAVY,
+    "POST /tags/assign": HEAVY,
+    "POST /tags/import": HEAVY,
+    "GET /sneaker/reports": HEAVY,
+    "GET /sneaker/slow-queries": HEAVY,
+    "GET /dados-danki": HEAVY,
+    # Listagens completas das coleções (CRUD genérico)
+    "GET /shoes": HEAVY,
+    "GET /suggestion": HEAVY,
+    "GET /pinterest": HEAVY,
+    "GET /images": HEAVY,
+    "GET /tag": HEAVY,
+}
+
+DEFAULTS = {KIOSK: (32, 2000), HEAVY: (2, 50)}
+RETRY_AFTER = 1
+
+ADMISSION_QUEUE_SECONDS = Histogram(
+    "danki_admission_queue_seconds",
+    "Time requests waited for a slot in their admission pool.",
+    ["pool", "outcome"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=REGISTRY
+)
+ADMISSION_REJECTED = Counter(
+    "danki_admission_rejected_total",
+    "Requests answered with 503 by admission control, by pool and reason.",
+    ["pool", "reason"],
+    registry=REGISTRY
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "danki_admission_in_flight",
+    "Requests currently holding a slot of the pool.",
+    ["pool"],
+    registry=REGISTRY
+)
+
+
+class AdmissionPool:
+    """Semáforo com orçamento de espera e contagem de quem está na fila."""
+
+    def __init__(self, name, limit, budget_seconds):
+        self.name = name
+        self.limit = limit
+        self.budget = budget_seconds
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    def acquire(self, timeout=None):
+        """Espera uma vaga por até `timeout` (padrão: o orçamento do pool). Devolve True se entrou."""
+        timeout = self.budget if timeout is None else timeout
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            self.waiting += 1
+        try:
+            return timeout > 0 and self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def release(self):
+        self._slots.release()
+
+
+def _env_pool(name):
+    limit, budget_ms = DEFAULTS[name]
+    limit = int(os.getenv(f"ADMISSION_{name.upper()}_LIMIT", limit))
+    budget_ms = float(os.getenv(f"ADMISSION_{name.upper()}_BUDGET_MS", budget_ms))
+    return AdmissionPool(name, limit, budget_ms / 1000)
+
+
+def init_admission(app, pools=None, retry_after=None):
+    """
+    Registra o controle de admissão nas requisições do app Flask.
+
+    Args:
+        app: Aplicação Flask.
+        pools (dict, opcional): Nome -> AdmissionPool; padrão lido do ambiente.
+        retry_after (int, opcional): Segundos sugeridos no Retry-After dos 503.
+    """
+    pools = pools or {name: _env_pool(name) for name in DEFAULTS}
+    retry_after = int(os.getenv("ADMISSION_RETRY_AFTER", RETRY_AFTER)) if retry_after is None else retry_after
+    app.extensions["admission_pools"] = pools
+
+    def reject(pool, reason):
+        ADMISSION_REJECTED.labels(pool.name, reason).inc()
+        logger.debug(f"Admission {pool.name}: rejected {request.method} {request.path} ({reason}).")
+        response = jsonify({"error": "Server busy, retry later"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    @app.before_request
+    def admit_request():
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        pool = pools.get(ROUTE_POOLS.get(f"{request.method} {rule}"))
+        if pool is None:
+            return None
+
+        kiosk = pools.get(KIOSK)
+        if pool is not kiosk and kiosk is not None and kiosk.waiting:
+            # Quiosques esperando: trabalho de baixa prioridade nem entra na fila
+            ADMISSION_QUEUE_SECONDS.labels(pool.name, "rejected").observe(0)
+            return reject(pool, "priority")
+
+        started = time.perf_counter()
+        admitted = pool.acquire()
+        waited = time.perf_counter() - started
+        ADMISSION_QUEUE_SECONDS.labels(pool.name, "admitted" if admitted else "rejected").observe(waited)
+        if not admitted:
+            return reject(pool, "budget")
+        ADMISSION_IN_FLIGHT.labels(pool.name).inc()
+        request.environ["danki.admission_pool"] = pool
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        pool = request.environ.pop("danki.admission_pool", None)
+        if pool is not None:
+            pool.release()
+            ADMISSION_IN_FLIGHT.labels(pool.name).dec()
@@ -1,6 +1,19 @@
-import boto3
+"""
+Acesso ao S3: cliente boto3, upload/download/listagem e URLs assinadas para bucket privado.
+
+PresignedUrls assina em lote as URLs de leitura das imagens (/shoes-with-images, /shoes-and-tags,
+/shoes/search e /shoe-details) quando S3_PRIVATE_BUCKET está definido; ver init_presigned_urls.
+"""
+import hashlib
+import hmac
 import os
-from botocore.exceptions import ClientError
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote, urlsplit
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,16 +23,30 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION")
 
-# Criar cliente boto3 com credenciais explícitas
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_DEFAULT_REGION
-)
+# Cliente boto3 criado no primeiro uso: importar o boto3 custa ~150 ms no boot do servidor
+_s3 = None
+
+
+def get_s3_client():
+    """Retorna o cliente S3, importando o boto3 e criando o cliente na primeira chamada."""
+    global _s3
+    if _s3 is None:
+        import boto3
+
+        # Criar cliente boto3 com credenciais explícitas
+        _s3 = boto3.client(
+            "s3",
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            region_name=AWS_DEFAULT_REGION
+        )
+    return _s3
+
 
 def upload_file_to_s3(file_path, bucket_name, s3_key):
     """Faz upload de um arquivo local para o S3."""
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
         s3.upload_file(file_path, bucket_name, s3_key)
         print(f"Arquivo '{file_path}' enviado para '{bucket_name}/{s3_key}'.")
@@ -30,6 +57,8 @@ def upload_file_to_s3(file_path, bucket_name, s3_key):
 
 def upload_file_blob_to_s3(file, bucket_name, s3_key):
     """Faz upload de um arquivo para o S3 diretamente do Flask."""
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
         s3.upload_fileobj(file, bucket_name, s3_key)
         return f"https://{bucket_name}.s3.amazonaws.com/{s3_key}"
@@ -39,6 +68,8 @@ def upload_file_blob_to_s3(file, bucket_name, s3_key):
 
 def download_file_from_s3(bucket_name, s3_key, local_path):
     """Faz download de um arquivo do S3 para o disco local."""
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
         s3.download_file(bucket_name, s3_key, local_path)
         print(f"Arquivo '{s3_key}' baixado para '{local_path}'.")
@@ -48,16 +79,21 @@ def download_file_from_s3(bucket_name, s3_key, local_path):
         return False
 
 def list_files_in_bucket(bucket_name, prefix=""):
+    """Lista todas as chaves do bucket (ou do prefixo), seguindo a paginação de 1.000 em 1.000."""
+    from utils.s3_inventory import iter_objects
+
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
-        contents = response.get("Contents", [])
-        return [item["Key"] for item in contents]
+        return [item["key"] for item in iter_objects(s3, bucket_name, prefix)]
     except ClientError as e:
         print(f"Erro ao listar arquivos: {e}")
         return []
 
 def delete_file_from_s3(bucket_name, s3_key):
     """Remove um arquivo do bucket S3."""
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
         s3.delete_object(Bucket=bucket_name, Key=s3_key)
         print(f"Arquivo '{s3_key}' removido do bucket '{bucket_name}'.")
@@ -68,6 +104,8 @@ def delete_file_from_s3(bucket_name, s3_key):
 
 def get_file_url(bucket_name, s3_key, expires_in=3600):
     """Gera uma URL temporária para acessar um arquivo do S3."""
+    s3 = get_s3_client()
+    from botocore.exceptions import ClientError
     try:
         url = s3.generate_presigned_url(
             'get_object',
@@ -78,3 +116,231 @@ def get_file_url(bucket_name, s3_key, expires_in=3600):
     except ClientError as e:
         print(f"Erro ao gerar URL: {e}")
         return None
+
+
+def key_from_url(url, bucket):
+    """
+    Chave do objeto citado por uma URL do S3, ou None quando a URL não é do bucket.
+
+    Aceita o endereço virtual-hosted (https://bucket.s3[.região].amazonaws.com/chave, o formato
+    gravado pelos uploads) e o path-style (https://s3[.região].amazonaws.com/bucket/chave).
+    """
+    parts = urlsplit(url)
+    host, path = parts.netloc.lower(), parts.path.lstrip("/")
+    if not host.endswith(".amazonaws.com"):
+        return None
+    if host.startswith(f"{bucket.lower()}.s3"):
+        return path or None
+    if host.startswith("s3") and path.startswith(f"{bucket}/"):
+        return path[len(bucket) + 1:] or None
+    return None
+
+
+# =======================================
+# URLs assinadas (bucket privado)
+# =======================================
+
+PRESIGN_EXPIRES = 6 * 3600
+PRESIGN_MARGIN = 15 * 60
+PRESIGN_CACHE_SIZE = 50000
+PRESIGN_MAX_EXPIRES = 7 * 24 * 3600  # limite da SigV4
+
+# bucket.s3.<região>.amazonaws.com, o host das URLs assinadas
+_REGIONAL_HOST = re.compile(r"^(.+)\.s3[.-][a-z0-9-]+\.amazonaws\.com$", re.IGNORECASE)
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+def unsigned_url(url):
+    """
+    Tira a assinatura de uma URL do S3 (query string X-Amz-*), devolvendo o link como é gravado.
+
+    O admin reenvia ao /update-shoe-full as URLs que recebeu; sem isto uma URL assinada, que
+    expira, seria salva em `images.links`. O host regional das URLs assinadas volta ao global
+    (https://bucket.s3.amazonaws.com/chave, o formato dos uploads). Outras URLs voltam inalteradas.
+    """
+    if not isinstance(url, str) or "X-Amz-Signature=" not in url:
+        return url
+    parts = urlsplit(url)
+    if not parts.netloc.lower().endswith(".amazonaws.com"):
+        return url
+    host = _REGIONAL_HOST.sub(r"\1.s3.amazonaws.com", parts.netloc)
+    return f"{parts.scheme}://{host}{parts.path}"
+
+
+class PresignedUrls:
+    """
+    URLs de leitura (GET) assinadas de um bucket privado, geradas em lote e guardadas em cache.
+
+    A assinatura é a SigV4 por query string, a mesma do generate_presigned_url com s3v4, mas
+    calculada aqui: a chave de assinatura e a parte fixa da query são derivadas uma vez por
+    período, e cada URL custa um SHA-256 e um HMAC em vez de uma requisição montada pelo botocore.
+
+    O tempo é dividido em períodos de `expires_in - margin` segundos. Todas as URLs de um período
+    são assinadas com o início dele (X-Amz-Date) e valem `expires_in` segundos a partir daí:
+        - a URL de uma chave é a mesma durante o período inteiro (cache e ETag estáveis);
+        - uma URL servida ainda vale pelo menos `margin` segundos;
+        - na virada do período o cache é descartado e as URLs são reassinadas sob demanda.
+    O cache guarda no máximo `max_size` URLs (as menos usadas saem primeiro).
+    """
+
+    def __init__(self, bucket, region=None, credentials=None, expires_in=PRESIGN_EXPIRES,
+                 margin=PRESIGN_MARGIN, max_size=PRESIGN_CACHE_SIZE, clock=time.time):
+        """
+        Args:
+            bucket (str): Bucket privado das imagens.
+            region (str, opcional): Região do bucket; padrão AWS_DEFAULT_REGION ou us-east-1.
+            credentials (tuple, opcional): (access key, secret key, session token ou None);
+                padrão as variáveis AWS_* ou a cadeia de credenciais do boto3.
+            expires_in (int): Validade de cada URL em segundos (até 7 dias).
+            margin (int): Validade mínima restante de uma URL servida, em segundos.
+            max_size (int): Máximo de URLs em cache.
+            clock (callable): Relógio em segundos (epoch), substituível nos testes.
+        """
+        if not 0 <= margin < expires_in <= PRESIGN_MAX_EXPIRES:
+            raise ValueError(f"Validade inválida: expires_in={expires_in}, margin={margin}")
+        self.bucket = bucket
+        self.region = region or AWS_DEFAULT_REGION or "us-east-1"
+        # Endpoint regional: o global (bucket.s3.amazonaws.com) redireciona fora da us-east-1 e a
+        # assinatura, que cobre o host, não vale no endereço de destino
+        self.host = f"{bucket}.s3.{self.region}.amazonaws.com"
+        self.expires_in = expires_in
+        self.period = expires_in - margin
+        self.max_size = max_size
+        self._credentials = credentials
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._epoch = None
+        self._signer = None
+        self._urls = OrderedDict()
+
+    def epoch(self):
+        """Número do período atual; entra no ETag das respostas com URLs assinadas."""
+        return int(self._clock() // self.period)
+
+    def _frozen_credentials(self):
+        if self._credentials:
+            return self._credentials
+        if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
+            return AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, os.getenv("AWS_SESSION_TOKEN")
+        # Perfil, variáveis de container ou role da instância; só então o boto3 é importado
+        import boto3
+
+        frozen = boto3.session.Session().get_credentials().get_frozen_credentials()
+        return frozen.access_key, frozen.secret_key, frozen.token
+
+    def _start(self, epoch):
+        # Credenciais relidas a cada período: as temporárias (role) são renovadas pelo boto3
+        access_key, secret_key, token = self._frozen_credentials()
+        signed_at = datetime.fromtimestamp(epoch * self.period, timezone.utc)
+        day, amz_date = signed_at.strftime("%Y%m%d"), signed_at.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        signing_key = _hmac(_hmac(_hmac(_hmac(f"AWS4{secret_key}".encode("utf-8"), day), self.region), "s3"),
+                            "aws4_request")
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(self.expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if token:
+            params["X-Amz-Security-Token"] = token
+        query = "&".join(f"{name}={quote(value, safe='-_.~')}" for name, value in sorted(params.items()))
+        self._signer = (signing_key, query, f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n")
+        self._epoch = epoch
+        self._urls.clear()
+
+    def _sign(self, key):
+        signing_key, query, string_to_sign = self._signer
+        path = "/" + quote(key, safe="/~")
+        canonical = f"GET\n{path}\n{query}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign += hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        return f"https://{self.host}{path}?{query}&X-Amz-Signature={signature}"
+
+    def urls(self, keys):
+        """
+        URLs assinadas das chaves, na mesma ordem; as já assinadas no período saem do cache.
+
+        Args:
+            keys (iterable): Chaves dos objetos (sem codificação).
+
+        Returns:
+            list: URLs assinadas.
+        """
+        epoch = self.epoch()
+        result = []
+        with self._lock:
+            if epoch != self._epoch:
+                self._start(epoch)
+            for key in keys:
+                url = self._urls.get(key)
+                if url is None:
+                    url = self._urls[key] = self._sign(key)
+                    if len(self._urls) > self.max_size:
+                        self._urls.popitem(last=False)
+                else:
+                    self._urls.move_to_end(key)
+                result.append(url)
+        return result
+
+    def url(self, key):
+        """URL assinada de uma chave."""
+        return self.urls([key])[0]
+
+    def sign_links(self, links):
+        """
+        Troca os links gravados que apontam para o bucket por URLs assinadas, num único lote.
+
+        Aceita as URLs virtual-hosted e path-style (ver key_from_url), com a chave
+        crua ou codificada; links de outros hosts (Pinterest...) voltam inalterados.
+
+        Returns:
+            list: Nova lista, na mesma ordem.
+        """
+        keys = [self._key(link) if isinstance(link, str) else None for link in links]
+        signed = iter(self.urls([key for key in keys if key]))
+        return [next(signed) if key else link for link, key in zip(links, keys)]
+
+    def _key(self, link):
+        # Formato gravado pelos uploads (host global) primeiro, sem passar pelo urlsplit
+        prefix = f"https://{self.bucket}.s3.amazonaws.com/"
+        key = link[len(prefix):] if link.startswith(prefix) and "?" not in link else key_from_url(link, self.bucket)
+        return unquote(key) if key else None
+
+
+def create_presigner():
+    """
+    Cria o PresignedUrls configurado pelo ambiente.
+
+    Configuração: S3_PRIVATE_BUCKET, PRESIGN_EXPIRES (segundos, padrão 6 h), PRESIGN_MARGIN
+    (segundos, padrão 15 min) e PRESIGN_CACHE_SIZE (padrão 50.000 URLs).
+
+    Returns:
+        PresignedUrls or None: None quando o bucket é público (S3_PRIVATE_BUCKET não definido).
+    """
+    bucket = os.getenv("S3_PRIVATE_BUCKET")
+    if not bucket:
+        return None
+    return PresignedUrls(
+        bucket,
+        expires_in=int(os.getenv("PRESIGN_EXPIRES", PRESIGN_EXPIRES)),
+        margin=int(os.getenv("PRESIGN_MARGIN", PRESIGN_MARGIN)),
+        max_size=int(os.getenv("PRESIGN_CACHE_SIZE", PRESIGN_CACHE_SIZE)),
+    )
+
+
+def init_presigned_urls(app):
+    """
+    Cria o PresignedUrls do app Flask (em app.extensions) quando S3_PRIVATE_BUCKET está definido.
+
+    Returns:
+        PresignedUrls or None: None quando o bucket é público (variável não definida).
+    """
+    presigner = create_presigner()
+    if presigner is not None:
+        app.extensions["presigned_urls"] = presigner
+    return presigner
@@ -0,0 +1,167 @@
+"""
+Log ordenado de alterações do catálogo para sincronização incremental (/changes?since=).
+
+Cada escrita confirmada nas coleções do catálogo acrescenta uma entrada em `changes`:
+
+    {"_id": <seq>, "collection": "shoes", "docId": ObjectId(...), "op": "upsert" | "delete", "at": ...}
+
+O `seq` é um contador crescente em META_COLLECTION. A entrada guarda só a identidade do
+documento: changes_since agrupa as entradas de um lote (o último evento de cada documento
+vence) e busca o estado atual com um `$in` por coleção, então quem espelha o catálogo baixa
+cada documento alterado uma vez por lote, e o custo acompanha o volume de alterações e não o
+tamanho do catálogo. Remoções viram tombstones (`op: "delete"`, sem `doc`).
+
+Entradas expiram após 30 dias pelo índice TTL em `at` (database.INDEXES); um cursor anterior
+à entrada mais antiga ainda guardada não pode mais ser continuado (ChangesExpired) e o cliente
+precisa baixar o catálogo de novo.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from database import META_COLLECTION
+from utils.reads import Read, run
+
+logger = logging.getLogger(__name__)
+
+CHANGES_COLLECTION = "changes"
+
+# Documento em META_COLLECTION com o último seq alocado
+CHANGES_SEQ_ID = "changes"
+
+# Coleções cujas escritas entram no log
+LOGGED_COLLECTIONS = ("shoes", "suggestion", "pinterest", "images", "tag")
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+CHANGES_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+
+# Um seq é alocado antes da entrada ser inserida: uma lacuna mais nova que isso pode ser uma
+# escrita ainda em andamento, então o lote para antes dela para não pular a entrada que falta
+GAP_GRACE = timedelta(seconds=5)
+
+
+class ChangesExpired(Exception):
+    """O cursor informado é anterior às entradas ainda guardadas no log (ou posterior ao fim)."""
+
+
+def record_changes(db, collection, doc_ids, op=UPSERT):
+    """
+    Acrescenta ao log uma entrada por documento, com seqs consecutivos alocados de uma vez.
+
+    Chamado depois que a escrita foi confirmada; uma falha aqui só é registrada no log da
+    aplicação e não desfaz a resposta da rota.
+
+    Args:
+        db: Banco da aplicação.
+        collection (str): Coleção escrita.
+        doc_ids (iterable): _id dos documentos gravados ou removidos.
+        op (str): UPSERT ou DELETE.
+
+    Returns:
+        int: Último seq gravado (0 se nada foi gravado).
+    """
+    doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids) if doc_id is not None]
+    if collection not in LOGGED_COLLECTIONS or not doc_ids:
+        return 0
+    try:
+        counter = db[META_COLLECTION].find_one_and_update(
+            {"_id": CHANGES_SEQ_ID}, {"$inc": {"seq": len(doc_ids)}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        first = counter["seq"] - len(doc_ids) + 1
+        now = datetime.now(timezone.utc)
+        db[CHANGES_COLLECTION].insert_many([
+            {"_id": first + offset, "collection": collection, "docId": doc_id, "op": op, "at": now}
+            for offset, doc_id in enumerate(doc_ids)
+        ], ordered=False)
+        return counter["seq"]
+    except Exception as e:
+        logger.error(f"Erro ao registrar alterações de {collection} no log: {e}")
+        return 0
+
+
+def record_change(db, collection, doc_id, op=UPSERT):
+    """Atalho de record_changes para um único documento."""
+    return record_changes(db, collection, [doc_id], op)
+
+
+def read_head_seq():
+    """Plano (utils/reads.py) que lê o head_seq, para quem compõe com outras leituras ou usa o motor."""
+    counter, = yield [Read(META_COLLECTION, {"_id": CHANGES_SEQ_ID}, {"seq": 1}, one=True)]
+    return counter.get("seq", 0) if counter else 0
+
+
+def head_seq(db):
+    """Último seq alocado: o cursor de um cliente que acabou de baixar o catálogo inteiro."""
+    return run(read_head_seq(), db)
+
+
+def _aware(moment):
+    # O driver devolve datas sem fuso (UTC) a menos que o cliente use tz_aware
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def changes_since(db, since, limit=CHANGES_LIMIT):
+    """
+    Alterações posteriores a `since`, agrupadas por documento.
+
+    Args:
+        db: Banco da aplicação.
+        since (int): Último seq já aplicado pelo cliente.
+        limit (int): Máximo de entradas do log lidas neste lote.
+
+    Returns:
+        dict: {"since", "next" (cursor do próximo pedido), "hasMore", "changes": [{"seq",
+        "collection", "id", "op", "doc"}]}, com "doc" só nos upserts e na ordem do log.
+
+    Raises:
+        ChangesExpired: O cursor é anterior à retenção do log ou posterior ao último seq.
+    """
+    head = head_seq(db)
+    if since > head:
+        raise ChangesExpired(f"cursor {since} is ahead of the change log ({head})")
+    oldest = db[CHANGES_COLLECTION].find_one({}, {"_id": 1}, sort=[("_id", 1)])
+    if oldest is not None and since < oldest["_id"] - 1:
+        raise ChangesExpired(f"changes before {oldest['_id']} are no longer retained")
+    if oldest is None and since < head:
+        raise ChangesExpired(f"changes up to {head} are no longer retained")
+
+    entries = list(db[CHANGES_COLLECTION].find({"_id": {"$gt": since}}).sort("_id", 1).limit(limit + 1))
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    cursor = since
+    now = datetime.now(timezone.utc)
+    for entry in entries:
+        if entry["_id"] != cursor + 1 and now - _aware(entry["at"]) < GAP_GRACE:
+            has_more = True
+            break
+        cursor = entry["_id"]
+        key = (entry["collection"], entry["docId"])
+        latest.pop(key, None)
+        latest[key] = entry
+
+    wanted = {}
+    for (collection, doc_id), entry in latest.items():
+        if entry["op"] == UPSERT:
+            wanted.setdefault(collection, []).append(doc_id)
+    documents = {}
+    for collection, doc_ids in wanted.items():
+        for document in db[collection].find({"_id": {"$in": doc_ids}}):
+            documents[(collection, document["_id"])] = document
+
+    changes = []
+    for key, entry in latest.items():
+        change = {"seq": entry["_id"], "collection": key[0], "id": key[1], "op": entry["op"]}
+        # Um upsert cujo documento já sumiu tem um delete mais adiante no log; vira tombstone
+        if entry["op"] == UPSERT and key in documents:
+            change["doc"] = documents[key]
+        elif entry["op"] == UPSERT:
+            change["op"] = DELETE
+        changes.append(change)
+    return {"since": since, "next": cursor, "hasMore": has_more, "changes": changes}
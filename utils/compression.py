@@ -0,0 +1,219 @@
+"""
+Compressão das respostas (gzip/brotli) negociada pelo Accept-Encoding.
+
+- Respostas dinâmicas (JSON do catálogo, HTML do admin) acima de COMPRESS_MIN_SIZE bytes são
+  comprimidas no after_request. Quando a resposta tem ETag, a versão comprimida fica num cache
+  LRU indexado por (ETag, encoding): cada mudança do catálogo é comprimida uma vez só.
+- Arquivos estáticos são pré-comprimidos no build (`python -m utils.compression static`),
+  gerando .br/.gz ao lado de cada arquivo; a rota /static serve a variante quando o cliente aceita.
+
+O brotli é opcional: sem o módulo `brotli` instalado só gzip é oferecido.
+"""
+import argparse
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "image/svg+xml",
+)
+STATIC_EXTENSIONS = (".css", ".js", ".html", ".json", ".svg", ".txt", ".map")
+
+# Sufixo dos arquivos pré-comprimidos de cada encoding
+STATIC_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Respostas menores que isso não compensam o custo de comprimir
+MIN_SIZE = 1024
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Níveis para respostas dinâmicas (rápidos) e para o build dos estáticos (máximos)
+GZIP_LEVEL, GZIP_STATIC_LEVEL = 6, 9
+BROTLI_QUALITY, BROTLI_STATIC_QUALITY = 5, 11
+
+
+def available_encodings():
+    """Encodings suportados pelo servidor, em ordem de preferência."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def parse_accept_encoding(header):
+    """Converte um Accept-Encoding em {encoding: q}."""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate(header, available=None):
+    """
+    Escolhe o encoding da resposta.
+
+    Returns:
+        str or None: "br", "gzip" ou None para enviar sem compressão.
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in available or available_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding, static=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_STATIC_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_STATIC_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+class CompressedCache:
+    """Cache LRU de corpos comprimidos, limitado pelo total de bytes guardados."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def init_compression(app, min_size=None, cache_bytes=None):
+    """
+    Liga a compressão das respostas e a entrega de estáticos pré-comprimidos no app Flask.
+
+    Args:
+        app: Aplicação Flask.
+        min_size (int, opcional): Tamanho mínimo comprimido; padrão COMPRESS_MIN_SIZE ou MIN_SIZE.
+        cache_bytes (int, opcional): Limite do cache de corpos comprimidos.
+    """
+    min_size = int(os.getenv("COMPRESS_MIN_SIZE", MIN_SIZE)) if min_size is None else min_size
+    cache = CompressedCache(cache_bytes or CACHE_MAX_BYTES)
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers):
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+
+        etag, _ = response.get_etag()
+        key = (etag, encoding) if etag else None
+        compressed = cache.get(key) if key else None
+        if compressed is None:
+            compressed = compress(data, encoding)
+            if key:
+                cache.put(key, compressed)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def static_view(filename):
+        """Serve a variante .br/.gz gerada no build quando o cliente aceita e ela está atualizada."""
+        original = safe_join(app.static_folder, filename)
+        encoding = negotiate(request.headers.get("Accept-Encoding"), available=tuple(STATIC_SUFFIXES))
+        if original and encoding and os.path.isfile(original):
+            variant = original + STATIC_SUFFIXES[encoding]
+            if os.path.isfile(variant) and os.path.getmtime(variant) >= os.path.getmtime(original):
+                response = send_from_directory(app.static_folder, filename + STATIC_SUFFIXES[encoding],
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers["Content-Encoding"] = encoding
+                response.vary.add("Accept-Encoding")
+                return response
+        return app.send_static_file(filename)
+
+    app.view_functions["static"] = static_view
+
+
+def precompress_static(directory, min_size=MIN_SIZE):
+    """
+    Gera as variantes .br/.gz dos arquivos estáticos compressíveis (passo de build).
+
+    Arquivos cujas variantes já são mais novas que o original são pulados.
+
+    Returns:
+        list: Caminhos das variantes escritas.
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(STATIC_EXTENSIONS) or os.path.getsize(path) < min_size:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            for encoding in available_encodings():
+                variant = path + STATIC_SUFFIXES[encoding]
+                if os.path.exists(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+                    continue
+                with open(variant, "wb") as f:
+                    f.write(compress(data, encoding, static=True))
+                written.append(variant)
+    return written
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["static"])
+    parser.add_argument("--dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static"))
+    args = parser.parse_args()
+
+    written = precompress_static(args.dir)
+    logger.info(f"{len(written)} arquivos pré-comprimidos em {args.dir}.")
+
+
+if __name__ == "__main__":
+    main()
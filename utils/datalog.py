@@ -0,0 +1,59 @@
+"""
+Leitura do datalog dos quiosques (o mesmo feed exibido em /dados-danki).
+
+Cada item do datalog diz que um quiosque (MAC) mostrou um tênis (código) em um horário. Usado
+pelas recomendações (imports/recommendations.py) e pela pré-carga dos detalhes mais escaneados
+(utils/prefetch.py).
+"""
+import json
+from datetime import timezone
+
+from dateutil.parser import isoparse
+
+DATALOG_URL = "https://dbutils.ddns.net/datalog/getdatabyproject?project=danki_adidas"
+
+
+def _utc_naive(value):
+    """Datas em UTC sem fuso, como o pymongo devolve as datas gravadas."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_event(item):
+    """
+    Converte um item do datalog em {"mac", "start", "code"}.
+
+    O campo `additional` é "mac,inicio,fim,duracao,codigo,modelo" (ver admin.dados_danki).
+
+    Returns:
+        dict or None: None para itens incompletos ou com data inválida.
+    """
+    parts = item.get("additional", "").split(",")
+    if len(parts) < 6 or not parts[4]:
+        return None
+    try:
+        start = _utc_naive(isoparse(parts[1]))
+    except ValueError:
+        return None
+    return {"mac": parts[0], "start": start, "code": parts[4]}
+
+
+def load_events(path=None, url=DATALOG_URL):
+    """
+    Lê os eventos de uma exportação do datalog (lista JSON ou {"data": [...]}) ou da API.
+
+    Returns:
+        list: Eventos válidos (ver parse_event).
+    """
+    if path:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        items = data.get("data", []) if isinstance(data, dict) else data
+    else:
+        import requests
+
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        items = response.json().get("data", [])
+    return [event for event in map(parse_event, items) if event]
@@ -0,0 +1,170 @@
+"""
+Campos esparsos (?fields=) e expansões (?expand=) do /shoe-details.
+
+O parse e a montagem da resposta ficam aqui para que o app Flask (app.py) e o servidor
+assíncrono do quiosque (kiosk_async.py) respondam igual; cada servidor só executa as consultas.
+As projeções são enviadas ao Mongo e as expansões não pedidas não geram consulta nenhuma:
+
+    ?fields=title,code,images&imagesLimit=3   -> 2 consultas (tênis e imagens, com $slice)
+    ?expand=colors                            -> campos básicos + cores
+    (sem parâmetros)                          -> resposta completa, como sempre foi
+"""
+
+# Campos do próprio tênis e das coleções images (uma consulta cada)
+DETAIL_FIELDS = ("code", "model", "title", "description", "images", "pinterestId", "version")
+
+# Expansões que exigem consultas adicionais
+DETAIL_EXPANSIONS = ("colors", "suggestion", "pinterest")
+
+# Campos lidos do documento em `shoes` (images/pinterest/suggestion vêm de outras coleções)
+SHOE_FIELDS = ("code", "model", "title", "description", "pinterestId", "version", "colors")
+
+# Os cards de cores usam links[1] e os de sugestão links[0]; só tênis com 2+ imagens aparecem
+RELATED_LINKS = 2
+RELATED_IMAGES_PROJECTION = {"shoeId": 1, "links": {"$slice": RELATED_LINKS}}
+
+
+class FieldsetError(ValueError):
+    """Parâmetro fields/expand com nomes desconhecidos."""
+
+
+def parse_list(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class DetailFieldset:
+    """
+    Campos e expansões pedidos para um /shoe-details.
+
+    Args:
+        fields (set): Campos básicos a devolver (subconjunto de DETAIL_FIELDS).
+        expansions (set): Expansões a resolver (subconjunto de DETAIL_EXPANSIONS).
+        images_limit (int, opcional): Máximo de links de imagem devolvidos.
+    """
+
+    def __init__(self, fields, expansions, images_limit=None):
+        self.fields = set(fields)
+        self.expansions = set(expansions)
+        self.images_limit = images_limit
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Lê fields, expand e imagesLimit da query string.
+
+        Sem nenhum dos dois parâmetros a resposta é a completa. Expansões listadas em `fields`
+        também são resolvidas; `expand` sem `fields` soma as expansões aos campos básicos.
+
+        Raises:
+            FieldsetError: Nome de campo/expansão desconhecido ou imagesLimit inválido.
+        """
+        fields = parse_list(args.get("fields"))
+        expand = parse_list(args.get("expand"))
+
+        unknown = [name for name in fields if name not in DETAIL_FIELDS + DETAIL_EXPANSIONS and name != "_id"]
+        unknown += [name for name in expand if name not in DETAIL_EXPANSIONS]
+        if unknown:
+            raise FieldsetError(
+                f"Unknown fields: {', '.join(unknown)}. Valid fields: {', '.join(DETAIL_FIELDS)}; "
+                f"valid expansions: {', '.join(DETAIL_EXPANSIONS)}."
+            )
+
+        images_limit = args.get("imagesLimit")
+        if images_limit is not None:
+            if not images_limit.isdigit():
+                raise FieldsetError("imagesLimit must be a non-negative integer.")
+            images_limit = int(images_limit)
+
+        if "fields" not in args and "expand" not in args:
+            return cls(DETAIL_FIELDS, DETAIL_EXPANSIONS, images_limit)
+        base = [name for name in fields if name in DETAIL_FIELDS] if "fields" in args else DETAIL_FIELDS
+        expansions = {name for name in fields if name in DETAIL_EXPANSIONS} | set(expand)
+        return cls(base, expansions, images_limit)
+
+    def wants(self, name):
+        return name in self.fields or name in self.expansions
+
+    def shoe_projection(self):
+        """Projeção da consulta em `shoes`: só os campos que a resposta usa."""
+        projection = {field: 1 for field in SHOE_FIELDS if field in self.fields}
+        if "colors" in self.expansions:
+            projection["colors"] = 1
+        # Projeção vazia devolveria o documento inteiro
+        return projection or {"_id": 1}
+
+    def images_projection(self):
+        """Projeção da consulta em `images`, cortando os links no servidor quando há limite."""
+        if self.images_limit is None:
+            return {"links": 1}
+        return {"links": {"$slice": self.images_limit}}
+
+    def related_ids(self, shoe, suggestion):
+        """Ids de cores e sugestões resolvidos juntos com uma consulta `$in` por coleção."""
+        ids = []
+        if "colors" in self.expansions:
+            ids.extend(shoe.get("colors", []))
+        if "suggestion" in self.expansions and suggestion:
+            ids.extend(suggestion.get("shoes", []))
+        return list(dict.fromkeys(ids))
+
+    def build(self, shoe, images=(), pinterest=(), suggestion=None, related_shoes=(), related_images=()):
+        """
+        Monta a resposta a partir dos resultados das consultas.
+
+        Args:
+            shoe (dict): Documento do tênis (com a projeção de shoe_projection).
+            images (list): Documentos de `images` do tênis.
+            pinterest (list): Documentos de `pinterest` do tênis.
+            suggestion (dict): Documento de `suggestion` do tênis.
+            related_shoes (list): Tênis de related_ids (code/model).
+            related_images (list): Documentos de `images` de related_ids, ordenados por _id.
+        """
+        result = {"_id": str(shoe["_id"])}
+        for field in ("code", "model", "title", "description"):
+            if field in self.fields:
+                result[field] = shoe.get(field)
+
+        related = {related_shoe["_id"]: related_shoe for related_shoe in related_shoes}
+        first_links = {}
+        for image in related_images:
+            first_links.setdefault(image["shoeId"], image.get("links", []))
+
+        def card(shoe_id, link_index):
+            related_shoe = related.get(shoe_id)
+            links = first_links.get(shoe_id, [])
+            if related_shoe is None or len(links) < RELATED_LINKS:
+                return None
+            return {
+                "shoeId": str(shoe_id),
+                "image": links[link_index],
+                "code": related_shoe.get("code"),
+                "model": related_shoe.get("model")
+            }
+
+        if "colors" in self.expansions:
+            result["colors"] = [detail for detail in (card(color_id, 1) for color_id in shoe.get("colors", [])) if detail]
+        if "images" in self.fields:
+            links = [link for image in images for link in image.get("links", [])]
+            result["images"] = links[:self.images_limit] if self.images_limit is not None else links
+        if "pinterest" in self.expansions:
+            result["pinterest"] = [link for document in pinterest for link in document.get("links", [])]
+        if "suggestion" in self.expansions:
+            suggested = suggestion.get("shoes", []) if suggestion else []
+            result["suggestion"] = [detail for detail in (card(shoe_id, 0) for shoe_id in suggested) if detail]
+
+        if "pinterestId" in self.fields:
+            result["pinterestId"] = shoe.get("pinterestId")
+        if "version" in self.fields:
+            result["version"] = shoe.get("version", 0)
+        return result
+
+    def project(self, full):
+        """
+        Recorta esta resposta de um payload completo já montado (ver utils/prefetch.py).
+
+        Dá o mesmo resultado de build com as consultas deste fieldset.
+        """
+        result = {key: value for key, value in full.items() if key == "_id" or self.wants(key)}
+        if "images" in result and self.images_limit is not None:
+            result["images"] = result["images"][:self.images_limit]
+        return result
@@ -0,0 +1,180 @@
+"""
+Paginação, ordenação e filtros do /shoes-and-tags no modo remoto do Tabulator.
+
+O Tabulator (list-sneaker.html) envia os parâmetros no formato:
+
+    ?page=3&size=20&sort[0][field]=model&sort[0][dir]=desc
+     &filter[0][field]=code&filter[0][type]=like&filter[0][value]=GX&q=texto
+
+Aqui eles viram o filtro, a ordenação e o skip/limit de um find em `shoe_cards`, sempre
+desempatando por _id para que as páginas não repitam nem percam tênis.
+
+A busca livre (?q=) é a mesma busca por prefixo do /shoes/search (utils/search.py), sobre o
+índice de searchKeys, ou o começo de um tagAddress; nenhuma das duas percorre a coleção.
+
+Os filtros de coluna também são prefixos indexados, nunca um "contém" sem âncora:
+    - code: o código normalizado e sem separadores começa pelo valor (codeKey);
+    - model: "starts" é o começo do modelo normalizado (modelKey); "like" exige que cada palavra
+      do valor seja começo de uma palavra do tênis (searchKeys, como o ?q=);
+    - tag: o tagAddress começa pelo valor, como digitado ou em maiúsculas;
+    - "=" continua sendo a igualdade exata no campo do card.
+"""
+import re
+from math import ceil
+
+from utils.search import code_key, model_key, search_filter
+
+# Campo pedido pelo Tabulator -> campo do card usado na ordenação
+SORT_FIELDS = {"code": "code", "model": "model", "tag": "tagCount", "tagCount": "tagCount"}
+
+# Campo pedido pelo Tabulator -> campo do card usado no filtro
+FILTER_FIELDS = {"code": "code", "model": "model", "tag": "tag.tagAddress"}
+FILTER_TYPES = ("like", "starts", "=")
+
+# Campo do card -> (chave normalizada indexada, função que normaliza o valor do filtro)
+PREFIX_KEYS = {"code": ("codeKey", code_key), "model": ("modelKey", model_key)}
+
+DEFAULT_SIZE = 20
+MAX_SIZE = 100
+
+_INDEXED_PARAM = re.compile(r"^(\w+)\[(\d+)\]\[(\w+)\]$")
+
+
+class ListQueryError(ValueError):
+    """Parâmetro de paginação, ordenação ou filtro inválido."""
+
+
+def is_paginated(args):
+    """O cliente pediu o modo paginado (sem page/size a rota devolve a lista inteira)."""
+    return "page" in args or "size" in args
+
+
+def indexed_params(args, name):
+    """
+    Lê parâmetros no formato `name[i][chave]=valor`.
+
+    Returns:
+        list: Um dict por índice, na ordem dos índices.
+    """
+    entries = {}
+    for key, value in args.items():
+        match = _INDEXED_PARAM.match(key)
+        if match and match.group(1) == name:
+            entries.setdefault(int(match.group(2)), {})[match.group(3)] = value
+    return [entries[index] for index in sorted(entries)]
+
+
+def _positive_int(args, name, default):
+    value = args.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) < 1:
+        raise ListQueryError(f"{name} must be a positive integer.")
+    return int(value)
+
+
+def _tag_prefix(text):
+    """Começo de um tagAddress, como digitado ou em maiúsculas (a forma dos endereços MAC)."""
+    prefixes = [f"^{re.escape(address)}" for address in dict.fromkeys([text, text.upper()])]
+    return {"tag.tagAddress": {"$regex": prefixes[0]} if len(prefixes) == 1
+            else {"$in": [re.compile(prefix) for prefix in prefixes]}}
+
+
+def _search_condition(text):
+    """
+    Condição da busca livre: cada palavra é prefixo de uma chave de busca (modelo, código ou
+    título, sem acentos), ou o texto é o começo de um tagAddress.
+    """
+    tag = _tag_prefix(text)
+    words = search_filter(text)
+    return {"$or": [words, tag]} if words else tag
+
+
+def _condition(field, filter_type, value):
+    """
+    Condição de um filtro de coluna (ver o início do módulo).
+
+    Returns:
+        dict or None: None quando o valor não tem nenhuma letra ou dígito para o prefixo.
+    """
+    if filter_type == "=":
+        return {field: value}
+    if field == "tag.tagAddress":
+        return _tag_prefix(value)
+    if field == "model" and filter_type == "like":
+        return search_filter(value)
+    key_field, normalize_key = PREFIX_KEYS[field]
+    key = normalize_key(value)
+    return {key_field: {"$regex": f"^{re.escape(key)}"}} if key else None
+
+
+class CardListQuery:
+    """
+    Página pedida de `shoe_cards`.
+
+    Args:
+        page (int): Página, a partir de 1.
+        size (int): Tênis por página (até MAX_SIZE).
+        sort (list): Pares (campo do card, 1 ou -1).
+        conditions (list): Condições de filtro já no formato do Mongo.
+    """
+
+    def __init__(self, page, size, sort=(), conditions=()):
+        self.page = page
+        self.size = size
+        self.sort = list(sort)
+        self.conditions = list(conditions)
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Lê page, size, sort[i][field/dir], filter[i][field/type/value] e q da query string.
+
+        Raises:
+            ListQueryError: Página/tamanho inválidos, campo ou tipo de filtro desconhecido.
+        """
+        page = _positive_int(args, "page", 1)
+        size = min(_positive_int(args, "size", DEFAULT_SIZE), MAX_SIZE)
+
+        sort = []
+        for entry in indexed_params(args, "sort"):
+            field = SORT_FIELDS.get(entry.get("field"))
+            if field is None:
+                raise ListQueryError(f"Cannot sort by {entry.get('field')}. Valid fields: {', '.join(SORT_FIELDS)}.")
+            sort.append((field, -1 if entry.get("dir") == "desc" else 1))
+
+        conditions = []
+        for entry in indexed_params(args, "filter"):
+            field = FILTER_FIELDS.get(entry.get("field"))
+            filter_type = entry.get("type", "like")
+            if field is None:
+                raise ListQueryError(f"Cannot filter by {entry.get('field')}. Valid fields: {', '.join(FILTER_FIELDS)}.")
+            if filter_type not in FILTER_TYPES:
+                raise ListQueryError(f"Unknown filter type {filter_type}. Valid types: {', '.join(FILTER_TYPES)}.")
+            condition = _condition(field, filter_type, entry["value"]) if entry.get("value") else None
+            if condition:
+                conditions.append(condition)
+
+        search = (args.get("q") or "").strip()
+        if search:
+            conditions.append(_search_condition(search))
+        return cls(page, size, sort, conditions)
+
+    def match(self, base=None):
+        """Filtro do find: a consulta base da rota (ex.: hasTag) e os filtros pedidos."""
+        conditions = ([base] if base else []) + self.conditions
+        if not conditions:
+            return {}
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def sort_spec(self):
+        """Ordenação pedida com _id como desempate (e ordem padrão)."""
+        fields = [field for field, _ in self.sort]
+        return self.sort + ([] if "_id" in fields else [("_id", 1)])
+
+    @property
+    def skip(self):
+        return (self.page - 1) * self.size
+
+    def last_page(self, total):
+        return max(1, ceil(total / self.size))
@@ -0,0 +1,169 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from flask import Response, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Registry owned by this module, so /metrics only exposes the application's own series
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "danki_http_request_duration_seconds",
+    "HTTP request latency by endpoint, method and status.",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY
+)
+REQUEST_MONGO_ROUND_TRIPS = Histogram(
+    "danki_http_request_mongo_round_trips",
+    "MongoDB commands issued while serving one request; a rising count flags N+1 query patterns.",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+    registry=REGISTRY
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "danki_mongo_command_duration_seconds",
+    "MongoDB command latency by command, collection and the endpoint that issued it.",
+    ["command", "collection", "endpoint"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY
+)
+MONGO_DOCS_RETURNED = Counter(
+    "danki_mongo_docs_returned_total",
+    "Documents returned by MongoDB commands.",
+    ["command", "collection", "endpoint"],
+    registry=REGISTRY
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "danki_mongo_command_failures_total",
+    "MongoDB commands that failed.",
+    ["command", "collection", "endpoint"],
+    registry=REGISTRY
+)
+
+# Label used for commands issued outside a request (boot, background threads)
+NO_REQUEST = "<none>"
+
+
+class RequestStats:
+    """Per-request accumulator shared between the Flask hooks and the command listener."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.mongo_round_trips = 0
+        self.mongo_seconds = 0.0
+
+
+# The listener runs in the thread (or task) that issued the command, so the current request
+# is visible to it through this context variable
+_current_request = ContextVar("danki_current_request", default=None)
+
+
+def current_request_stats():
+    """Return the RequestStats of the request being served, or None outside a request."""
+    return _current_request.get()
+
+
+def command_collection(command_name, command):
+    """Extract the collection a command targets (empty for database level commands)."""
+    if command_name == "getMore":
+        return command.get("collection", "")
+    target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+def docs_returned(reply):
+    """Count the documents carried by a command reply."""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if reply.get("value") is not None:  # findAndModify
+        return 1
+    return 0
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    pymongo command listener recording duration and returned documents per command.
+
+    Each command is labelled with the endpoint of the request that issued it and counted
+    towards that request's Mongo round trips.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        stats = _current_request.get()
+        if stats is not None:
+            stats.mongo_round_trips += 1
+        self._pending[event.request_id] = (
+            command_collection(event.command_name, event.command),
+            stats
+        )
+
+    def _finish(self, event):
+        collection, stats = self._pending.pop(event.request_id, ("", None))
+        endpoint = stats.endpoint if stats is not None else NO_REQUEST
+        seconds = event.duration_micros / 1e6
+        if stats is not None:
+            stats.mongo_seconds += seconds
+        MONGO_COMMAND_LATENCY.labels(event.command_name, collection, endpoint).observe(seconds)
+        return collection, endpoint
+
+    def succeeded(self, event):
+        collection, endpoint = self._finish(event)
+        returned = docs_returned(event.reply)
+        if returned:
+            MONGO_DOCS_RETURNED.labels(event.command_name, collection, endpoint).inc(returned)
+
+    def failed(self, event):
+        collection, endpoint = self._finish(event)
+        MONGO_COMMAND_FAILURES.labels(event.command_name, collection, endpoint).inc()
+
+
+def request_endpoint():
+    """Route pattern of the current request (e.g. /shoes/<id>), keeping label cardinality bounded."""
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_metrics(app):
+    """
+    Register the request hooks and the /metrics route on a Flask app.
+
+    Args:
+        app (Flask): Application to instrument. Its MongoClient must be created with
+            `event_listeners=[MongoCommandMetrics()]` for the Mongo series to be filled.
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        request.environ["danki.metrics_token"] = _current_request.set(RequestStats(request_endpoint()))
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = _current_request.get()
+        if stats is not None:
+            REQUEST_LATENCY.labels(stats.endpoint, request.method, str(response.status_code)).observe(
+                time.perf_counter() - stats.started
+            )
+            REQUEST_MONGO_ROUND_TRIPS.labels(stats.endpoint).observe(stats.mongo_round_trips)
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exc):
+        token = request.environ.pop("danki.metrics_token", None)
+        if token is not None:
+            _current_request.reset(token)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Expose the collected metrics in Prometheus text format (per worker process)."""
+        return Response(generate_latest(REGISTRY), mimetype=CONTENT_TYPE_LATEST)
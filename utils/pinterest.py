@@ -1,10 +1,11 @@
 import os
 import requests
-import boto3
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from bson import ObjectId
 import logging
 from dotenv import load_dotenv
+from utils.changes import record_change
+from utils.shoe_cards import refresh_for
 
 load_dotenv()
 
@@ -30,18 +31,32 @@ SHOE_MAPPING = {
 S3_BUCKET_NAME = "dankiadidas"
 S3_FOLDER_PREFIX = "PINTEREST_IMAGES/"
 
-# Inicializa cliente S3
-s3_client = boto3.client("s3")
-
 # Configurações do MongoDB
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = "danki-adidas"
 COLLECTION_NAME = "pinterest"
 
-# Inicializa cliente MongoDB
-mongo_client = MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-pinterest_collection = db[COLLECTION_NAME]
+# Clientes S3 e MongoDB são criados no primeiro uso, e não no import do módulo
+_s3_client = None
+_db = None
+
+
+def get_s3_client():
+    """Retorna o cliente S3, importando o boto3 apenas na primeira chamada."""
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client("s3")
+    return _s3_client
+
+
+def get_db():
+    """Retorna o banco do MongoDB usado quando o módulo roda fora do servidor Flask."""
+    global _db
+    if _db is None:
+        _db = MongoClient(MONGO_URI)[DB_NAME]
+    return _db
+
 
 PINTEREST_TOKEN=os.getenv("PINTEREST_TOKEN")
 
@@ -111,6 +126,7 @@ def upload_images_to_s3(image_paths, folder_name):
     Returns:
         list: Lista de URLs das imagens no bucket S3.
     """
+    s3_client = get_s3_client()
     uploaded_urls = []
     for image_path in image_paths:
         try:
@@ -123,25 +139,33 @@ def upload_images_to_s3(image_paths, folder_name):
     return uploaded_urls
 
 
-def save_to_mongo(shoe_id, image_links):
+def save_to_mongo(shoe_id, image_links, db=None):
     """
     Salva ou atualiza documentos no MongoDB.
 
     Args:
         shoe_id (str): ID do tênis na coleção shoes.
         image_links (list): Lista de links de imagens.
+        db (Database, opcional): Banco já conectado (ex.: o do app Flask). Se omitido,
+            uma conexão própria é aberta no primeiro uso.
     """
+    db = db if db is not None else get_db()
+    pinterest_collection = db[COLLECTION_NAME]
     document = {
         "shoeId": ObjectId(shoe_id),
         "links": image_links,
     }
     try:
-        pinterest_collection.update_one(
+        saved = pinterest_collection.find_one_and_update(
             {"shoeId": ObjectId(shoe_id)},
             {"$set": document},
-            upsert=True
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
         logger.info(f"Documento salvo para shoeId: {shoe_id}")
+        refresh_for(db, COLLECTION_NAME, document)
+        record_change(db, COLLECTION_NAME, saved["_id"])
     except Exception as e:
         logger.error(f"Erro ao salvar documento no MongoDB para shoeId {shoe_id}: {e}")
 
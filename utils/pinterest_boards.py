@@ -0,0 +1,167 @@
+"""
+Catálogo dos boards do Pinterest para o dropdown do detalhe do tênis (/pinterest/boards).
+
+A API v5 devolve os boards paginados por `bookmark`; fetch_boards percorre todas as páginas.
+A lista fica em cache com TTL:
+    - em memória no processo e em META_COLLECTION, para que um worker recém-iniciado (ou outro
+      worker) responda sem chamar o Pinterest;
+    - vencido o TTL, a lista antiga continua sendo servida e uma thread em segundo plano busca
+      a nova (uma por processo de cada vez); uma falha é registrada no log e a próxima
+      tentativa espera RETRY_SECONDS, dobrando a cada falha seguida até o TTL, para que um
+      Pinterest fora do ar não seja chamado a cada abertura do detalhe.
+Só a primeiríssima requisição, sem nada em cache em lugar nenhum, espera o Pinterest.
+
+O filtro `q` é aplicado no servidor: sem acentos e sem diferenciar maiúsculas, por trecho do
+nome ou pelo id exato do board.
+
+Configuração: PINTEREST_TOKEN e PINTEREST_BOARDS_TTL (segundos, padrão 600).
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from database import META_COLLECTION
+from utils.search import normalize
+
+logger = logging.getLogger(__name__)
+
+BOARDS_URL = "https://api.pinterest.com/v5/boards"
+
+# Documento em META_COLLECTION com a última lista completa
+BOARDS_CACHE_ID = "pinterest_boards"
+
+PAGE_SIZE = 250  # máximo aceito pela API
+MAX_PAGES = 200
+TTL_SECONDS = 600
+RETRY_SECONDS = 30
+BOARDS_LIMIT = 50
+REQUEST_TIMEOUT = 10
+
+
+def fetch_boards(token=None, page_size=PAGE_SIZE):
+    """
+    Busca todos os boards da conta, seguindo o `bookmark` de cada página.
+
+    Returns:
+        list: Boards {"id", "name", "image_cover_url"} na ordem da API.
+    """
+    import requests
+
+    token = token or os.getenv("PINTEREST_TOKEN")
+    headers = {"Authorization": f"Bearer {token}"}
+    boards, bookmark = [], None
+    for _ in range(MAX_PAGES):
+        params = {"page_size": page_size}
+        if bookmark:
+            params["bookmark"] = bookmark
+        response = requests.get(BOARDS_URL, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        for board in data.get("items", []):
+            boards.append({
+                "id": board.get("id"),
+                "name": board.get("name"),
+                "image_cover_url": (board.get("media") or {}).get("image_cover_url", ""),
+            })
+        bookmark = data.get("bookmark")
+        if not bookmark:
+            return boards
+    logger.warning(f"Boards do Pinterest truncados em {MAX_PAGES} páginas.")
+    return boards
+
+
+def filter_boards(boards, q=None):
+    """Boards cujo nome contém todas as palavras de `q` (sem acentos) ou cujo id é `q`."""
+    words = normalize(q or "").split()
+    if not words:
+        return list(boards)
+    return [board for board in boards
+            if board.get("id") == q.strip() or all(word in normalize(board.get("name") or "") for word in words)]
+
+
+class BoardCatalog:
+    """Lista de boards em cache com TTL e atualização em segundo plano."""
+
+    def __init__(self, db, fetch=fetch_boards, ttl=None):
+        self.db = db
+        self.fetch = fetch
+        self.ttl = float(os.getenv("PINTEREST_BOARDS_TTL", TTL_SECONDS)) if ttl is None else ttl
+        self._boards = None
+        self._fetched_at = None  # datetime UTC
+        self._failures = 0  # falhas seguidas da atualização em segundo plano
+        self._retry_at = None  # datetime UTC antes do qual não se tenta de novo
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def _age(self):
+        return (datetime.now(timezone.utc) - self._fetched_at).total_seconds()
+
+    def _load_stored(self):
+        stored = self.db[META_COLLECTION].find_one({"_id": BOARDS_CACHE_ID})
+        if stored:
+            fetched_at = stored["fetchedAt"]
+            self._boards = stored["items"]
+            self._fetched_at = fetched_at if fetched_at.tzinfo else fetched_at.replace(tzinfo=timezone.utc)
+
+    def refresh(self):
+        """Busca a lista completa agora e grava no cache (memória e banco)."""
+        started = time.perf_counter()
+        boards = self.fetch()
+        fetched_at = datetime.now(timezone.utc)
+        self.db[META_COLLECTION].update_one({"_id": BOARDS_CACHE_ID},
+                                            {"$set": {"items": boards, "fetchedAt": fetched_at}}, upsert=True)
+        with self._lock:
+            self._boards, self._fetched_at = boards, fetched_at
+            self._failures, self._retry_at = 0, None
+        logger.info(f"{len(boards)} boards do Pinterest carregados em {time.perf_counter() - started:.2f}s.")
+        return boards
+
+    def _refresh_in_background(self):
+        # Uma atualização por processo de cada vez; as demais requisições seguem com a lista antiga
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    delay = min(RETRY_SECONDS * 2 ** (self._failures - 1), max(self.ttl, RETRY_SECONDS))
+                    self._retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+                logger.error(f"Erro ao atualizar os boards do Pinterest (nova tentativa em {delay:.0f}s): {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="pinterest-boards-refresh", daemon=True).start()
+
+    def boards(self):
+        """
+        Lista atual de boards, sem esperar o Pinterest sempre que houver algo em cache.
+
+        Returns:
+            tuple: (boards, fetchedAt, stale), com stale=True quando o TTL venceu e a nova lista
+            está sendo buscada em segundo plano (ou aguarda a próxima tentativa após uma falha).
+        """
+        with self._lock:
+            if self._boards is None:
+                self._load_stored()
+            boards, fetched_at, retry_at = self._boards, self._fetched_at, self._retry_at
+        if boards is None:
+            with self._refreshing:
+                if self._boards is None:
+                    self.refresh()
+            return self._boards, self._fetched_at, False
+        stale = self._age() > self.ttl
+        if stale and (retry_at is None or datetime.now(timezone.utc) >= retry_at):
+            self._refresh_in_background()
+        return boards, fetched_at, stale
+
+
+def board_catalog(app):
+    """BoardCatalog do app Flask, criado no primeiro uso."""
+    if "pinterest_boards" not in app.extensions:
+        app.extensions["pinterest_boards"] = BoardCatalog(app.db)
+    return app.extensions["pinterest_boards"]
@@ -0,0 +1,195 @@
+"""
+Pré-carga em memória do /shoe-details dos tênis mais escaneados.
+
+Poucos modelos (SAMBA OG, GAZELLE...) concentram a maior parte das leituras dos quiosques. O
+DetailPrefetcher ordena os tênis pelo número de leituras na janela recente do datalog (o feed
+exibido em /dados-danki), monta o payload completo dos PREFETCH_TOP_N primeiros com uma consulta
+por coleção (snapshot.build_details) e o guarda no processo. O /shoe-details?id= desses tênis
+recorta do payload os campos pedidos (DetailFieldset.project) e só lê do Mongo o cursor do
+change log, em vez das cinco consultas de sempre.
+
+    - A carga roda em uma thread ao subir o app e de novo a cada PREFETCH_INTERVAL segundos,
+      com o ranking recalculado; uma falha só é registrada no log e o cache anterior continua.
+    - Validade: o cache guarda o seq do change log (utils/changes.py) lido antes da montagem.
+      Qualquer escrita no catálogo avança o seq: a partir daí o cache é ignorado (a rota monta a
+      resposta como sempre) e os mesmos tênis são remontados em segundo plano, uma vez por
+      processo de cada vez.
+    - O cache tem no máximo PREFETCH_TOP_N payloads por processo.
+
+Configuração: PREFETCH_TOP_N (padrão 200; 0 desliga), PREFETCH_INTERVAL (segundos, padrão 900),
+PREFETCH_WINDOW_DAYS (padrão 7) e PREFETCH_DATALOG_FILE (exportação do datalog no lugar da API).
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from prometheus_client import Counter as MetricCounter
+
+from utils.changes import head_seq, read_head_seq
+from utils.datalog import load_events
+from utils.metrics import REGISTRY
+from utils.reads import run
+from utils.snapshot import build_details
+
+logger = logging.getLogger(__name__)
+
+TOP_N = 200
+INTERVAL = 900
+WINDOW = timedelta(days=7)
+BATCH_SIZE = 100
+
+PREFETCH_LOOKUPS = MetricCounter(
+    "danki_detail_prefetch_lookups_total",
+    "Shoe detail lookups by id, by prefetch cache outcome (hit, miss, stale).",
+    ["outcome"],
+    registry=REGISTRY
+)
+
+
+def rank_shoes(db, events, top_n=TOP_N, window=WINDOW):
+    """
+    Tênis mais escaneados na janela que termina no evento mais recente do feed.
+
+    Args:
+        events (list): Eventos de utils.datalog.parse_event.
+
+    Returns:
+        list: Até `top_n` ObjectIds, do mais escaneado para o menos.
+    """
+    if not events:
+        return []
+    since = max(event["start"] for event in events) - window
+    counts = Counter(event["code"] for event in events if event["start"] >= since)
+    codes = [code for code, _ in counts.most_common()]
+    ids = {}
+    # Mais códigos do que top_n: alguns do datalog podem não existir mais no catálogo
+    for start in range(0, len(codes), BATCH_SIZE):
+        for shoe in db["shoes"].find({"code": {"$in": codes[start:start + BATCH_SIZE]}}, {"code": 1}):
+            ids.setdefault(shoe["code"], shoe["_id"])
+        if len(ids) >= top_n:
+            break
+    return [ids[code] for code in codes if code in ids][:top_n]
+
+
+class DetailPrefetcher:
+    """Payloads completos do /shoe-details dos tênis mais escaneados, válidos até a próxima escrita."""
+
+    def __init__(self, db, load_events=load_events, top_n=TOP_N, window=WINDOW):
+        self.db = db
+        self.load_events = load_events
+        self.top_n = top_n
+        self.window = window
+        self._ranked = []
+        self._details = {}  # str(shoeId) -> payload completo
+        self._seq = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def reload(self):
+        """Remonta os payloads dos tênis do ranking atual."""
+        # Lido antes das consultas: uma escrita concorrente deixa o cache já marcado como velho
+        seq = head_seq(self.db)
+        details = {}
+        for start in range(0, len(self._ranked), BATCH_SIZE):
+            batch = build_details(self.db, self._ranked[start:start + BATCH_SIZE])
+            details.update((str(shoe_id), detail) for shoe_id, detail in batch.items())
+        with self._lock:
+            self._details, self._seq = details, seq
+        return len(details)
+
+    def refresh(self):
+        """Recalcula o ranking a partir do datalog e remonta os payloads."""
+        started = time.perf_counter()
+        self._ranked = rank_shoes(self.db, self.load_events(), self.top_n, self.window)
+        count = self.reload()
+        logger.info(f"{count} detalhes de tênis pré-carregados em {time.perf_counter() - started:.2f}s.")
+        return count
+
+    def _reload_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Erro ao remontar os detalhes pré-carregados: {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="detail-prefetch-reload", daemon=True).start()
+
+    def get(self, shoe_id):
+        """
+        Payload completo pré-carregado do tênis, se houver e ainda estiver válido.
+
+        Returns:
+            dict or None: None quando o tênis não está no cache ou o catálogo mudou desde a montagem.
+        """
+        return run(self.lookup(shoe_id), self.db)
+
+    def lookup(self, shoe_id):
+        """
+        Plano (utils/reads.py) de `get`: o cursor do change log só é lido quando o tênis está no
+        cache, pelo banco de quem executa o plano (pymongo no app.py, motor no kiosk_async.py).
+        """
+        with self._lock:
+            full, seq = self._details.get(shoe_id), self._seq
+        if full is None:
+            PREFETCH_LOOKUPS.labels("miss").inc()
+            return None
+        if (yield from read_head_seq()) != seq:
+            PREFETCH_LOOKUPS.labels("stale").inc()
+            self._reload_in_background()
+            return None
+        PREFETCH_LOOKUPS.labels("hit").inc()
+        return full
+
+    def start(self, interval=INTERVAL):
+        """Carrega agora e a cada `interval` segundos, em uma thread em segundo plano."""
+        def run():
+            while True:
+                with self._refreshing:
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        logger.error(f"Erro ao pré-carregar os detalhes mais escaneados: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=run, name="detail-prefetch", daemon=True).start()
+
+
+def create_prefetcher(db):
+    """
+    Cria o DetailPrefetcher configurado pelo ambiente e inicia a carga periódica.
+
+    Args:
+        db: Banco síncrono (pymongo) usado pelas cargas em segundo plano.
+
+    Returns:
+        DetailPrefetcher or None: None quando PREFETCH_TOP_N é 0.
+    """
+    top_n = int(os.getenv("PREFETCH_TOP_N", TOP_N))
+    if top_n <= 0:
+        return None
+    path = os.getenv("PREFETCH_DATALOG_FILE")
+    window = timedelta(days=float(os.getenv("PREFETCH_WINDOW_DAYS", WINDOW.days)))
+    prefetcher = DetailPrefetcher(db, load_events=lambda: load_events(path), top_n=top_n, window=window)
+    prefetcher.start(float(os.getenv("PREFETCH_INTERVAL", INTERVAL)))
+    return prefetcher
+
+
+def init_prefetch(app, db):
+    """
+    Cria o DetailPrefetcher do app Flask (em app.extensions) e inicia a carga periódica.
+
+    Returns:
+        DetailPrefetcher or None: None quando PREFETCH_TOP_N é 0.
+    """
+    prefetcher = create_prefetcher(db)
+    if prefetcher is not None:
+        app.extensions["detail_prefetch"] = prefetcher
+    return prefetcher
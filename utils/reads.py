@@ -0,0 +1,53 @@
+"""
+Leituras do Mongo descritas como dados, para que a mesma lógica rode com o pymongo (app.py) e
+com o motor (kiosk_async.py).
+
+Um plano é um gerador que produz listas de Read e recebe de volta a lista dos resultados, na
+mesma ordem; o valor de retorno do gerador é o resultado do plano. As leituras de uma mesma lista
+são independentes entre si: `run` as executa uma a uma, `run_async` concorrentemente.
+
+    def plano(shoe_id):
+        shoe, images = yield [Read("shoes", {"_id": shoe_id}, one=True), Read("images", {"shoeId": shoe_id})]
+        return {"shoe": shoe, "images": images}
+
+Planos se compõem com `yield from` (ver catalog.detail_plan e DetailPrefetcher.lookup).
+"""
+import asyncio
+from collections import namedtuple
+
+# one: find_one (documento ou None); senão find (lista), ordenado por `sort` ((campo, direção), ...)
+Read = namedtuple("Read", "collection filter projection one sort", defaults=(None, False, None))
+
+
+def _cursor(db, read):
+    cursor = db[read.collection].find(read.filter, read.projection)
+    return cursor.sort(list(read.sort)) if read.sort else cursor
+
+
+def run(plan, db):
+    """Executa um plano com um banco síncrono (pymongo ou mongomock)."""
+    results = None
+    try:
+        while True:
+            reads = plan.send(results)
+            results = [db[read.collection].find_one(read.filter, read.projection) if read.one
+                       else list(_cursor(db, read)) for read in reads]
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _read_async(db, read):
+    if read.one:
+        return await db[read.collection].find_one(read.filter, read.projection)
+    return await _cursor(db, read).to_list(None)
+
+
+async def run_async(plan, db):
+    """Executa um plano com um banco do motor; cada lista de leituras vai junta (asyncio.gather)."""
+    results = None
+    try:
+        while True:
+            reads = plan.send(results)
+            results = list(await asyncio.gather(*(_read_async(db, read) for read in reads)))
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,196 @@
+"""
+Inventário do bucket S3 de imagens e remoção dos objetos órfãos.
+
+Imagens trocadas no /update-shoe-full ou ressincronizadas do Pinterest deixam de ser citadas nos
+documentos, mas continuavam no bucket. Este módulo:
+
+    - lista o bucket inteiro com o paginador do list_objects_v2 (1.000 chaves por página, sem
+      carregar a listagem toda na memória) e grava o inventário em `s3_inventory`
+      ({bucket, key, size, lastModified, scan}), uma página por insert_many; a varredura nova
+      substitui a anterior do mesmo bucket/prefixo;
+    - compara o inventário com todas as URLs de `images.links` e `pinterest.links`;
+    - apaga os órfãos com delete_objects, 1.000 chaves por chamada.
+
+Objetos mais novos que `min_age` (padrão 24 h) nunca são órfãos: o admin envia a imagem
+(/sneaker/upload-file) antes de salvar o tênis que a cita. Sem --delete só o relatório é gerado.
+
+Uso (a partir da raiz do repositório, com MONGO_URI e as credenciais AWS no ambiente ou no .env):
+    python -m utils.s3_inventory reconcile --bucket dankiadidas                # relatório
+    python -m utils.s3_inventory reconcile --bucket dankiadidas --delete       # apaga os órfãos
+    python -m utils.s3_inventory reconcile --bucket dankiadidas --prefix pins/ --min-age-hours 72
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote
+
+from bson import ObjectId
+
+from utils.boto import key_from_url
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_COLLECTION = "s3_inventory"
+
+# Coleções com URLs de objetos do bucket no array `links`
+LINK_SOURCES = ("images", "pinterest")
+
+PAGE_SIZE = 1000
+DELETE_BATCH = 1000  # máximo aceito pelo delete_objects
+MIN_AGE = timedelta(hours=24)
+
+
+def iter_objects(s3, bucket, prefix="", page_size=PAGE_SIZE):
+    """
+    Percorre todos os objetos do bucket (ou do prefixo), página por página.
+
+    Yields:
+        dict: {"key", "size", "lastModified"} de cada objeto.
+    """
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, PaginationConfig={"PageSize": page_size}):
+        for item in page.get("Contents", []):
+            yield {"key": item["Key"], "size": item["Size"], "lastModified": item["LastModified"]}
+
+
+def sync_inventory(db, s3, bucket, prefix="", page_size=PAGE_SIZE):
+    """
+    Grava em `s3_inventory` uma varredura nova do bucket e descarta a anterior.
+
+    Returns:
+        dict: {"scan" (ObjectId da varredura), "objects", "bytes"}.
+    """
+    scan = ObjectId()
+    objects = size = 0
+    batch = []
+    for item in iter_objects(s3, bucket, prefix, page_size):
+        objects += 1
+        size += item["size"]
+        batch.append({"bucket": bucket, **item, "scan": scan})
+        if len(batch) >= page_size:
+            db[INVENTORY_COLLECTION].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db[INVENTORY_COLLECTION].insert_many(batch, ordered=False)
+    # Só depois da listagem completa: uma falha no meio mantém a varredura anterior
+    db[INVENTORY_COLLECTION].delete_many({"bucket": bucket, "key": {"$regex": "^" + re.escape(prefix)},
+                                          "scan": {"$ne": scan}})
+    return {"scan": scan, "objects": objects, "bytes": size}
+
+
+def referenced_keys(db, bucket):
+    """
+    Chaves do bucket citadas em `images.links` e `pinterest.links`.
+
+    As URLs são gravadas com a chave crua ou codificada (%20...); as duas formas entram no
+    conjunto para que nenhuma imagem citada seja tomada por órfã.
+    """
+    keys = set()
+    for collection in LINK_SOURCES:
+        for document in db[collection].find({"links.0": {"$exists": True}}, {"links": 1, "_id": 0}):
+            for link in document["links"]:
+                key = key_from_url(link, bucket) if isinstance(link, str) else None
+                if key:
+                    keys.add(key)
+                    keys.add(unquote(key))
+    return keys
+
+
+def _aware(moment):
+    # O driver devolve datas sem fuso (UTC) a menos que o cliente use tz_aware
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def delete_keys(s3, bucket, keys):
+    """
+    Apaga as chaves com delete_objects, DELETE_BATCH por chamada.
+
+    Returns:
+        tuple: (chaves apagadas, erros {"key", "code", "message"}).
+    """
+    deleted, errors = [], []
+    for start in range(0, len(keys), DELETE_BATCH):
+        batch = keys[start:start + DELETE_BATCH]
+        response = s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True})
+        failed = {error["Key"]: error for error in response.get("Errors", [])}
+        errors.extend({"key": key, "code": error.get("Code"), "message": error.get("Message")}
+                      for key, error in failed.items())
+        deleted.extend(key for key in batch if key not in failed)
+    return deleted, errors
+
+
+def reconcile(db, s3, bucket, prefix="", delete=False, min_age=MIN_AGE, now=None):
+    """
+    Sincroniza o inventário, encontra os objetos que nenhum documento cita e, com `delete`, os apaga.
+
+    Args:
+        db: Banco da aplicação.
+        s3: Cliente boto3 do S3.
+        bucket (str): Bucket das imagens.
+        prefix (str): Só considera chaves com este prefixo.
+        delete (bool): Apaga os órfãos; sem ele só o relatório é gerado.
+        min_age (timedelta): Objetos mais novos que isto não são considerados órfãos.
+        now (datetime, opcional): Momento de referência para min_age.
+
+    Returns:
+        dict: {"objects", "bytes", "referenced", "orphans", "orphanBytes", "recent", "deleted", "errors"}.
+    """
+    scanned = sync_inventory(db, s3, bucket, prefix)
+    referenced = referenced_keys(db, bucket)
+    cutoff = (now or datetime.now(timezone.utc)) - min_age
+
+    orphans, orphan_bytes, recent = [], 0, 0
+    for item in db[INVENTORY_COLLECTION].find({"scan": scanned["scan"]}, {"key": 1, "size": 1, "lastModified": 1}):
+        if item["key"] in referenced:
+            continue
+        if _aware(item["lastModified"]) > cutoff:
+            recent += 1
+            continue
+        orphans.append(item["key"])
+        orphan_bytes += item["size"]
+
+    report = {"objects": scanned["objects"], "bytes": scanned["bytes"], "referenced": len(referenced),
+              "orphans": len(orphans), "orphanBytes": orphan_bytes, "recent": recent, "deleted": 0, "errors": []}
+    if delete and orphans:
+        deleted, errors = delete_keys(s3, bucket, orphans)
+        for start in range(0, len(deleted), DELETE_BATCH):
+            db[INVENTORY_COLLECTION].delete_many({"scan": scanned["scan"], "key": {"$in": deleted[start:start + DELETE_BATCH]}})
+        report.update({"deleted": len(deleted), "errors": errors})
+    logger.info(f"s3://{bucket}/{prefix}: {report['objects']} objetos, {report['orphans']} órfãos "
+                f"({report['orphanBytes']} bytes), {report['deleted']} apagados.")
+    return report
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from database import create_mongo_client
+    from utils.boto import get_s3_client
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["reconcile"])
+    parser.add_argument("--bucket", default=os.getenv("TEST_S3_BUCKET"))
+    parser.add_argument("--prefix", default="")
+    parser.add_argument("--delete", action="store_true", help="Apaga os órfãos (sem ele, só o relatório)")
+    parser.add_argument("--min-age-hours", type=float, default=MIN_AGE.total_seconds() / 3600)
+    args = parser.parse_args()
+
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        parser.error("MONGO_URI não definido")
+    if not args.bucket:
+        parser.error("--bucket não informado (nem TEST_S3_BUCKET)")
+    report = reconcile(create_mongo_client(uri)["danki-adidas"], get_s3_client(), args.bucket, args.prefix,
+                       delete=args.delete, min_age=timedelta(hours=args.min_age_hours))
+    for error in report["errors"]:
+        logger.warning(f"{error['key']}: {error['code']} {error['message']}")
+    print(json.dumps({key: value for key, value in report.items() if key != "errors"}))
+
+
+if __name__ == "__main__":
+    main()
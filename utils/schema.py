@@ -0,0 +1,275 @@
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from bson.int64 import Int64
+
+from database import SCHEMA_DIR, SCHEMAS, load_schema
+
+# Tipos BSON aceitos em "bsonType" e os tipos Python equivalentes
+BSON_TYPES = {
+    "object": (dict,),
+    "array": (list, tuple),
+    "string": (str,),
+    "objectId": (ObjectId,),
+    "bool": (bool,),
+    "int": (int,),
+    "long": (int, Int64),
+    "double": (float,),
+    "decimal": (float,),
+    "number": (int, float),
+    "date": (datetime,),
+    "null": (type(None),),
+}
+NUMERIC_TYPES = ("int", "long", "double", "decimal", "number")
+
+
+def load_collection_schema(collection):
+    """Carrega o $jsonSchema aplicado como validador da coleção (ver database.SCHEMAS)."""
+    return load_schema(os.path.join(SCHEMA_DIR, SCHEMAS[collection]))
+
+
+def matches_type(value, bson_type):
+    """Indica se `value` é do tipo BSON informado (nome ou lista de nomes)."""
+    if isinstance(bson_type, list):
+        return any(matches_type(value, item) for item in bson_type)
+    # bool é subclasse de int em Python, mas não no BSON
+    if isinstance(value, bool) and bson_type in NUMERIC_TYPES:
+        return False
+    return isinstance(value, BSON_TYPES[bson_type])
+
+
+def _compile(schema, required=True):
+    """
+    Compila um (sub-)schema em duas funções, com as palavras-chave lidas uma vez aqui e não a
+    cada documento:
+        ok(value) -> bool, sem montar caminhos nem listas (o caso comum: documento válido);
+        errors(value, path) -> lista de erros, cada um com o caminho do valor.
+    Devolve também a tupla de tipos Python quando o nó só restringe o tipo (e bool não é um
+    caso especial), para que arrays desses itens sejam verificados sem uma chamada por item.
+
+    Cobre o subconjunto de $jsonSchema usado em schemas/*.json: bsonType, required, properties,
+    additionalProperties (booleano), items, enum, minItems/maxItems e minLength/maxLength.
+    Outras palavras-chave são ignoradas e continuam sendo verificadas pelo validador do servidor.
+    """
+    plain_types = None
+    if "bsonType" in schema:
+        bson_type = schema["bsonType"]
+        names = bson_type if isinstance(bson_type, list) else [bson_type]
+        types = tuple(python_type for name in names for python_type in BSON_TYPES[name])
+        bool_ok = matches_type(True, bson_type)
+        if bool_ok == isinstance(True, types):
+            plain_types = types
+
+            def type_ok(document):
+                return isinstance(document, types)
+        else:
+            def type_ok(document):
+                return bool_ok if type(document) is bool else isinstance(document, types)
+    else:
+        bson_type = type_ok = None
+
+    enum = schema.get("enum")
+    required_fields = schema.get("required", []) if required else []
+    properties = {field: _compile(sub) for field, sub in schema.get("properties", {}).items()}
+    closed = schema.get("additionalProperties") is False
+    min_items, max_items = schema.get("minItems", 0), schema.get("maxItems")
+    items = _compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+    min_length, max_length = schema.get("minLength", 0), schema.get("maxLength")
+
+    def dict_ok(document):
+        for field in required_fields:
+            if field not in document:
+                return False
+        for field, value in document.items():
+            compiled = properties.get(field)
+            if compiled is not None:
+                if not compiled[0](value):
+                    return False
+            elif closed and field != "_id":
+                return False
+        return True
+
+    def dict_errors(document, path):
+        errors = []
+        prefix = path + "." if path else ""
+        for field in required_fields:
+            if field not in document:
+                errors.append(f"{prefix}{field}: campo obrigatório ausente")
+        for field, value in document.items():
+            compiled = properties.get(field)
+            if compiled is not None:
+                errors.extend(compiled[1](value, prefix + field))
+            elif closed and field != "_id":
+                errors.append(f"{prefix}{field}: campo não permitido")
+        return errors
+
+    item_types = items[2] if items is not None else None
+
+    def list_ok(document):
+        if len(document) < min_items or (max_items is not None and len(document) > max_items):
+            return False
+        if item_types is not None:
+            for item in document:
+                if not isinstance(item, item_types):
+                    return False
+            return True
+        return items is None or all(map(items[0], document))
+
+    def list_errors(document, path):
+        errors = []
+        label = path or "documento"
+        if len(document) < min_items:
+            errors.append(f"{label}: mínimo de {min_items} itens")
+        if max_items is not None and len(document) > max_items:
+            errors.append(f"{label}: máximo de {max_items} itens")
+        if items is not None:
+            for index, item in enumerate(document):
+                errors.extend(items[1](item, f"{path}[{index}]"))
+        return errors
+
+    def str_ok(document):
+        return len(document) >= min_length and (max_length is None or len(document) <= max_length)
+
+    def str_errors(document, path):
+        errors = []
+        label = path or "documento"
+        if len(document) < min_length:
+            errors.append(f"{label}: mínimo de {min_length} caracteres")
+        if max_length is not None and len(document) > max_length:
+            errors.append(f"{label}: máximo de {max_length} caracteres")
+        return errors
+
+    # Só os ramos que o schema usa entram nas funções compiladas
+    branches = []
+    if required_fields or properties or closed:
+        branches.append(((dict,), dict_ok, dict_errors))
+    if min_items or max_items is not None or items is not None:
+        branches.append(((list, tuple), list_ok, list_errors))
+    if min_length or max_length is not None:
+        branches.append(((str,), str_ok, str_errors))
+
+    def ok(document):
+        if type_ok is not None and not type_ok(document):
+            return False
+        if enum is not None and document not in enum:
+            return False
+        for python_types, branch_ok, _ in branches:
+            if isinstance(document, python_types):
+                return branch_ok(document)
+        return True
+
+    def errors(document, path=""):
+        if type_ok is not None and not type_ok(document):
+            return [f"{path or 'documento'}: esperado {bson_type}, recebido {type(document).__name__}"]
+        found = []
+        if enum is not None and document not in enum:
+            found.append(f"{path or 'documento'}: valor fora de {enum}")
+        for python_types, _, branch_errors in branches:
+            if isinstance(document, python_types):
+                found.extend(branch_errors(document, path))
+                break
+        return found
+
+    if plain_types is not None and enum is None and not branches:
+        # Nó folha: a verificação é só o isinstance
+        return type_ok, errors, plain_types
+    return ok, errors, None
+
+
+def _to_object_id(value, path):
+    if isinstance(value, dict) and "$oid" in value:
+        try:
+            return ObjectId(value["$oid"])
+        except Exception:
+            raise ValueError(f"Invalid ObjectId value for key '{path}': {value}")
+    return value
+
+
+def _compile_convert(schema):
+    """
+    Compila um (sub-)schema em convert(value, path) que troca {"$oid": ...} por ObjectId só nos
+    campos declarados como objectId; devolve None quando não há nenhum abaixo deste ponto.
+    """
+    bson_type = schema.get("bsonType")
+    if bson_type == "objectId" or (isinstance(bson_type, list) and "objectId" in bson_type):
+        return _to_object_id
+
+    properties = {}
+    for field, sub in schema.get("properties", {}).items():
+        convert = _compile_convert(sub)
+        if convert is not None:
+            properties[field] = convert
+    items = _compile_convert(schema["items"]) if isinstance(schema.get("items"), dict) else None
+    if not properties and items is None:
+        return None
+    if items is _to_object_id:
+        def items_list(value, path):
+            # Arrays de ids (suggestion.shoes): sem uma chamada por item no caso comum
+            try:
+                return [ObjectId(item["$oid"]) if type(item) is dict and "$oid" in item else item for item in value]
+            except Exception:
+                return [_to_object_id(item, path) for item in value]
+    elif items is not None:
+        def items_list(value, path):
+            return [items(item, path) for item in value]
+
+    def convert(value, path=""):
+        if properties and isinstance(value, dict):
+            prefix = path + "." if path else ""
+            for field, convert_field in properties.items():
+                if field in value:
+                    value[field] = convert_field(value[field], prefix + field)
+        elif items is not None and isinstance(value, list):
+            return items_list(value, path)
+        return value
+
+    return convert
+
+
+class CompiledSchema:
+    """
+    Conversor e validador de uma coleção, gerados uma vez a partir do seu $jsonSchema.
+
+    convert troca {"$oid": ...} por ObjectId exatamente nos campos declarados como objectId
+    (e no _id); validate recusa o documento no processo, antes de qualquer escrita e sem round
+    trip por documento. Usado pelas rotas CRUD e pelo imports/import_suggestion.py.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        properties = dict(schema.get("properties", {}))
+        properties.setdefault("_id", {"bsonType": "objectId"})
+        self._convert = _compile_convert({**schema, "properties": properties})
+        self._full = _compile(schema)
+        self._partial = _compile(schema, required=False)
+
+    def convert(self, document):
+        """
+        Converte o documento (alterando-o) e o devolve.
+
+        Raises:
+            ValueError: {"$oid": ...} inválido em um campo objectId.
+        """
+        return self._convert(document) if self._convert is not None else document
+
+    def validate(self, document, partial=False):
+        """
+        Erros do documento; `partial` valida só os campos presentes (corpo de um $set).
+
+        Returns:
+            list: Mensagens de erro; vazia quando o documento é válido.
+        """
+        ok, errors, _ = self._partial if partial else self._full
+        return [] if ok(document) else errors(document)
+
+
+def compile_schemas(collections=SCHEMAS):
+    """
+    CompiledSchema de cada coleção; as que não têm schema em SCHEMAS só convertem o _id.
+
+    Returns:
+        dict: Coleção -> CompiledSchema.
+    """
+    return {collection: CompiledSchema(load_collection_schema(collection) if collection in SCHEMAS else {})
+            for collection in collections}
@@ -0,0 +1,164 @@
+"""
+Busca por prefixo em modelo, código e título (autocomplete do admin e /shoes/search).
+
+Cada card de `shoe_cards` guarda em `searchKeys` as palavras normalizadas (minúsculas, sem
+acento) do modelo, do código e do título, e o código sem separadores. A busca normaliza o
+texto digitado do mesmo jeito e exige que cada termo seja prefixo de alguma chave:
+
+    "tenis ultrab"  ->  {"$and": [{"searchKeys": {"$regex": "^tenis"}},
+                                  {"searchKeys": {"$regex": "^ultrab"}}]}
+
+Regex ancorada e sensível a maiúsculas vira um intervalo no índice multikey de searchKeys,
+então o custo depende do número de resultados pedidos e não do tamanho do catálogo.
+
+Os top-k resultados (search) saem em ordem determinística, por faixas de relevância, cada uma
+lida na ordem de um índice de `shoe_cards`:
+    1. código começando pelo texto (codeKey, o código sem separadores): o código exato vem
+       primeiro, porque é o menor da faixa;
+    2. modelo começando pelo texto (modelKey, as palavras do modelo);
+    3. os demais casamentos de searchKeys, por código.
+
+A terceira faixa não tem um índice na ordem do código (searchKeys é multikey e o filtro é um
+intervalo). Em vez de ordenar no servidor todos os casamentos — o catálogo inteiro para uma
+palavra comum como "tenis" — ela percorre o intervalo do termo mais longo no índice
+{searchKeys, _id}, lê no máximo SEARCH_SCAN_LIMIT cards, confere os outros termos no processo
+e ordena por código só esses. Com mais casamentos que isso, a faixa devolve os primeiros por
+código entre os SEARCH_SCAN_LIMIT cujas chaves vêm antes no índice (palavra casada, depois _id).
+"""
+import re
+import unicodedata
+
+SEARCH_FIELDS = ("model", "code", "title")
+
+SEARCH_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+# Máximo de cards lidos pela terceira faixa de search (ver o início do módulo)
+SEARCH_SCAN_LIMIT = 1000
+
+# Índice de shoe_cards percorrido pela terceira faixa (database.INDEXES)
+KEYWORD_INDEX = [("searchKeys", 1), ("_id", 1)]
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """Minúsculas sem acentos: "TÊNIS Ação" -> "tenis acao"."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def terms(text):
+    """Palavras normalizadas de um texto, na ordem em que aparecem e sem repetição."""
+    return list(dict.fromkeys(_WORD.findall(normalize(text))))
+
+
+def search_keys(shoe):
+    """Chaves de busca de um tênis: palavras de SEARCH_FIELDS e o código sem separadores."""
+    keys = []
+    for field in SEARCH_FIELDS:
+        keys.extend(terms(shoe.get(field)))
+    compact_code = "".join(terms(shoe.get("code")))
+    if compact_code:
+        keys.append(compact_code)
+    return sorted(set(keys))
+
+
+def code_key(code):
+    """Código normalizado e sem separadores: "GX-1234" -> "gx1234"."""
+    return "".join(terms(code))
+
+
+def model_key(model):
+    """Palavras normalizadas do modelo separadas por espaço: "Samba  OG" -> "samba og"."""
+    return " ".join(terms(model))
+
+
+def search_filter(text):
+    """
+    Filtro de busca por prefixo para o texto digitado.
+
+    Returns:
+        dict or None: Filtro em searchKeys, ou None quando o texto não tem nenhum termo.
+    """
+    prefixes = [{"searchKeys": {"$regex": f"^{re.escape(term)}"}} for term in terms(text)]
+    if not prefixes:
+        return None
+    return prefixes[0] if len(prefixes) == 1 else {"$and": prefixes}
+
+
+def ranked_queries(text):
+    """
+    Consultas das faixas lidas na ordem de um índice (1 e 2, ver o início do módulo).
+
+    Returns:
+        list: Pares (filtro, ordenação); vazia quando o texto não tem nenhum termo.
+    """
+    words = terms(text)
+    if not words:
+        return []
+    return [
+        ({"codeKey": {"$regex": f"^{re.escape(''.join(words))}"}}, [("codeKey", 1), ("_id", 1)]),
+        ({"modelKey": {"$regex": f"^{re.escape(' '.join(words))}"}}, [("modelKey", 1), ("_id", 1)]),
+    ]
+
+
+def keyword_query(text):
+    """
+    Filtro da terceira faixa, no intervalo do termo mais longo (o mais seletivo), e os demais
+    termos, conferidos no processo.
+
+    Returns:
+        tuple: (filtro em searchKeys, termos restantes), ou (None, []) sem nenhum termo.
+    """
+    words = terms(text)
+    if not words:
+        return None, []
+    anchor = max(words, key=len)
+    return {"searchKeys": {"$regex": f"^{re.escape(anchor)}"}}, [word for word in words if word != anchor]
+
+
+def _keyword_matches(collection, text, limit, projection, seen):
+    query, others = keyword_query(text)
+    if query is None:
+        return []
+    extra = {}
+    if projection:
+        extra = {field: 1 for field in ("searchKeys", "code") if not projection.get(field)}
+        projection = {**projection, **extra}
+    cards = collection.find(query, projection).hint(KEYWORD_INDEX).limit(SEARCH_SCAN_LIMIT)
+    matched = [card for card in cards if card["_id"] not in seen
+               and all(any(key.startswith(word) for key in card["searchKeys"]) for word in others)]
+    matched.sort(key=lambda card: (card.get("code") or "", card["_id"]))
+    for card in matched[:limit]:
+        for field in extra:
+            card.pop(field, None)
+    return matched[:limit]
+
+
+def search(collection, text, limit, projection=None):
+    """
+    Os `limit` cards mais relevantes para o texto digitado.
+
+    As duas primeiras faixas são consultas com limit na ordem do seu índice; a seguinte só é lida
+    quando faltam resultados, e um card já encontrado numa faixa anterior não se repete.
+
+    Args:
+        collection: Coleção `shoe_cards`.
+        text (str): Texto digitado.
+        limit (int): Quantidade máxima de resultados.
+        projection (dict, opcional): Campos devolvidos (inclusão).
+
+    Returns:
+        list: Cards, do mais ao menos relevante.
+    """
+    results, seen = [], set()
+    for query, sort in ranked_queries(text):
+        # Pedir `limit` basta: no máximo len(results) dos lidos já apareceram antes
+        for card in collection.find(query, projection).sort(sort).limit(limit):
+            if card["_id"] not in seen:
+                seen.add(card["_id"])
+                results.append(card)
+                if len(results) == limit:
+                    return results
+    return results + _keyword_matches(collection, text, limit - len(results), projection, seen)
@@ -0,0 +1,269 @@
+"""
+Coleção materializada `shoe_cards`: um documento pré-montado por tênis para as listagens.
+
+Cada card junta o tênis, os links do seu primeiro documento de imagens, as tags do quiosque,
+se há imagens do Pinterest e as chaves da busca por prefixo (utils/search.py):
+
+    {"_id": <shoeId>, "model": ..., "code": ..., "title": ..., "images": [links],
+     "tag": [{"tagAddress": ...}], "tagCount": 2, "hasPinterest": true, "searchKeys": [...],
+     "codeKey": ..., "modelKey": ...}
+
+Assim /shoes-with-images e /shoes-and-tags viram um único find indexado em vez de um $lookup
+por tênis a cada requisição. Os cards são atualizados a cada escrita em shoes, images, tag e
+pinterest (ver refresh_for); rebuild refaz a coleção inteira e check aponta divergências.
+Cada atualização incrementa a versão dos cards (cards_version), usada nos ETags das listagens.
+
+Uso (a partir da raiz do repositório, com MONGO_URI no ambiente ou no .env):
+    python -m utils.shoe_cards rebuild
+    python -m utils.shoe_cards check [--fix]
+"""
+import argparse
+import logging
+import os
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DeleteOne, ReplaceOne
+
+from database import META_COLLECTION
+from utils.search import code_key, model_key, search_keys
+from utils.snapshot import SNAPSHOT_SOURCES, mark_dirty
+
+logger = logging.getLogger(__name__)
+
+SHOE_CARDS_COLLECTION = "shoe_cards"
+
+# Coleções cujo conteúdo aparece nos cards
+CARD_SOURCES = ("shoes", "images", "tag", "pinterest")
+
+# Coleções cujas escritas devem passar por refresh_for (cards e snapshot do catálogo)
+REFRESH_SOURCES = tuple(dict.fromkeys(CARD_SOURCES + SNAPSHOT_SOURCES))
+
+# Documento em META_COLLECTION com a versão atual dos cards e o formato com que foram montados
+CARDS_VERSION_ID = "shoe_cards"
+
+# Incrementar quando o formato do card mudar: ensure_built refaz os cards na próxima subida
+CARD_FORMAT = 3
+
+BATCH_SIZE = 1000
+
+
+def _object_id(value):
+    try:
+        return ObjectId(value) if value is not None else None
+    except (InvalidId, TypeError):
+        return None
+
+
+def affected_shoe_ids(collection, *documents):
+    """
+    Ids dos tênis cujos cards dependem dos documentos informados.
+
+    Em `shoes` o próprio _id; nas demais coleções o shoeId (string em `tag`, ObjectId nas outras).
+    Valores que não são ObjectId válidos são ignorados.
+    """
+    ids = set()
+    for document in documents:
+        if not document:
+            continue
+        shoe_id = _object_id(document.get("_id") if collection == "shoes" else document.get("shoeId"))
+        if shoe_id is not None:
+            ids.add(shoe_id)
+    return ids
+
+
+def build_cards(db, shoe_ids):
+    """
+    Monta os cards de um lote de tênis com uma consulta por coleção.
+
+    Returns:
+        dict: shoeId -> card, apenas para os tênis que existem.
+    """
+    shoe_ids = list(shoe_ids)
+    shoes = db["shoes"].find({"_id": {"$in": shoe_ids}}, {"model": 1, "code": 1, "title": 1})
+
+    # O card usa o primeiro documento de imagens do tênis, como o $arrayElemAt do antigo $lookup
+    first_images = {}
+    for image in db["images"].find({"shoeId": {"$in": shoe_ids}}, {"shoeId": 1, "links": 1}).sort("_id", 1):
+        first_images.setdefault(image["shoeId"], image.get("links"))
+
+    tags = {}
+    for tag in db["tag"].find({"shoeId": {"$in": [str(shoe_id) for shoe_id in shoe_ids]}},
+                              {"shoeId": 1, "tagAddress": 1}).sort("_id", 1):
+        entry = {"tagAddress": tag["tagAddress"]} if "tagAddress" in tag else {}
+        tags.setdefault(tag["shoeId"], []).append(entry)
+
+    with_pinterest = set(db["pinterest"].distinct("shoeId", {"shoeId": {"$in": shoe_ids}}))
+
+    cards = {}
+    for shoe in shoes:
+        card = {"_id": shoe["_id"]}
+        for field in ("model", "code", "title"):
+            if field in shoe:
+                card[field] = shoe[field]
+        if first_images.get(shoe["_id"]) is not None:
+            card["images"] = first_images[shoe["_id"]]
+        card["tag"] = tags.get(str(shoe["_id"]), [])
+        card["tagCount"] = len(card["tag"])
+        card["hasPinterest"] = shoe["_id"] in with_pinterest
+        card["searchKeys"] = search_keys(shoe)
+        card["codeKey"] = code_key(shoe.get("code"))
+        card["modelKey"] = model_key(shoe.get("model"))
+        cards[shoe["_id"]] = card
+    return cards
+
+
+def refresh_cards(db, shoe_ids):
+    """
+    Recalcula os cards dos tênis informados; cards de tênis removidos são apagados.
+
+    Returns:
+        int: Quantidade de cards gravados ou removidos.
+    """
+    shoe_ids = list(shoe_ids)
+    if not shoe_ids:
+        return 0
+    cards = build_cards(db, shoe_ids)
+    operations = [
+        ReplaceOne({"_id": shoe_id}, cards[shoe_id], upsert=True) if shoe_id in cards else DeleteOne({"_id": shoe_id})
+        for shoe_id in shoe_ids
+    ]
+    db[SHOE_CARDS_COLLECTION].bulk_write(operations, ordered=False)
+    db[META_COLLECTION].update_one({"_id": CARDS_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True)
+    return len(operations)
+
+
+def cards_version(db):
+    """Versão atual dos cards: muda sempre que algum card é regravado ou removido."""
+    meta = db[META_COLLECTION].find_one({"_id": CARDS_VERSION_ID}, {"version": 1})
+    return meta.get("version", 0) if meta else 0
+
+
+def refresh_for(db, collection, *documents):
+    """
+    Atualiza os cards afetados por uma escrita em `collection` e marca as entradas do snapshot
+    do catálogo (utils/snapshot.py) para recálculo.
+
+    Chamado depois que a escrita foi confirmada: uma falha aqui só é registrada no log (o card
+    fica desatualizado até o próximo `check --fix` ou `rebuild`) e não desfaz a resposta da rota.
+
+    Args:
+        db: Banco da aplicação.
+        collection (str): Coleção escrita.
+        *documents: Documentos antes e/ou depois da escrita (basta _id ou shoeId).
+    """
+    if collection not in REFRESH_SOURCES:
+        return
+    shoe_ids = affected_shoe_ids(collection, *documents)
+    if collection in CARD_SOURCES:
+        try:
+            refresh_cards(db, shoe_ids)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar shoe_cards após escrita em {collection}: {e}")
+    try:
+        mark_dirty(db, shoe_ids)
+    except Exception as e:
+        logger.error(f"Erro ao marcar o snapshot após escrita em {collection}: {e}")
+
+
+def _id_batches(collection, batch_size):
+    batch = []
+    for document in collection.find({}, {"_id": 1}).sort("_id", 1):
+        batch.append(document["_id"])
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(db, batch_size=BATCH_SIZE):
+    """
+    Recria todos os cards a partir das coleções de origem e remove cards de tênis inexistentes.
+
+    Returns:
+        dict: Quantidade de cards gravados e de cards órfãos removidos.
+    """
+    written = 0
+    for batch in _id_batches(db["shoes"], batch_size):
+        written += refresh_cards(db, batch)
+    orphans = 0
+    for batch in _id_batches(db[SHOE_CARDS_COLLECTION], batch_size):
+        existing = set(db["shoes"].distinct("_id", {"_id": {"$in": batch}}))
+        missing = [shoe_id for shoe_id in batch if shoe_id not in existing]
+        if missing:
+            orphans += db[SHOE_CARDS_COLLECTION].delete_many({"_id": {"$in": missing}}).deleted_count
+    # A remoção de órfãos também muda as listagens
+    db[META_COLLECTION].update_one({"_id": CARDS_VERSION_ID},
+                                   {"$set": {"format": CARD_FORMAT}, "$inc": {"version": 1}}, upsert=True)
+    logger.info(f"shoe_cards reconstruída: {written} cards gravados, {orphans} órfãos removidos.")
+    return {"written": written, "orphans": orphans}
+
+
+def check(db, batch_size=BATCH_SIZE):
+    """
+    Compara os cards gravados com os que seriam montados agora.
+
+    Returns:
+        list: Divergências {"shoeId", "problem"}, com problem "missing" (tênis sem card),
+        "stale" (card diferente do esperado) ou "orphan" (card de tênis inexistente).
+    """
+    problems = []
+    for batch in _id_batches(db["shoes"], batch_size):
+        expected = build_cards(db, batch)
+        stored = {card["_id"]: card for card in db[SHOE_CARDS_COLLECTION].find({"_id": {"$in": batch}})}
+        for shoe_id, card in expected.items():
+            if shoe_id not in stored:
+                problems.append({"shoeId": shoe_id, "problem": "missing"})
+            elif stored[shoe_id] != card:
+                problems.append({"shoeId": shoe_id, "problem": "stale"})
+    for batch in _id_batches(db[SHOE_CARDS_COLLECTION], batch_size):
+        existing = set(db["shoes"].distinct("_id", {"_id": {"$in": batch}}))
+        problems.extend({"shoeId": shoe_id, "problem": "orphan"} for shoe_id in batch if shoe_id not in existing)
+    return problems
+
+
+def ensure_built(db):
+    """
+    Monta os cards na primeira subida após a criação da coleção (ou em um banco recém-importado)
+    e os refaz quando foram montados com um CARD_FORMAT anterior.
+    """
+    meta = db[META_COLLECTION].find_one({"_id": CARDS_VERSION_ID}) or {}
+    empty = db[SHOE_CARDS_COLLECTION].estimated_document_count() == 0
+    if db["shoes"].estimated_document_count() > 0 and (empty or meta.get("format") != CARD_FORMAT):
+        rebuild(db)
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from database import create_mongo_client
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--fix", action="store_true", help="Com check: recalcula os cards divergentes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        parser.error("MONGO_URI não definido")
+    db = create_mongo_client(uri)["danki-adidas"]
+
+    if args.command == "rebuild":
+        rebuild(db, args.batch_size)
+        return
+
+    problems = check(db, args.batch_size)
+    for problem in problems:
+        logger.warning(f"Card {problem['problem']}: {problem['shoeId']}")
+    logger.info(f"{len(problems)} divergências encontradas.")
+    if problems and args.fix:
+        refresh_cards(db, [problem["shoeId"] for problem in problems])
+        logger.info("Cards divergentes recalculados.")
+
+
+if __name__ == "__main__":
+    main()
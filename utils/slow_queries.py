@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from bson import json_util
+from pymongo import monitoring
+
+from utils.metrics import NO_REQUEST, command_collection, current_request_stats
+
+logger = logging.getLogger(__name__)
+
+# Capped collection receiving one document per slow operation
+SLOW_QUERY_COLLECTION = "slow_queries"
+SLOW_QUERY_COLLECTION_BYTES = 16 * 1024 * 1024
+
+# Only these commands can be explained and are issued by the read routes
+EXPLAINABLE_COMMANDS = ("find", "aggregate")
+
+# Stage bodies whose values are literals rather than query structure
+LITERAL_STAGES = ("$match", "$skip", "$limit", "$sample")
+
+# Command fields added by the driver that explain does not accept
+DRIVER_FIELDS = ("lsid", "txnNumber", "autocommit", "startTransaction", "apiVersion", "apiStrict",
+                 "apiDeprecationErrors", "readConcern", "writeConcern")
+
+
+def _mask(value):
+    """Replace every literal in a filter with '?', keeping operators and field names."""
+    if isinstance(value, dict):
+        return {key: _mask(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        masked = [_mask(item) for item in value]
+        # An $in over 3 ids and one over 300 ids have the same shape
+        if masked and all(item == "?" for item in masked):
+            return ["?"]
+        return masked
+    return "?"
+
+
+def query_shape(command_name, command):
+    """
+    Reduce a find/aggregate command to its shape: the same query with different values
+    produces the same shape.
+
+    Returns:
+        dict: Collection, filter/pipeline structure and sort of the command.
+    """
+    shape = {"command": command_name, "collection": command_collection(command_name, command)}
+    if command_name == "find":
+        shape["filter"] = _mask(command.get("filter", {}))
+        if command.get("sort"):
+            shape["sort"] = dict(command["sort"])
+        if command.get("projection"):
+            shape["projection"] = sorted(command["projection"])
+    else:
+        shape["pipeline"] = [
+            {stage: (_mask(body) if stage in LITERAL_STAGES else body) for stage, body in step.items()}
+            for step in command.get("pipeline", [])
+        ]
+    return shape
+
+
+def shape_id(shape):
+    """Stable identifier used to group operations by query shape."""
+    return hashlib.sha1(json_util.dumps(shape, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def explainable_command(command):
+    """Copy of a monitored command without the fields the driver adds for the wire protocol."""
+    return {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in DRIVER_FIELDS
+    }
+
+
+def _find_key(document, key):
+    """Depth-first search for the first value stored under `key` in a nested explain document."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        items = document.values()
+    elif isinstance(document, list):
+        items = document
+    else:
+        return None
+    for item in items:
+        found = _find_key(item, key)
+        if found is not None:
+            return found
+    return None
+
+
+def plan_stages(plan):
+    """Flatten a winning plan into its stage chain, e.g. 'FETCH > IXSCAN'."""
+    stages = []
+    while isinstance(plan, dict):
+        if "queryPlan" in plan:  # slot based engine wraps the classic plan
+            plan = plan["queryPlan"]
+            continue
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+def summarize_explain(explain):
+    """Pick the numbers that matter from an explain("executionStats") result."""
+    stats = _find_key(explain, "executionStats") or {}
+    return {
+        "nReturned": stats.get("nReturned"),
+        "totalDocsExamined": stats.get("totalDocsExamined"),
+        "totalKeysExamined": stats.get("totalKeysExamined"),
+        "executionTimeMillis": stats.get("executionTimeMillis"),
+        "winningPlan": plan_stages(_find_key(explain, "winningPlan")),
+    }
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """
+    pymongo command listener that captures find/aggregate operations slower than a threshold.
+
+    The listener itself only compares durations; the explain("executionStats") and the insert
+    into the capped collection run on a background thread. Explain re-executes the query, so each
+    query shape is explained at most once per `explain_interval` seconds.
+    """
+
+    def __init__(self, threshold_ms=200, explain_interval=60, max_queue=100):
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self._client = None
+        self._pending = {}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._last_explained = {}
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._collection_ready = False
+
+    def attach(self, client):
+        """Give the recorder the MongoClient used for explain and for storing the records."""
+        self._client = client
+
+    # ---- CommandListener -------------------------------------------------
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            stats = current_request_stats()
+            self._pending[event.request_id] = (
+                event.database_name, event.command, stats.endpoint if stats is not None else NO_REQUEST
+            )
+
+    def succeeded(self, event):
+        entry = self._pending.pop(event.request_id, None)
+        if entry is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= self.threshold_ms and self._client is not None:
+            database_name, command, endpoint = entry
+            try:
+                self._queue.put_nowait((database_name, event.command_name, command, endpoint, duration_ms))
+                self._ensure_worker()
+            except queue.Full:
+                logger.warning("Slow query queue is full; dropping record.")
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+    # ---- Background processing -------------------------------------------
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="slow-query-recorder", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self.record(*item)
+            except Exception as e:
+                logger.error(f"Failed to record slow query: {e}")
+
+    def _collection(self, db):
+        if not self._collection_ready:
+            if SLOW_QUERY_COLLECTION not in db.list_collection_names():
+                db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_COLLECTION_BYTES)
+            self._collection_ready = True
+        return db[SLOW_QUERY_COLLECTION]
+
+    def record(self, database_name, command_name, command, endpoint, duration_ms):
+        """Explain (when due) and store one slow operation."""
+        db = self._client[database_name]
+        shape = query_shape(command_name, command)
+        key = shape_id(shape)
+
+        explain = None
+        now = time.monotonic()
+        if now - self._last_explained.get(key, float("-inf")) >= self.explain_interval:
+            self._last_explained[key] = now
+            try:
+                explain = db.command({"explain": explainable_command(command), "verbosity": "executionStats"})
+            except Exception as e:
+                logger.warning(f"Explain failed for slow {command_name} on {shape['collection']}: {e}")
+
+        document = {
+            "ts": datetime.now(timezone.utc),
+            "shapeId": key,
+            "shape": json_util.dumps(shape, sort_keys=True),
+            "command": command_name,
+            "collection": shape["collection"],
+            "endpoint": endpoint,
+            "durationMs": round(duration_ms, 2),
+        }
+        if explain is not None:
+            document["summary"] = summarize_explain(explain)
+            document["explain"] = json_util.dumps(explain)
+        self._collection(db).insert_one(document)
+        logger.warning(f"Slow {command_name} on {shape['collection']} from {endpoint}: {duration_ms:.0f} ms")
+
+
+def worst_offenders(db, limit=50):
+    """
+    Group recorded slow operations by query shape, worst total time first.
+
+    Returns:
+        list: One entry per shape with count, total/avg/max duration, endpoints and the
+        most recent explain summary.
+    """
+    pipeline = [
+        {"$sort": {"ts": -1}},
+        {"$group": {
+            "_id": "$shapeId",
+            "shape": {"$first": "$shape"},
+            "command": {"$first": "$command"},
+            "collection": {"$first": "$collection"},
+            "endpoints": {"$addToSet": "$endpoint"},
+            "count": {"$sum": 1},
+            "totalMs": {"$sum": "$durationMs"},
+            "avgMs": {"$avg": "$durationMs"},
+            "maxMs": {"$max": "$durationMs"},
+            "lastSeen": {"$first": "$ts"},
+            "summaries": {"$push": "$summary"},
+            "explains": {"$push": "$explain"},
+        }},
+        {"$sort": {"totalMs": -1}},
+        {"$limit": limit},
+    ]
+    offenders = list(db[SLOW_QUERY_COLLECTION].aggregate(pipeline))
+    for offender in offenders:
+        # Records are sorted newest first, so this is the latest explained run of the shape
+        offender["summary"] = next((summary for summary in offender.pop("summaries") if summary), None)
+        offender["explain"] = next((explain for explain in offender.pop("explains") if explain), None)
+    return offenders
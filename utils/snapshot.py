@@ -0,0 +1,304 @@
+"""
+Snapshot compacto do catálogo para os quiosques resolverem leituras de tag offline.
+
+O snapshot é um JSON comprimido com gzip:
+
+    {"version": 42, "generatedAt": "...", "tags": {tagAddress: shoeId},
+     "shoes": {shoeId: <payload completo do /shoe-details>}}
+
+Com ele o quiosque troca as duas idas à rede de cada leitura (/tag-by-address e /shoe-details)
+por uma consulta local, e só revalida o snapshot com If-None-Match de tempos em tempos.
+
+Montagem incremental: cada tênis tem uma entrada em `catalog_snapshot` com as tags e o payload
+já serializado. Escritas nas coleções de origem só marcam a entrada como suja (mark_dirty, via
+shoe_cards.refresh_for); na próxima atualização apenas as entradas sujas — e as dos tênis que as
+exibem como cor ou sugestão — são recalculadas, a versão é incrementada e o JSON é remontado
+concatenando os payloads prontos.
+
+A atualização nunca roda na thread da requisição (CatalogSnapshot): a primeira montagem começa
+ao subir o app, e um pedido que chega com a verificação vencida (SNAPSHOT_CHECK_INTERVAL
+segundos, padrão 2) dispara a próxima em segundo plano e recebe na hora o último snapshot
+montado. Enquanto a primeira montagem não termina a rota responde 503 com Retry-After.
+
+Uso (a partir da raiz do repositório, com MONGO_URI no ambiente ou no .env):
+    python -m utils.snapshot rebuild
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+
+from catalog import presign_detail
+from database import META_COLLECTION
+from utils.fieldsets import DETAIL_EXPANSIONS, DETAIL_FIELDS, RELATED_IMAGES_PROJECTION, DetailFieldset
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLLECTION = "catalog_snapshot"
+
+# Coleções cujo conteúdo aparece no snapshot
+SNAPSHOT_SOURCES = ("shoes", "images", "tag", "pinterest", "suggestion")
+
+# Documento em META_COLLECTION com a versão atual do snapshot
+SNAPSHOT_VERSION_ID = "catalog_snapshot"
+
+BATCH_SIZE = 1000
+
+FULL_DETAIL = DetailFieldset(DETAIL_FIELDS, DETAIL_EXPANSIONS)
+
+# Intervalo mínimo, em segundos, entre duas verificações de entradas sujas pedidas pela rota
+CHECK_INTERVAL = 2
+
+
+def mark_dirty(db, shoe_ids):
+    """
+    Marca as entradas dos tênis para recálculo no próximo pedido do snapshot.
+
+    Cada marcação grava um token novo: um recálculo que leu os dados antes de uma escrita
+    concorrente não apaga a marca feita por ela (ver refresh_dirty).
+    """
+    operations = [UpdateOne({"_id": shoe_id}, {"$set": {"dirty": ObjectId()}}, upsert=True) for shoe_id in shoe_ids]
+    if operations:
+        db[SNAPSHOT_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def build_details(db, shoe_ids):
+    """
+    Monta o payload completo do /shoe-details de um lote de tênis com uma consulta por coleção.
+
+    Returns:
+        dict: shoeId -> payload, só para tênis existentes (na ordem em que o Mongo os devolveu).
+    """
+    shoe_ids = list(shoe_ids)
+    shoes = list(db["shoes"].find({"_id": {"$in": shoe_ids}}, FULL_DETAIL.shoe_projection()))
+
+    def grouped(collection, projection):
+        documents = {}
+        for document in db[collection].find({"shoeId": {"$in": shoe_ids}}, projection).sort("_id", 1):
+            documents.setdefault(document["shoeId"], []).append(document)
+        return documents
+
+    images = grouped("images", {"shoeId": 1, "links": 1})
+    pinterest = grouped("pinterest", {"shoeId": 1, "links": 1})
+    suggestions = {shoe_id: documents[0] for shoe_id, documents in grouped("suggestion", {"shoeId": 1, "shoes": 1}).items()}
+
+    related_ids = list({related_id for shoe in shoes
+                        for related_id in FULL_DETAIL.related_ids(shoe, suggestions.get(shoe["_id"]))})
+    related_shoes = list(db["shoes"].find({"_id": {"$in": related_ids}}, {"code": 1, "model": 1}))
+    related_images = list(db["images"].find({"shoeId": {"$in": related_ids}}, RELATED_IMAGES_PROJECTION).sort("_id", 1))
+
+    return {shoe["_id"]: FULL_DETAIL.build(shoe, images.get(shoe["_id"], []), pinterest.get(shoe["_id"], []),
+                                           suggestions.get(shoe["_id"]), related_shoes, related_images)
+            for shoe in shoes}
+
+
+def build_entries(db, shoe_ids):
+    """
+    Monta as entradas de um lote de tênis com uma consulta por coleção.
+
+    Returns:
+        dict: shoeId -> {"tags": [...], "fragment": payload serializado}, só para tênis existentes.
+    """
+    shoe_ids = list(shoe_ids)
+    details = build_details(db, shoe_ids)
+
+    tags = {}
+    for tag in db["tag"].find({"shoeId": {"$in": [str(shoe_id) for shoe_id in shoe_ids]}},
+                              {"shoeId": 1, "tagAddress": 1}).sort("_id", 1):
+        if tag.get("tagAddress"):
+            tags.setdefault(tag["shoeId"], []).append(tag["tagAddress"])
+
+    return {shoe_id: {"tags": tags.get(str(shoe_id), []),
+                      "fragment": json.dumps(detail, ensure_ascii=False, separators=(",", ":"))}
+            for shoe_id, detail in details.items()}
+
+
+def refresh_dirty(db, batch_size=BATCH_SIZE):
+    """
+    Recalcula as entradas sujas e incrementa a versão do snapshot quando houve alguma.
+
+    Returns:
+        int: Quantidade de entradas recalculadas ou removidas.
+    """
+    dirty = [entry["_id"] for entry in db[SNAPSHOT_COLLECTION].find({"dirty": {"$exists": True}}, {"_id": 1})]
+    if not dirty:
+        return 0
+    # Tênis que exibem os alterados como cor ou sugestão mostram o código, modelo e imagem deles
+    referrers = set(db["shoes"].distinct("_id", {"colors": {"$in": dirty}}))
+    referrers |= set(db["suggestion"].distinct("shoeId", {"shoes": {"$in": dirty}}))
+    mark_dirty(db, referrers - set(dirty))
+
+    tokens = {entry["_id"]: entry["dirty"]
+              for entry in db[SNAPSHOT_COLLECTION].find({"dirty": {"$exists": True}}, {"dirty": 1})}
+    shoe_ids = sorted(tokens)
+    for start in range(0, len(shoe_ids), batch_size):
+        batch = shoe_ids[start:start + batch_size]
+        entries = build_entries(db, batch)
+        operations = []
+        for shoe_id in batch:
+            # Só limpa a marca que foi lida: uma marcação nova no meio do caminho continua valendo
+            where = {"_id": shoe_id, "dirty": tokens[shoe_id]}
+            if shoe_id in entries:
+                operations.append(UpdateOne(where, {"$set": entries[shoe_id], "$unset": {"dirty": ""}}))
+            else:
+                operations.append(DeleteOne(where))
+        db[SNAPSHOT_COLLECTION].bulk_write(operations, ordered=False)
+
+    db[META_COLLECTION].update_one({"_id": SNAPSHOT_VERSION_ID},
+                                   {"$inc": {"version": 1}, "$set": {"token": ObjectId()}}, upsert=True)
+    return len(shoe_ids)
+
+
+def rebuild(db, batch_size=BATCH_SIZE):
+    """Recalcula todas as entradas (e remove as de tênis que não existem mais)."""
+    shoe_ids = set(db["shoes"].distinct("_id")) | set(db[SNAPSHOT_COLLECTION].distinct("_id"))
+    mark_dirty(db, shoe_ids)
+    count = refresh_dirty(db, batch_size)
+    logger.info(f"Snapshot do catálogo reconstruído: {count} entradas.")
+    return count
+
+
+def assemble(db, version, presigner=None):
+    """
+    JSON do snapshot montado a partir dos payloads já serializados das entradas.
+
+    Com o bucket privado (presigner, ver utils/boto.py) os links de cada payload são trocados
+    pelas URLs assinadas do período atual, como no /shoe-details; as entradas continuam
+    gravadas com os links originais.
+    """
+    tags, fragments = {}, []
+    for entry in db[SNAPSHOT_COLLECTION].find({"fragment": {"$exists": True}}, {"tags": 1, "fragment": 1}).sort("_id", 1):
+        fragment = entry["fragment"]
+        if presigner is not None:
+            detail = presign_detail(json.loads(fragment), presigner)
+            fragment = json.dumps(detail, ensure_ascii=False, separators=(",", ":"))
+        fragments.append(f'"{entry["_id"]}":{fragment}')
+        for address in entry.get("tags", []):
+            tags[address] = str(entry["_id"])
+    header = json.dumps({"version": version, "generatedAt": datetime.now(timezone.utc).isoformat(), "tags": tags},
+                        ensure_ascii=False, separators=(",", ":"))
+    return (header[:-1] + ',"shoes":{' + ",".join(fragments) + "}}").encode("utf-8")
+
+
+class CatalogSnapshot:
+    """Último snapshot comprimido deste processo, atualizado em segundo plano."""
+
+    def __init__(self, db, check_interval=CHECK_INTERVAL, presigner=None, clock=time.monotonic):
+        self.db = db
+        self.presigner = presigner
+        self.check_interval = check_interval
+        self._clock = clock
+        self._current = None  # {"version", "etag", "body" (JSON gzip), "size" (bytes sem compressão)}
+        self._key = None
+        self._checked_at = None
+        self._refreshing = threading.Lock()
+
+    def _update(self):
+        db = self.db
+        self._checked_at = self._clock()
+        if db[SNAPSHOT_COLLECTION].estimated_document_count() == 0 and db["shoes"].estimated_document_count() > 0:
+            rebuild(db)
+        else:
+            refresh_dirty(db)
+        meta = db[META_COLLECTION].find_one({"_id": SNAPSHOT_VERSION_ID}) or {}
+        # Com o bucket privado o período de assinatura também entra na chave (e no ETag): na
+        # virada o snapshot é remontado com URLs novas e os quiosques deixam de usar as antigas
+        epoch = self.presigner.epoch() if self.presigner is not None else None
+        key = (meta.get("version", 0), str(meta.get("token", "")), epoch)
+        # Só recomprime quando a versão mudou (aqui ou em outro processo)
+        if key != self._key:
+            raw = assemble(db, key[0], self.presigner)
+            signing = f"-s{epoch}" if epoch is not None else ""
+            self._current = {"version": key[0], "etag": f"snapshot-{key[0]}-{key[1][-8:]}{signing}",
+                             "body": gzip.compress(raw, mtime=0), "size": len(raw)}
+            self._key = key
+        return self._current
+
+    def update(self):
+        """
+        Recalcula as entradas sujas e remonta o snapshot quando a versão muda, nesta thread.
+
+        Returns:
+            dict: {"version", "etag", "body" (JSON gzip), "size" (bytes sem compressão)}.
+        """
+        with self._refreshing:
+            return self._update()
+
+    def _update_in_background(self):
+        if not self._refreshing.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._update()
+            except Exception as e:
+                logger.error(f"Erro ao atualizar o snapshot do catálogo: {e}")
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="catalog-snapshot", daemon=True).start()
+
+    def get(self):
+        """
+        Último snapshot montado, sem esperar por consultas; com a verificação vencida dispara a
+        próxima atualização em segundo plano.
+
+        Returns:
+            dict or None: Como em update; None enquanto a primeira montagem não terminou.
+        """
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._update_in_background()
+        return self._current
+
+    def start(self):
+        """Começa a primeira montagem em segundo plano."""
+        self._checked_at = self._clock()
+        self._update_in_background()
+        return self
+
+
+def init_snapshot(app, db):
+    """
+    Cria o CatalogSnapshot do app Flask (em app.extensions) e começa a primeira montagem; com o
+    bucket privado usa o PresignedUrls do app (init_presigned_urls antes).
+
+    Configuração: SNAPSHOT_CHECK_INTERVAL (segundos, padrão 2).
+
+    Returns:
+        CatalogSnapshot: O snapshot do processo.
+    """
+    snapshot = CatalogSnapshot(db, check_interval=float(os.getenv("SNAPSHOT_CHECK_INTERVAL", CHECK_INTERVAL)),
+                               presigner=app.extensions.get("presigned_urls"))
+    app.extensions["catalog_snapshot"] = snapshot
+    return snapshot.start()
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from database import create_mongo_client
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        parser.error("MONGO_URI não definido")
+    rebuild(create_mongo_client(uri)["danki-adidas"], args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Vinculação em lote de tags de quiosque aos tênis (POST /tags/assign, POST /tags/import e CLI).
+
+Cada tagAddress pertence a no máximo um tênis: o índice único em `tag.tagAddress`
+(database.INDEXES) garante isso também para escritas concorrentes. Em cada lote:
+    - linhas sem tagAddress, com tênis inválido ou repetidas no arquivo são recusadas;
+    - uma consulta `$in` resolve os tênis (por shoeId ou `code`) e outra as tags já vinculadas;
+    - tags novas são inseridas e as transferidas atualizadas em um único bulk_write não ordenado;
+      tags de outro tênis só mudam de dono com `move`, senão viram conflito;
+    - uma corrida perdida para outra escrita (erro de chave duplicada) vira conflito da linha.
+
+O relatório traz o número da linha de cada conflito, para corrigir a planilha e reenviar
+(reenvios são idempotentes: as linhas já aplicadas aparecem como `unchanged`).
+
+Uso (a partir da raiz do repositório, com MONGO_URI no ambiente ou no .env):
+    python -m utils.tags import tags.csv [--move]
+    python -m utils.tags duplicates [--fix]
+
+O CSV tem cabeçalho com `tagAddress` e `shoeId` ou `code`, separado por vírgula ou ponto e vírgula.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from utils.changes import DELETE, record_changes
+from utils.shoe_cards import refresh_for
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+# Código de erro do MongoDB para violação de índice único
+DUPLICATE_KEY = 11000
+
+
+class TagImportError(Exception):
+    """O arquivo enviado não é um CSV com as colunas esperadas."""
+
+
+def read_csv(stream):
+    """
+    Lê as linhas de um CSV de vinculação.
+
+    Args:
+        stream: Arquivo binário (upload ou arquivo aberto em modo "rb").
+
+    Returns:
+        list: Linhas {"row": número da linha no arquivo, "tagAddress", "shoeId" | "code"}.
+
+    Raises:
+        TagImportError: Sem cabeçalho, sem a coluna tagAddress ou sem shoeId/code.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(text, dialect=dialect)
+    columns = {name.strip() for name in reader.fieldnames or [] if name}
+    if "tagAddress" not in columns or not columns & {"shoeId", "code"}:
+        raise TagImportError("O CSV precisa das colunas tagAddress e shoeId ou code")
+    rows = []
+    for record in reader:
+        row = {"row": reader.line_num}
+        for key, value in record.items():
+            if key and key.strip() in ("tagAddress", "shoeId", "code") and value:
+                row[key.strip()] = value.strip()
+        rows.append(row)
+    return rows
+
+
+def _resolve_shoes(db, rows):
+    """shoeId (ObjectId) de cada linha, com uma consulta `$in` para os ids e outra para os códigos."""
+    ids = {row["shoeId"] for row in rows if ObjectId.is_valid(row.get("shoeId") or "")}
+    existing = set(db["shoes"].distinct("_id", {"_id": {"$in": [ObjectId(shoe_id) for shoe_id in ids]}}))
+    codes = [row["code"] for row in rows if row.get("code") and not row.get("shoeId")]
+    by_code = {shoe["code"]: shoe["_id"] for shoe in db["shoes"].find({"code": {"$in": codes}}, {"code": 1})}
+
+    resolved = {}
+    for row in rows:
+        if row.get("shoeId"):
+            shoe_id = ObjectId(row["shoeId"]) if ObjectId.is_valid(row["shoeId"]) else None
+            resolved[row["row"]] = shoe_id if shoe_id in existing else None
+        else:
+            resolved[row["row"]] = by_code.get(row.get("code"))
+    return resolved
+
+
+def assign_tags(db, rows, move=False, batch_size=BATCH_SIZE):
+    """
+    Vincula tags a tênis em lote.
+
+    Args:
+        db: Banco da aplicação.
+        rows (list): Linhas {"tagAddress", "shoeId" ou "code"}, opcionalmente com "row" (número
+            da linha no arquivo; sem ele é usada a posição na lista, a partir de 1).
+        move (bool): Transfere tags já vinculadas a outro tênis em vez de recusá-las.
+        batch_size (int): Linhas por consulta/bulk_write.
+
+    Returns:
+        dict: {"created", "moved", "unchanged", "conflicts": [{"row", "tagAddress", "reason", ...}]}.
+    """
+    report = {"created": 0, "moved": 0, "unchanged": 0, "conflicts": []}
+    seen = {}
+    valid = []
+    for position, row in enumerate(rows, start=1):
+        row = {**row, "row": row.get("row", position)}
+        address = (row.get("tagAddress") or "").strip()
+        if not address or not (row.get("shoeId") or row.get("code")):
+            report["conflicts"].append({"row": row["row"], "tagAddress": address,
+                                        "reason": "tagAddress e shoeId/code são obrigatórios"})
+            continue
+        if address in seen:
+            report["conflicts"].append({"row": row["row"], "tagAddress": address,
+                                        "reason": f"tagAddress repetido no arquivo (linha {seen[address]})"})
+            continue
+        seen[address] = row["row"]
+        valid.append({**row, "tagAddress": address})
+
+    for start in range(0, len(valid), batch_size):
+        _assign_batch(db, valid[start:start + batch_size], move, report)
+
+    report["conflicts"].sort(key=lambda conflict: conflict["row"])
+    logger.info(f"Tags vinculadas: {report['created']} novas, {report['moved']} transferidas, "
+                f"{report['unchanged']} sem alteração, {len(report['conflicts'])} conflitos.")
+    return report
+
+
+def _assign_batch(db, rows, move, report):
+    shoe_ids = _resolve_shoes(db, rows)
+    current = {tag["tagAddress"]: tag
+               for tag in db["tag"].find({"tagAddress": {"$in": [row["tagAddress"] for row in rows]}},
+                                         {"tagAddress": 1, "shoeId": 1})}
+
+    operations, pending = [], []
+    for row in rows:
+        address, shoe_id = row["tagAddress"], shoe_ids[row["row"]]
+        if shoe_id is None:
+            report["conflicts"].append({"row": row["row"], "tagAddress": address,
+                                        "reason": f"tênis não encontrado: {row.get('shoeId') or row.get('code')}"})
+            continue
+        existing = current.get(address)
+        if existing is not None and existing.get("shoeId") == str(shoe_id):
+            report["unchanged"] += 1
+            continue
+        if existing is not None and not move:
+            report["conflicts"].append({"row": row["row"], "tagAddress": address,
+                                        "reason": "tagAddress já vinculado a outro tênis",
+                                        "shoeId": existing.get("shoeId")})
+            continue
+        # O shoeId de `tag` é gravado como string, como em POST /sneaker/<shoe_id>/tags
+        if existing is None:
+            # Insert, não upsert: se outra escrita criou a tag depois da leitura, o índice único recusa
+            document = {"_id": ObjectId(), "shoeId": str(shoe_id), "tagAddress": address}
+            operations.append(InsertOne(document))
+        else:
+            # Só transfere se a tag ainda estiver com o dono lido acima
+            document = {"_id": existing["_id"], "shoeId": str(shoe_id), "tagAddress": address}
+            operations.append(UpdateOne({"_id": existing["_id"], "shoeId": existing.get("shoeId")},
+                                        {"$set": {"shoeId": str(shoe_id)}}))
+        pending.append((row, existing, document))
+
+    if not operations:
+        return
+    failed = {}
+    try:
+        db["tag"].bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = ("tagAddress vinculado por outra escrita ao mesmo tempo"
+                                      if error.get("code") == DUPLICATE_KEY else error.get("errmsg"))
+
+    # Transferências cujo dono mudou no meio do caminho não casam com o filtro e não gravam nada
+    moved_ids = [document["_id"] for index, (_, existing, document) in enumerate(pending)
+                 if existing is not None and index not in failed]
+    owners = {tag["_id"]: tag.get("shoeId") for tag in db["tag"].find({"_id": {"$in": moved_ids}}, {"shoeId": 1})}
+
+    written, touched = [], []
+    for index, (row, existing, document) in enumerate(pending):
+        if index not in failed and existing is not None and owners.get(document["_id"]) != document["shoeId"]:
+            failed[index] = "tagAddress transferido por outra escrita ao mesmo tempo"
+        if index in failed:
+            report["conflicts"].append({"row": row["row"], "tagAddress": row["tagAddress"], "reason": failed[index]})
+            continue
+        report["moved" if existing is not None else "created"] += 1
+        written.append(document["_id"])
+        touched.extend(filter(None, (existing, document)))
+
+    # Cards e snapshot dos tênis que ganharam e dos que perderam tags; log de alterações das tags
+    refresh_for(db, "tag", *touched)
+    record_changes(db, "tag", written)
+
+
+def duplicates(db):
+    """
+    tagAddresses vinculados a mais de um documento (anteriores ao índice único).
+
+    Returns:
+        list: {"tagAddress", "keep" (o mais antigo, o que /tag-by-address devolve), "remove": [_id]}.
+    """
+    pipeline = [
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$tagAddress", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return [{"tagAddress": group["_id"], "keep": group["ids"][0], "remove": group["ids"][1:]}
+            for group in db["tag"].aggregate(pipeline, allowDiskUse=True)]
+
+
+def remove_duplicates(db, groups):
+    """Apaga os vínculos repetidos listados por duplicates, mantendo o mais antigo de cada tag."""
+    ids = [tag_id for group in groups for tag_id in group["remove"]]
+    if not ids:
+        return 0
+    removed = list(db["tag"].find({"_id": {"$in": ids}}, {"shoeId": 1}))
+    db["tag"].bulk_write([DeleteOne({"_id": tag_id}) for tag_id in ids], ordered=False)
+    refresh_for(db, "tag", *removed)
+    record_changes(db, "tag", ids, DELETE)
+    return len(ids)
+
+
+def main():
+    from dotenv import load_dotenv
+
+    from database import create_mongo_client, ensure_indexes
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    importer = subcommands.add_parser("import", help="Vincula as tags de um CSV")
+    importer.add_argument("path")
+    importer.add_argument("--move", action="store_true", help="Transfere tags já vinculadas a outro tênis")
+    checker = subcommands.add_parser("duplicates", help="Lista tagAddresses vinculados mais de uma vez")
+    checker.add_argument("--fix", action="store_true", help="Mantém só o vínculo mais antigo e cria o índice único")
+    args = parser.parse_args()
+
+    uri = os.getenv("MONGO_URI")
+    if not uri:
+        parser.error("MONGO_URI não definido")
+    db = create_mongo_client(uri)["danki-adidas"]
+
+    if args.command == "import":
+        with open(args.path, "rb") as stream:
+            report = assign_tags(db, read_csv(stream), move=args.move)
+        for conflict in report["conflicts"]:
+            logger.warning(f"Linha {conflict['row']} ({conflict['tagAddress']}): {conflict['reason']}")
+        print(json.dumps({key: value for key, value in report.items() if key != "conflicts"}))
+        return
+
+    groups = duplicates(db)
+    for group in groups:
+        logger.warning(f"{group['tagAddress']}: {len(group['remove']) + 1} vínculos")
+    logger.info(f"{len(groups)} tagAddresses repetidos.")
+    if args.fix:
+        logger.info(f"{remove_duplicates(db, groups)} vínculos repetidos removidos.")
+        ensure_indexes(db)
+
+
+if __name__ == "__main__":
+    main()